@@ -2,7 +2,7 @@
 Admin configuration for repurposer app.
 """
 from django.contrib import admin
-from .models import BrandVoice, ContentSource, RepurposedPost
+from .models import BrandVoice, ContentSource, RepurposedPost, RepurposeJob
 
 
 @admin.register(BrandVoice)
@@ -19,7 +19,7 @@ class ContentSourceAdmin(admin.ModelAdmin):
     list_filter = ['source_type', 'is_processed', 'created_at']
     search_fields = ['title', 'user__username', 'source_url']
     ordering = ['-created_at']
-    readonly_fields = ['raw_text', 'key_insights']
+    readonly_fields = ['raw_text', 'extracted_chars', 'normalized_chars', 'key_insights']
 
 
 @admin.register(RepurposedPost)
@@ -29,3 +29,12 @@ class RepurposedPostAdmin(admin.ModelAdmin):
     search_fields = ['source__title', 'generated_content']
     ordering = ['-created_at']
     readonly_fields = ['generated_content', 'hook', 'hashtags', 'thread_posts']
+
+
+@admin.register(RepurposeJob)
+class RepurposeJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'source', 'user', 'stage', 'created_at', 'finished_at']
+    list_filter = ['kind', 'stage', 'created_at']
+    search_fields = ['source__title', 'user__username']
+    ordering = ['-created_at']
+    readonly_fields = ['progress', 'celery_task_id']
@@ -0,0 +1,17 @@
+"""
+Exceptions raised by the repurposer services.
+"""
+import math
+
+
+class RateLimitExceeded(Exception):
+    """The shared model budget is exhausted; retry after `retry_after` seconds."""
+
+    def __init__(self, retry_after: float, scope: str = 'gemini'):
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.scope = scope
+        super().__init__(f"Rate limit reached for {scope}. Retry in {self.retry_after}s.")
+
+
+class LLMBackendError(Exception):
+    """A model backend call failed."""
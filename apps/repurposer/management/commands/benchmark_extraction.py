@@ -0,0 +1,110 @@
+import statistics
+import time
+from difflib import SequenceMatcher
+from itertools import product
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.repurposer.services.article import MODES, PARSERS, available_parsers, parse_article
+
+FIXTURES_DIR = Path(__file__).resolve().parents[2] / 'benchmarks' / 'html'
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks blog article extraction over saved HTML pages, offline. "
+        "Reports median time and output size per page for each HTML parser and extraction mode, "
+        "compared with the first parser/mode pair."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help=f'HTML files or directories of .html files (default: {FIXTURES_DIR})'
+        )
+        parser.add_argument(
+            '--parser', action='append', dest='parsers', choices=PARSERS,
+            help='Parser to benchmark; repeat for several (default: all installed)'
+        )
+        parser.add_argument(
+            '--mode', action='append', dest='modes', choices=MODES,
+            help='Extraction mode to benchmark; repeat for several (default: all)'
+        )
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per page and configuration (default: 20)')
+
+    def handle(self, *args, **options):
+        files = self._html_files(options['paths'] or [FIXTURES_DIR])
+        if not files:
+            raise CommandError("No .html files found.")
+
+        installed = available_parsers()
+        parsers = [name for name in options['parsers'] or PARSERS if name in installed]
+        missing = [name for name in options['parsers'] or PARSERS if name not in installed]
+        if missing:
+            self.stdout.write(self.style.WARNING(f"Not installed, skipped: {', '.join(missing)}"))
+        if not parsers:
+            raise CommandError("None of the requested parsers is installed.")
+
+        configs = list(product(parsers, options['modes'] or MODES))
+        baseline_label = '/'.join(configs[0])
+        repeat = max(1, options['repeat'])
+        self.stdout.write(
+            f"{'page':<28} {'parser/mode':<24} {'median ms':>10} {'chars':>8} {'size':>7}  vs {baseline_label}"
+        )
+        self.stdout.write("-" * 100)
+
+        times = dict.fromkeys(configs, 0.0)
+        sizes = dict.fromkeys(configs, 0)
+        mismatches = dict.fromkeys(configs, 0)
+        for path in files:
+            html = path.read_bytes()
+            baseline = None
+            for config in configs:
+                (text, title), seconds = self._measure(html, *config, repeat)
+                times[config] += seconds
+                sizes[config] += len(text)
+                if baseline is None:
+                    baseline = (text, title)
+                    parity = 'baseline'
+                elif (text, title) == baseline:
+                    parity = 'identical'
+                else:
+                    mismatches[config] += 1
+                    ratio = SequenceMatcher(None, baseline[0], text).ratio()
+                    parity = f"differs ({ratio:.1%} similar)"
+                size = len(text) / len(baseline[0]) if baseline[0] else 1.0
+                self.stdout.write(
+                    f"{path.name[:28]:<28} {'/'.join(config):<24} {seconds * 1000:>10.2f} "
+                    f"{len(text):>8} {size:>7.0%}  {parity}"
+                )
+
+        self.stdout.write("-" * 100)
+        for config in configs:
+            self.stdout.write(
+                f"{'/'.join(config):<24} total {times[config] * 1000:.2f} ms, {sizes[config]} chars "
+                f"over {len(files)} pages, {mismatches[config]} differing from {baseline_label}"
+            )
+
+    @staticmethod
+    def _html_files(paths) -> list[Path]:
+        files = []
+        for path in map(Path, paths):
+            if path.is_dir():
+                files.extend(sorted(path.glob('*.html')))
+            elif path.is_file():
+                files.append(path)
+            else:
+                raise CommandError(f"No such file or directory: {path}")
+        return files
+
+    @staticmethod
+    def _measure(html: bytes, parser: str, mode: str, repeat: int):
+        """(text, title) and the median wall time of parse_article over repeat runs."""
+        timings = []
+        result = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = parse_article(html, parser=parser, mode=mode)
+            timings.append(time.perf_counter() - started)
+        return result, statistics.median(timings)
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.10 on 2026-10-16 09:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repurposer', '0005_scheduledpost'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentsource',
+            name='source_file',
+            field=models.FileField(blank=True, help_text='Uploaded PDF/text kept for background extraction', null=True, upload_to='source_uploads/'),
+        ),
+        migrations.CreateModel(
+            name='RepurposeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_prompt', models.TextField(blank=True)),
+                ('stage', models.CharField(choices=[('queued', 'Queued'), ('extracting', 'Extracting'), ('generating', 'Generating'), ('persisting', 'Persisting'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('progress', models.JSONField(blank=True, default=dict, help_text='Per-stage progress details')),
+                ('celery_task_id', models.CharField(blank=True, max_length=255)),
+                ('error_message', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='repurposer.contentsource')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='repurpose_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Repurpose Job',
+                'verbose_name_plural': 'Repurpose Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
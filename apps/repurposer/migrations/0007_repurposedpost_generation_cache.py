@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-16 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repurposer', '0006_contentsource_source_file_repurposejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repurposedpost',
+            name='generation_fingerprint',
+            field=models.CharField(blank=True, db_index=True, help_text='Hash of the generation inputs (cache key)', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='repurposedpost',
+            name='generation_cache_hit',
+            field=models.BooleanField(default=False, help_text='Content was served from the generation cache'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-16 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repurposer', '0007_repurposedpost_generation_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repurposejob',
+            name='batch_id',
+            field=models.UUIDField(blank=True, db_index=True, help_text='Set when submitted as part of a batch', null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-16 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repurposer', '0008_repurposejob_batch_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repurposedpost',
+            name='variants',
+            field=models.JSONField(blank=True, default=list, help_text='Alternative versions from the last regeneration'),
+        ),
+        migrations.AddField(
+            model_name='repurposejob',
+            name='kind',
+            field=models.CharField(choices=[('repurpose', 'Repurpose'), ('regenerate', 'Regenerate')], default='repurpose', max_length=20),
+        ),
+    ]
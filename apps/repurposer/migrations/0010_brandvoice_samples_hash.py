@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-16 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repurposer', '0009_repurposedpost_variants_repurposejob_kind'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='brandvoice',
+            name='samples_hash',
+            field=models.CharField(blank=True, help_text='Hash of the sample posts generated_prompt was distilled from', max_length=64),
+        ),
+    ]
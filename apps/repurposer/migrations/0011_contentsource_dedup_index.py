@@ -0,0 +1,50 @@
+# Generated by Django 5.2.10 on 2026-10-16 13:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_dedup_keys(apps, schema_editor):
+    from apps.repurposer.utils import normalize_url, text_sha256
+
+    ContentSource = apps.get_model('repurposer', 'ContentSource')
+    sources = []
+    for source in ContentSource.objects.only('id', 'source_type', 'source_url', 'raw_text').iterator():
+        if source.source_url:
+            source.normalized_url = normalize_url(source.source_url)
+        elif source.source_type == 'text' and source.raw_text:
+            source.content_hash = text_sha256(source.raw_text)
+        else:
+            continue
+        sources.append(source)
+    ContentSource.objects.bulk_update(sources, ['normalized_url', 'content_hash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repurposer', '0010_brandvoice_samples_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentsource',
+            name='normalized_url',
+            field=models.CharField(blank=True, help_text='Canonical form of source_url', max_length=2048),
+        ),
+        migrations.AddField(
+            model_name='contentsource',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='SHA-256 of the submitted text or uploaded file', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='contentsource',
+            index=models.Index(fields=['user', 'normalized_url'], name='contentsource_user_url_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contentsource',
+            index=models.Index(fields=['user', 'content_hash'], name='contentsource_user_hash_idx'),
+        ),
+        migrations.RunPython(backfill_dedup_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-16 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repurposer', '0011_contentsource_dedup_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentsource',
+            name='extracted_chars',
+            field=models.PositiveIntegerField(default=0, help_text='Length of the extracted text before normalization'),
+        ),
+        migrations.AddField(
+            model_name='contentsource',
+            name='normalized_chars',
+            field=models.PositiveIntegerField(default=0, help_text='Length of raw_text after normalization'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-16 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repurposer', '0012_contentsource_text_sizes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='repurposedpost',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('publishing', 'Publishing'), ('published', 'Published'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+    ]
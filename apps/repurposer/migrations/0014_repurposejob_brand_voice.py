@@ -0,0 +1,19 @@
+# Generated by Django 5.2.10 on 2026-10-16 18:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repurposer', '0013_repurposedpost_publishing_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repurposejob',
+            name='brand_voice',
+            field=models.ForeignKey(blank=True, help_text='Brand voice chosen at submission', null=True, on_delete=django.db.models.deletion.SET_NULL, to='repurposer.brandvoice'),
+        ),
+    ]
@@ -4,6 +4,8 @@ Core models for the Content Repurposer app.
 from django.db import models
 from django.conf import settings
 
+from .utils import text_sha256
+
 
 class BrandVoice(models.Model):
     """Stores the user's custom writing style/tone."""
@@ -16,6 +18,7 @@ class BrandVoice(models.Model):
     description = models.TextField(blank=True, help_text="Describe this voice style")
     sample_posts = models.TextField(help_text="3-5 sample posts to learn tone from")
     generated_prompt = models.TextField(blank=True, help_text="AI-generated style instructions")
+    samples_hash = models.CharField(max_length=64, blank=True, help_text="Hash of the sample posts generated_prompt was distilled from")
     
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -28,6 +31,13 @@ class BrandVoice(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.name}"
 
+    @property
+    def style_instruction(self) -> str:
+        """Distilled style instructions, or '' if missing or stale (samples changed since)."""
+        if self.generated_prompt and self.samples_hash == text_sha256(self.sample_posts or ''):
+            return self.generated_prompt
+        return ''
+
 
 class ContentSource(models.Model):
     """The original content (YouTube, Blog, PDF, or raw text)."""
@@ -46,9 +56,16 @@ class ContentSource(models.Model):
     source_type = models.CharField(max_length=20, choices=SourceType.choices)
     source_url = models.URLField(blank=True, null=True)
     title = models.CharField(max_length=255, blank=True)
+    source_file = models.FileField(upload_to='source_uploads/', blank=True, null=True, help_text="Uploaded PDF/text kept for background extraction")
+    
+    # De-duplication keys of the submission
+    normalized_url = models.CharField(max_length=2048, blank=True, help_text="Canonical form of source_url")
+    content_hash = models.CharField(max_length=64, blank=True, help_text="SHA-256 of the submitted text or uploaded file")
     
     # Extracted content
     raw_text = models.TextField(blank=True, help_text="Extracted or pasted text")
+    extracted_chars = models.PositiveIntegerField(default=0, help_text="Length of the extracted text before normalization")
+    normalized_chars = models.PositiveIntegerField(default=0, help_text="Length of raw_text after normalization")
     key_insights = models.JSONField(default=list, blank=True, help_text="AI-extracted key points")
     
     # Processing status
@@ -62,10 +79,29 @@ class ContentSource(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Content Source'
         verbose_name_plural = 'Content Sources'
+        indexes = [
+            models.Index(fields=['user', 'normalized_url'], name='contentsource_user_url_idx'),
+            models.Index(fields=['user', 'content_hash'], name='contentsource_user_hash_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title or 'Untitled'} ({self.get_source_type_display()})"
 
+    @classmethod
+    def detect_source_type(cls, source_url: str, source_file=None) -> str:
+        """Work out the source type from the submitted URL or uploaded file."""
+        if source_file:
+            # Check for file type
+            filename = source_file.name.lower()
+            if filename.endswith('.txt'):
+                return cls.SourceType.TEXT  # Reuse TEXT type or add FILE_TEXT
+            return cls.SourceType.PDF
+        if source_url and ('youtube.com' in source_url or 'youtu.be' in source_url):
+            return cls.SourceType.YOUTUBE
+        if source_url:
+            return cls.SourceType.BLOG
+        return cls.SourceType.TEXT
+
 
 class RepurposedPost(models.Model):
     """The AI-generated output for a specific platform."""
@@ -82,9 +118,13 @@ class RepurposedPost(models.Model):
         PENDING = 'pending', 'Pending'
         PROCESSING = 'processing', 'Processing'
         READY = 'ready', 'Ready'
+        PUBLISHING = 'publishing', 'Publishing'
         PUBLISHED = 'published', 'Published'
         FAILED = 'failed', 'Failed'
 
+    # Content of posts in these states must not be regenerated
+    LOCKED_STATUSES = (Status.PUBLISHING, Status.PUBLISHED)
+
     source = models.ForeignKey(
         ContentSource,
         on_delete=models.CASCADE,
@@ -106,6 +146,13 @@ class RepurposedPost(models.Model):
     # For Twitter threads
     thread_posts = models.JSONField(default=list, blank=True, help_text="List of thread posts")
     
+    # Alternatives returned by a multi-variant regeneration (the first one is applied)
+    variants = models.JSONField(default=list, blank=True, help_text="Alternative versions from the last regeneration")
+    
+    # Generation cache tracking
+    generation_fingerprint = models.CharField(max_length=64, blank=True, db_index=True, help_text="Hash of the generation inputs (cache key)")
+    generation_cache_hit = models.BooleanField(default=False, help_text="Content was served from the generation cache")
+    
     # Status tracking
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
     error_message = models.TextField(blank=True)
@@ -142,6 +189,98 @@ class RepurposedPost(models.Model):
     media_file = models.FileField(upload_to='post_media/', blank=True, null=True, help_text="Image or video file to attach")
 
 
+class RepurposeJob(models.Model):
+    """Background run of the repurpose pipeline (extract -> generate -> persist) or a regeneration."""
+
+    class Kind(models.TextChoices):
+        REPURPOSE = 'repurpose', 'Repurpose'
+        REGENERATE = 'regenerate', 'Regenerate'
+
+    class Stage(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        EXTRACTING = 'extracting', 'Extracting'
+        GENERATING = 'generating', 'Generating'
+        PERSISTING = 'persisting', 'Persisting'
+        COMPLETED = 'completed', 'Completed'
+        FAILED = 'failed', 'Failed'
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='repurpose_jobs'
+    )
+    source = models.ForeignKey(
+        ContentSource,
+        on_delete=models.CASCADE,
+        related_name='jobs'
+    )
+    kind = models.CharField(max_length=20, choices=Kind.choices, default=Kind.REPURPOSE)
+    brand_voice = models.ForeignKey(
+        BrandVoice,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        help_text="Brand voice chosen at submission"
+    )
+    user_prompt = models.TextField(blank=True)
+    batch_id = models.UUIDField(null=True, blank=True, db_index=True, help_text="Set when submitted as part of a batch")
+
+    # Progress tracking
+    stage = models.CharField(max_length=20, choices=Stage.choices, default=Stage.QUEUED)
+    progress = models.JSONField(default=dict, blank=True, help_text="Per-stage progress details")
+    celery_task_id = models.CharField(max_length=255, blank=True)
+    error_message = models.TextField(blank=True)
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Repurpose Job'
+        verbose_name_plural = 'Repurpose Jobs'
+
+    def __str__(self):
+        return f"Job {self.pk} for {self.source} ({self.stage})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.stage in (self.Stage.COMPLETED, self.Stage.FAILED)
+
+    def get_posts(self):
+        """
+        The posts this job generates, recorded in progress['post_ids'] at submission.
+        A reused source may hold pending posts of other jobs, so never select by source alone.
+        """
+        if 'post_ids' in self.progress:
+            return RepurposedPost.objects.filter(id__in=self.progress['post_ids'])
+        # Jobs queued before post ids were recorded
+        return self.source.repurposed_posts.filter(status=RepurposedPost.Status.PENDING)
+
+    def set_stage(self, stage, **details):
+        """Move the job to a new stage and record details under that stage's progress key."""
+        from django.utils import timezone
+
+        now = timezone.now()
+        self.stage = stage
+        entry = self.progress.get(stage, {})
+        entry.update(details)
+        entry.setdefault('at', now.isoformat())
+        self.progress[stage] = entry
+        if stage == self.Stage.EXTRACTING and not self.started_at:
+            self.started_at = now
+        if stage in (self.Stage.COMPLETED, self.Stage.FAILED):
+            self.finished_at = now
+        self.save(update_fields=['stage', 'progress', 'started_at', 'finished_at', 'updated_at'])
+
+    def set_platform_status(self, platform, platform_status):
+        """Record the generation status of a single platform."""
+        platforms = self.progress.setdefault('platforms', {})
+        platforms[platform] = platform_status
+        self.save(update_fields=['progress', 'updated_at'])
+
+
 class ScheduledPost(models.Model):
     """Scheduled or periodic post configuration for automated publishing."""
     
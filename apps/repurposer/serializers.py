@@ -2,7 +2,7 @@
 Serializers for Content Repurposer app.
 """
 from rest_framework import serializers
-from .models import BrandVoice, ContentSource, RepurposedPost
+from .models import BrandVoice, ContentSource, RepurposedPost, RepurposeJob
 
 
 class BrandVoiceSerializer(serializers.ModelSerializer):
@@ -11,10 +11,10 @@ class BrandVoiceSerializer(serializers.ModelSerializer):
     class Meta:
         model = BrandVoice
         fields = [
-            'id', 'name', 'description', 'sample_posts',
+            'id', 'name', 'description', 'sample_posts', 'style_instruction',
             'is_active', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'style_instruction', 'created_at', 'updated_at']
 
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
@@ -31,15 +31,17 @@ class RepurposedPostSerializer(serializers.ModelSerializer):
         model = RepurposedPost
         fields = [
             'id', 'platform', 'platform_display', 'brand_voice', 'brand_voice_name',
-            'generated_content', 'hook', 'hashtags', 'thread_posts',
+            'generated_content', 'hook', 'hashtags', 'thread_posts', 'variants',
             'status', 'status_display', 'error_message',
             'published_at', 'platform_post_url',
             'content_preview', 'is_thread', 'media_file',
+            'generation_fingerprint', 'generation_cache_hit',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'generated_content', 'hook', 'hashtags', 'thread_posts',
+            'id', 'generated_content', 'hook', 'hashtags', 'thread_posts', 'variants',
             'status', 'error_message', 'published_at', 'platform_post_url',
+            'generation_fingerprint', 'generation_cache_hit',
             'created_at', 'updated_at'
         ]
 
@@ -54,12 +56,13 @@ class ContentSourceSerializer(serializers.ModelSerializer):
         model = ContentSource
         fields = [
             'id', 'source_type', 'source_type_display', 'source_url', 'title',
-            'raw_text', 'key_insights', 'is_processed', 'processing_error',
+            'raw_text', 'extracted_chars', 'normalized_chars', 'key_insights',
+            'is_processed', 'processing_error',
             'repurposed_posts', 'posts_count',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'title', 'raw_text', 'key_insights',
+            'id', 'title', 'raw_text', 'extracted_chars', 'normalized_chars', 'key_insights',
             'is_processed', 'processing_error',
             'created_at', 'updated_at'
         ]
@@ -85,11 +88,27 @@ class ContentSourceListSerializer(serializers.ModelSerializer):
         return obj.repurposed_posts.count()
 
 
+SOURCE_FILE_EXTENSIONS = ('.pdf', '.txt')
+
+
+def validate_source_file(value):
+    """Uploaded sources must be PDF or .txt files within REPURPOSE_UPLOAD_MAX_BYTES."""
+    from django.conf import settings
+
+    if not value.name.lower().endswith(SOURCE_FILE_EXTENSIONS):
+        raise serializers.ValidationError(f"Unsupported file type: {value.name}. Upload a PDF or .txt file.")
+    if value.size > settings.REPURPOSE_UPLOAD_MAX_BYTES:
+        raise serializers.ValidationError(
+            f"{value.name} is larger than {settings.REPURPOSE_UPLOAD_MAX_BYTES // (1024 * 1024)} MB."
+        )
+    return value
+
+
 class RepurposeRequestSerializer(serializers.Serializer):
     """Input serializer for the main repurpose endpoint."""
     source_url = serializers.URLField(required=False, allow_blank=True)
     raw_text = serializers.CharField(required=False, allow_blank=True)
-    source_file = serializers.FileField(required=False, allow_null=True)
+    source_file = serializers.FileField(required=False, allow_null=True, validators=[validate_source_file])
     platforms = serializers.MultipleChoiceField(
         choices=RepurposedPost.Platform.choices,
         required=True
@@ -97,6 +116,21 @@ class RepurposeRequestSerializer(serializers.Serializer):
     brand_voice_id = serializers.IntegerField(required=False, allow_null=True)
     title = serializers.CharField(max_length=255, required=False, allow_blank=True)
     user_prompt = serializers.CharField(required=False, allow_blank=True)
+    run_async = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Queue the pipeline in the background and return a job id"
+    )
+    reuse_source = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Attach the posts to an already extracted source with the same URL or content"
+    )
+    stream_tokens = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Streaming endpoint only: also emit token deltas"
+    )
 
     def validate(self, data):
         if not data.get('source_url') and not data.get('raw_text') and not data.get('source_file'):
@@ -117,6 +151,125 @@ class RepurposeRequestSerializer(serializers.Serializer):
         return data
 
 
+class BatchSourceSerializer(serializers.Serializer):
+    """One URL or text source inside a batch request."""
+    source_url = serializers.URLField(required=False, allow_blank=True)
+    raw_text = serializers.CharField(required=False, allow_blank=True)
+    title = serializers.CharField(max_length=255, required=False, allow_blank=True)
+
+    def validate(self, data):
+        if not data.get('source_url') and not data.get('raw_text'):
+            raise serializers.ValidationError("Each source needs a 'source_url' or 'raw_text'.")
+        return data
+
+
+class BatchRepurposeRequestSerializer(serializers.Serializer):
+    """Input serializer for the batch repurpose endpoint."""
+    sources = BatchSourceSerializer(many=True, required=False)
+    source_files = serializers.ListField(
+        child=serializers.FileField(validators=[validate_source_file]),
+        required=False,
+        default=list
+    )
+    platforms = serializers.MultipleChoiceField(
+        choices=RepurposedPost.Platform.choices,
+        required=True
+    )
+    brand_voice_id = serializers.IntegerField(required=False, allow_null=True)
+    user_prompt = serializers.CharField(required=False, allow_blank=True)
+    reuse_source = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Reuse already extracted sources with the same URL or content"
+    )
+
+    def validate(self, data):
+        from django.conf import settings
+
+        total = len(data.get('sources') or []) + len(data.get('source_files') or [])
+        if not total:
+            raise serializers.ValidationError("You must provide at least one source or file.")
+        if total > settings.REPURPOSE_BATCH_MAX_SOURCES:
+            raise serializers.ValidationError(
+                f"A batch can contain at most {settings.REPURPOSE_BATCH_MAX_SOURCES} sources."
+            )
+
+        # Validate brand voice belongs to user
+        brand_voice_id = data.get('brand_voice_id')
+        if brand_voice_id:
+            user = self.context['request'].user
+            if not BrandVoice.objects.filter(id=brand_voice_id, user=user).exists():
+                raise serializers.ValidationError({
+                    'brand_voice_id': "Invalid brand voice."
+                })
+
+        return data
+
+
+class RepurposeJobSerializer(serializers.ModelSerializer):
+    """Serializer for background repurpose job status."""
+    stage_display = serializers.CharField(source='get_stage_display', read_only=True)
+    source_id = serializers.IntegerField(source='source.id', read_only=True)
+    posts = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RepurposeJob
+        fields = [
+            'id', 'kind', 'batch_id', 'source_id', 'stage', 'stage_display', 'progress',
+            'is_finished', 'error_message', 'posts',
+            'started_at', 'finished_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+    def get_posts(self, obj) -> list:
+        """
+        The job's own posts (RepurposeJob.get_posts); a reused source also holds the posts
+        of earlier jobs. Filtered in Python so a prefetch of source__repurposed_posts is used.
+        """
+        posts = obj.source.repurposed_posts.all()
+        if 'post_ids' in obj.progress:
+            post_ids = set(obj.progress['post_ids'])
+            posts = [post for post in posts if post.id in post_ids]
+        return RepurposedPostSerializer(posts, many=True).data
+
+
+class RegenerateRequestSerializer(serializers.Serializer):
+    """Input serializer for regenerating one post or a subset of a source's posts."""
+    post_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        help_text="Source endpoint only: posts to regenerate (default: all unpublished posts)"
+    )
+    variants = serializers.IntegerField(required=False, default=1, min_value=1)
+    user_prompt = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_variants(self, value):
+        from django.conf import settings
+
+        if value > settings.REGENERATE_MAX_VARIANTS:
+            raise serializers.ValidationError(
+                f"At most {settings.REGENERATE_MAX_VARIANTS} variants can be requested."
+            )
+        return value
+
+
+class SourcePublishRequestSerializer(serializers.Serializer):
+    """Input serializer for publishing a source's posts to all their platforms."""
+    post_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        help_text="Posts to publish (default: all unpublished posts of the source)"
+    )
+    social_account_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        help_text="Accounts to publish with, one per platform (default: the first connected account of each platform)"
+    )
+
+
 class PublishPostSerializer(serializers.Serializer):
     """Serializer for publishing a post."""
     social_account_id = serializers.IntegerField(required=False)
@@ -1,5 +1,6 @@
 # Services package
-from .ai_engine import AIEngine
+from .ai_engine import AIEngine, get_ai_engine
 from .extractor import ContentExtractor
+from .llm import LLMBackend, get_backend
 
-__all__ = ['AIEngine', 'ContentExtractor']
+__all__ = ['AIEngine', 'get_ai_engine', 'ContentExtractor', 'LLMBackend', 'get_backend']
@@ -1,59 +1,321 @@
 
-import os
+import json
+import hashlib
 import logging
-import google.generativeai as genai
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from django.conf import settings
 
+from ..exceptions import RateLimitExceeded
+from ..utils import chunk_text
+from .cache import LayeredCache
+from .llm import TASK_COMBINED, TASK_KEY_POINTS, TASK_POST, TASK_STYLE, TASK_VARIANTS, get_backend
+from .rate_limit import estimate_tokens, get_limiter
+
 logger = logging.getLogger(__name__)
 
+# Merge passes over the digest before it is thinned to fit the prompt
+DIGEST_REDUCE_ROUNDS = 3
+
+_generation_cache = None
+
+_registry_lock = threading.Lock()
+_engines = {}
+
+
+def get_ai_engine(model_name: str = None) -> 'AIEngine':
+    """Shared AIEngine for a model name. Engines are stateless, so pipeline code should use this."""
+    model_name = model_name or settings.GEMINI_MODEL
+    key = (settings.AI_BACKEND, settings.GEMINI_API_KEY, model_name)
+
+    engine = _engines.get(key)
+    if engine is None:
+        with _registry_lock:
+            engine = _engines.get(key)
+            if engine is None:
+                engine = AIEngine(model_name)
+                _engines[key] = engine
+    return engine
+
+
+def get_generation_cache() -> LayeredCache:
+    """Shared cache of generated posts, keyed by input fingerprint."""
+    global _generation_cache
+    if _generation_cache is None:
+        _generation_cache = LayeredCache(
+            'generation',
+            ttl=settings.AI_GENERATION_CACHE_TTL,
+            local_max_entries=settings.AI_GENERATION_CACHE_LOCAL_MAX_ENTRIES,
+        )
+    return _generation_cache
+
+
+def generation_cache_enabled() -> bool:
+    """Generation cache is opt-in globally and can be bypassed per tenant."""
+    if not settings.AI_GENERATION_CACHE_ENABLED:
+        return False
+
+    from django.db import connection
+    tenant = getattr(connection, 'tenant', None)
+    if tenant is not None and hasattr(tenant, 'bypass_generation_cache'):
+        return not tenant.bypass_generation_cache
+
+    # Inside schema_context (Celery) the connection only carries the schema name
+    from apps.tenants.models import Client
+    return not Client.objects.filter(
+        schema_name=connection.schema_name,
+        bypass_generation_cache=True
+    ).exists()
+
+
+def current_schema() -> str:
+    """Tenant schema of the calling thread; captured before fanning out to worker threads."""
+    from django.db import connection
+    return getattr(connection, 'schema_name', None)
+
+
+def digest_budget() -> int:
+    """Characters a digest may take: AI_DIGEST_MAX_CHARS, within the prompt's source budget."""
+    return min(settings.AI_DIGEST_MAX_CHARS, settings.AI_PROMPT_SOURCE_MAX_CHARS - 100)
+
+
+def digest_size(points) -> int:
+    """Length of key points rendered as a bulleted list."""
+    return sum(len(point) + 3 for point in points)
+
+
+def fit_points(points: list, budget: int) -> list:
+    """Evenly thins key points, keeping source order, until they fit the budget."""
+    size = digest_size(points)
+    if size <= budget:
+        return points
+    logger.warning(f"Digest of {size} chars exceeds {budget}; thinning {len(points)} points")
+    keep = len(points) * budget // size
+    while keep > 0:
+        step = len(points) / keep
+        kept = [points[int(index * step)] for index in range(keep)]
+        if digest_size(kept) <= budget:
+            return kept
+        keep -= 1
+    return []
+
+
 class AIEngine:
-    """Service to interact with Google Gemini API."""
+    """Builds prompts and validates posts; model calls go to the configured LLM backend."""
+
+    MODE_PER_PLATFORM = 'per_platform'
+    MODE_COMBINED = 'combined'
+
+    # Bump whenever prompt templates change so cached generations are not reused
+    PROMPT_VERSION = '1'
+
+    PLATFORM_INSTRUCTIONS = {
+        'twitter': "Create a Twitter thread (3-6 tweets). Each tweet must be under 280 chars. Focus on specific value nuggets.",
+        'linkedin': "Create a LinkedIn post. Use line breaks for readability. Use a strong hook. Focus on storytelling and professional insights.",
+        'youtube': "Create an engaging YouTube video title (hook) and a detailed, SEO-friendly video description (content).",
+        'instagram': "Create a vibrant Instagram caption. Use emojis creatively and keep the flow energetic. Focus on engagement.",
+        'facebook': "Create an engaging Facebook post. Use a conversational tone, ask a question to drive comments, and use relevant emojis.",
+    }
+
+    def __init__(self, model_name: str = None):
+        self.model_name = model_name or settings.GEMINI_MODEL
+        self.backend = get_backend(self.model_name)
+
+    def fingerprint(self, content: str, platform: str, brand_voice=None, source_url=None, user_prompt=None,
+                    variants: int = 1) -> str:
+        """Hash of every input that affects a generation; used as the generation cache key."""
+        voice = [brand_voice.name, brand_voice.description, brand_voice.style_instruction] if brand_voice else None
+        payload = json.dumps(
+            [self.PROMPT_VERSION, self.backend.name, self.model_name, platform, voice, user_prompt or '', source_url or '',
+             variants, content],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def generate_posts(self, content: str, platforms, brand_voice=None, source_url=None, user_prompt=None,
+                       max_workers=None, timeout=None, mode=None, use_cache=None, on_delta=None, variants: int = 1):
+        """
+        Generates posts for several platforms, yielding (platform, result) tuples as they complete.
+
+        mode 'per_platform' fans out one call per platform on a bounded thread pool, so
+        wall time is roughly the slowest single call. mode 'combined' asks for every
+        platform in a single JSON response and only falls back to per-platform calls
+        for platforms that are missing or malformed. Defaults to AI_GENERATION_MODE.
+
+        When the generation cache is enabled (use_cache=None follows the settings and
+        tenant flag) identical inputs are served from cache. Every result carries the
+        input 'fingerprint' and whether it was 'cached'.
+
+        on_delta(platform, text) is called from worker threads with raw token deltas
+        of per-platform calls as the model streams them.
 
-    def __init__(self):
-        api_key = settings.GEMINI_API_KEY
-        if not api_key:
-            logger.warning("GEMINI_API_KEY is not set.")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        variants > 1 asks every per-platform call for that many alternatives at once;
+        the result is the first one with all of them under 'variants'.
 
-    def generate_post(self, content: str, platform: str, brand_voice=None, source_url=None, user_prompt=None) -> dict:
+        Raises RateLimitExceeded when the shared model budget is exhausted, so callers
+        can retry later instead of storing error posts.
+        """
+        platforms = list(dict.fromkeys(platforms))
+        if not platforms:
+            return
+
+        if use_cache is None:
+            use_cache = generation_cache_enabled()
+        cache = get_generation_cache() if use_cache else None
+
+        fingerprints = {
+            platform: self.fingerprint(content, platform, brand_voice, source_url, user_prompt, variants)
+            for platform in platforms
+        }
+        if cache is not None:
+            missing = []
+            for platform in platforms:
+                cached = cache.get(fingerprints[platform])
+                if cached:
+                    cached.update(fingerprint=fingerprints[platform], cached=True)
+                    yield platform, cached
+                else:
+                    missing.append(platform)
+            platforms = missing
+
+        for platform, result in self._generate_uncached(
+            content, platforms, brand_voice=brand_voice, source_url=source_url,
+            user_prompt=user_prompt, max_workers=max_workers, timeout=timeout, mode=mode,
+            on_delta=on_delta, tenant=current_schema(), variants=variants
+        ):
+            if cache is not None and 'error' not in result:
+                cache.set(fingerprints[platform], result)
+            result.update(fingerprint=fingerprints[platform], cached=False)
+            yield platform, result
+
+    def _generate_uncached(self, content: str, platforms, brand_voice=None, source_url=None, user_prompt=None,
+                           max_workers=None, timeout=None, mode=None, on_delta=None, tenant=None, variants=1):
+        """Dispatches to combined or per-platform generation."""
+        if not platforms:
+            return
+
+        mode = mode or settings.AI_GENERATION_MODE
+        if mode == self.MODE_COMBINED and len(platforms) > 1 and variants == 1:
+            combined = self.generate_combined(
+                content, platforms, brand_voice=brand_voice, source_url=source_url,
+                user_prompt=user_prompt, timeout=timeout, tenant=tenant
+            )
+            for platform, result in combined.items():
+                yield platform, result
+            platforms = [p for p in platforms if p not in combined]
+            if not platforms:
+                return
+            logger.warning(f"Combined generation incomplete, falling back per platform for: {platforms}")
+
+        yield from self._generate_concurrently(
+            content, platforms, brand_voice=brand_voice, source_url=source_url,
+            user_prompt=user_prompt, max_workers=max_workers, timeout=timeout, on_delta=on_delta,
+            tenant=tenant, variants=variants
+        )
+
+    def generate_combined(self, content: str, platforms, brand_voice=None, source_url=None, user_prompt=None,
+                          timeout=None, tenant=None) -> dict:
+        """
+        Generates posts for all platforms in one model call.
+        Returns {platform: result} containing only platforms whose output passed validation;
+        an empty dict if the call failed altogether.
+        """
+        try:
+            prompt = self._build_combined_prompt(content, platforms, brand_voice, user_prompt)
+            response_text = self._call_model(
+                prompt, timeout=timeout, tenant=tenant, task=TASK_COMBINED, platforms=platforms
+            )
+            payload = json.loads(response_text)
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Combined generation failed for {platforms}: {str(e)}")
+            return {}
+
+        if not isinstance(payload, dict):
+            logger.error("Combined generation returned a non-object JSON payload")
+            return {}
+
+        results = {}
+        for platform in platforms:
+            result = payload.get(platform)
+            if self._is_valid_result(result):
+                results[platform] = self._append_source_url(result, platform, source_url)
+        return results
+
+    def _generate_concurrently(self, content: str, platforms, brand_voice=None, source_url=None,
+                               user_prompt=None, max_workers=None, timeout=None, on_delta=None, tenant=None,
+                               variants=1):
+        """
+        Runs generate_post for each platform on a bounded thread pool.
+        Platforms that do not finish within the timeout yield an error result
+        like generate_post does. With variants > 1 each platform runs generate_variants.
+        """
+        max_workers = max_workers or settings.AI_GENERATION_MAX_CONCURRENCY
+        timeout = timeout or settings.AI_GENERATION_TIMEOUT
+
+        workers = max(1, min(max_workers, len(platforms)))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-generate')
+        if variants > 1:
+            worker = partial(self.generate_variants, count=variants)
+        else:
+            worker = self.generate_post
+        futures = {
+            executor.submit(
+                worker,
+                content=content,
+                platform=platform,
+                brand_voice=brand_voice,
+                source_url=source_url,
+                user_prompt=user_prompt,
+                timeout=timeout,
+                on_delta=partial(on_delta, platform) if on_delta else None,
+                tenant=tenant
+            ): platform
+            for platform in platforms
+        }
+        pending = set(futures)
+        try:
+            # Leave room for queueing when there are more platforms than workers
+            waves = -(-len(platforms) // workers)
+            for future in as_completed(futures, timeout=timeout * waves):
+                pending.discard(future)
+                yield futures[future], future.result()
+        except FuturesTimeoutError:
+            for future in pending:
+                future.cancel()
+                platform = futures[future]
+                logger.error(f"Timed out generating content for {platform} after {timeout}s")
+                yield platform, self._error_result(f"Timed out after {timeout}s")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def generate_post(self, content: str, platform: str, brand_voice=None, source_url=None, user_prompt=None,
+                      timeout=None, on_delta=None, tenant=None) -> dict:
         """
         Generates a structured social media post for a specific platform.
         Returns a dictionary with keys: content, hook, hashtags, thread_posts (optional).
+        If on_delta is given the response is streamed and on_delta(text) is called per chunk.
+        Raises RateLimitExceeded instead of returning an error result when rate limited.
         """
         try:
             prompt = self._build_prompt(content, platform, brand_voice, user_prompt)
             
             # Use JSON mode for structured output if supported, or prompt engineering
-            generation_config = genai.types.GenerationConfig(
-                candidate_count=1,
-                response_mime_type="application/json"
+            response_text = self._call_model(
+                prompt, timeout=timeout, tenant=tenant, task=TASK_POST, platforms=[platform],
+                on_delta=on_delta
             )
             
-            response = self.model.generate_content(prompt, generation_config=generation_config)
-            
-            import json
             try:
-                result = json.loads(response.text)
-                
-                # Post-processing: Append URL if needed
-                if source_url:
-                    if platform == 'linkedin':
-                        if 'content' in result:
-                            result['content'] += f"\n\n🔗 Source: {source_url}"
-                    elif platform == 'twitter':
-                        # For threads, add link to last post or first post
-                        if 'thread_posts' in result and result['thread_posts']:
-                            result['thread_posts'][-1] += f" {source_url}"
-                        elif 'content' in result:
-                            result['content'] += f" {source_url}"
-                    elif platform in ['youtube', 'instagram', 'facebook']:
-                        if 'content' in result:
-                            result['content'] += f"\n\n🔗 Original: {source_url}"
-                            
-                return result
+                result = json.loads(response_text)
+                if not self._is_valid_result(result):
+                    logger.error(f"Model returned a malformed post for {platform}")
+                    return self._error_result("Model returned a malformed post")
+                return self._append_source_url(result, platform, source_url)
             except json.JSONDecodeError:
-                text = response.text
+                text = response_text
                 if source_url:
                     text += f"\n\n{source_url}"
                 return {
@@ -62,38 +324,276 @@ class AIEngine:
                     "hashtags": []
                 }
                 
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error generating content for {platform}: {str(e)}")
-            return {
-                "content": f"Error: {str(e)}",
-                "hook": "Error",
-                "hashtags": []
-            }
+            return self._error_result(str(e))
 
-    def _build_prompt(self, content: str, platform: str, brand_voice=None, user_prompt=None) -> str:
-        """Constructs a specific prompt for the target platform requesting JSON."""
-        
-        voice_instruction = ""
+    def generate_variants(self, content: str, platform: str, count: int, brand_voice=None, source_url=None,
+                          user_prompt=None, timeout=None, on_delta=None, tenant=None) -> dict:
+        """
+        Generates `count` alternative posts for one platform in a single model call.
+        Returns the first valid alternative with every valid one under 'variants',
+        or an error result like generate_post.
+        """
+        try:
+            prompt = self._build_variants_prompt(content, platform, count, brand_voice, user_prompt)
+            response_text = self._call_model(
+                prompt, timeout=timeout, tenant=tenant, task=TASK_VARIANTS, platforms=[platform],
+                count=count, on_delta=on_delta
+            )
+            payload = json.loads(response_text)
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Error generating {count} variants for {platform}: {str(e)}")
+            return self._error_result(str(e))
+
+        candidates = payload.get('variants') if isinstance(payload, dict) else payload
+        variants = [
+            self._append_source_url(candidate, platform, source_url)
+            for candidate in (candidates if isinstance(candidates, list) else [])[:count]
+            if self._is_valid_result(candidate)
+        ]
+        if not variants:
+            logger.error(f"Variant generation for {platform} returned no valid posts")
+            return self._error_result("Model returned no valid variants")
+
+        result = dict(variants[0])
+        result['variants'] = variants
+        return result
+
+    def _acquire(self, prompts, tenant: str = None):
+        """Draws calls from the shared rate limit budget when the backend is subject to it."""
+        if settings.AI_RATE_LIMIT_ENABLED and self.backend.rate_limited:
+            limiter = get_limiter()
+            for prompt in prompts:
+                limiter.acquire(estimate_tokens(prompt), tenant=tenant)
+
+    def _call_model(self, prompt: str, timeout=None, tenant: str = None, task: str = TASK_POST,
+                    platforms=None, count: int = 1, on_delta=None) -> str:
+        """
+        Single entry point for single model calls: draws the call from the shared rate limit
+        budget, then generates (or streams, calling on_delta per chunk) on the backend.
+        """
+        self._acquire([prompt], tenant=tenant)
+        if not on_delta:
+            return self.backend.generate(prompt, timeout=timeout, task=task, platforms=platforms, count=count)
+
+        parts = []
+        for chunk in self.backend.stream(prompt, timeout=timeout, task=task, platforms=platforms, count=count):
+            parts.append(chunk)
+            on_delta(chunk)
+        return "".join(parts)
+
+    @staticmethod
+    def _append_source_url(result: dict, platform: str, source_url=None) -> dict:
+        """Post-processing: Append URL if needed."""
+        if not source_url:
+            return result
+        if platform == 'linkedin':
+            if 'content' in result:
+                result['content'] += f"\n\n🔗 Source: {source_url}"
+        elif platform == 'twitter':
+            # For threads, add link to last post or first post
+            if 'thread_posts' in result and result['thread_posts']:
+                result['thread_posts'][-1] += f" {source_url}"
+            elif 'content' in result:
+                result['content'] += f" {source_url}"
+        elif platform in ['youtube', 'instagram', 'facebook']:
+            if 'content' in result:
+                result['content'] += f"\n\n🔗 Original: {source_url}"
+        return result
+
+    @staticmethod
+    def _is_valid_result(result) -> bool:
+        """Checks a single platform entry matches the post schema."""
+        if not isinstance(result, dict):
+            return False
+        if not isinstance(result.get('content'), str) or not result['content'].strip():
+            return False
+        if not isinstance(result.get('hook', ''), str):
+            return False
+        hashtags = result.get('hashtags', [])
+        if not isinstance(hashtags, list) or not all(isinstance(tag, str) for tag in hashtags):
+            return False
+        thread_posts = result.get('thread_posts', [])
+        if not isinstance(thread_posts, list) or not all(isinstance(t, str) for t in thread_posts):
+            return False
+        return True
+
+    @staticmethod
+    def _error_result(message: str) -> dict:
+        return {
+            "content": f"Error: {message}",
+            "hook": "Error",
+            "hashtags": [],
+            "error": message
+        }
+
+    def build_digest(self, content: str, max_workers=None, timeout=None):
+        """
+        Map-reduce summary of a long source. Map: splits it on paragraph/sentence boundaries
+        into at most AI_DIGEST_MAX_CHUNKS chunks and extracts key points from every chunk in
+        parallel. Reduce: while the points exceed digest_budget(), consecutive groups of
+        points are merged by the model. Returns the points in source order, or None when the
+        content is short enough to send as-is or every chunk failed.
+        """
+        if len(content) <= settings.AI_DIGEST_THRESHOLD_CHARS:
+            return None
+        timeout = timeout or settings.AI_GENERATION_TIMEOUT
+
+        # Very long sources get bigger chunks rather than more calls
+        chunk_chars = max(settings.AI_DIGEST_CHUNK_CHARS, -(-len(content) // settings.AI_DIGEST_MAX_CHUNKS))
+        chunks = chunk_text(content, chunk_chars)
+        while len(chunks) > settings.AI_DIGEST_MAX_CHUNKS:
+            chunk_chars = int(chunk_chars * 1.25)
+            chunks = chunk_text(content, chunk_chars)
+
+        results = self._key_points(
+            chunks, [self._build_digest_prompt(chunk) for chunk in chunks], timeout, max_workers
+        )
+        if not any(results):
+            return None
+        return self._reduce_points([point for points in results for point in points], timeout, max_workers)
+
+    def _key_points(self, texts, prompts, timeout, max_workers) -> list:
+        """Runs key point prompts as one batch. Returns a list of points per prompt ([] if it failed)."""
+        self._acquire(prompts, tenant=current_schema())
+        responses = self.backend.batch_generate(
+            prompts, timeout=timeout, task=TASK_KEY_POINTS, max_workers=max_workers
+        )
+
+        results = []
+        for text, response in zip(texts, responses):
+            if isinstance(response, RateLimitExceeded):
+                raise response
+            results.append(self._parse_key_points(text, response))
+        return results
+
+    def _reduce_points(self, points: list, timeout, max_workers) -> list:
+        """
+        Merges key points until they fit digest_budget(): consecutive groups of at most
+        AI_DIGEST_CHUNK_CHARS are condensed by the model, for up to DIGEST_REDUCE_ROUNDS
+        rounds. Whatever still does not fit is thinned evenly, keeping source order.
+        """
+        budget = digest_budget()
+        for _ in range(DIGEST_REDUCE_ROUNDS):
+            size = digest_size(points)
+            if size <= budget:
+                return points
+
+            groups = [group.split('\n\n') for group in chunk_text('\n\n'.join(points), settings.AI_DIGEST_CHUNK_CHARS)]
+            # Each group may keep its share of the budget, in points of the current average length
+            per_group = max(1, budget // len(groups) * len(points) // size)
+            prompts = [self._build_reduce_prompt(group, per_group) for group in groups]
+            merged = self._key_points(['\n\n'.join(group) for group in groups], prompts, timeout, max_workers)
+
+            # A group the model could not merge keeps its points
+            reduced = [point for group, result in zip(groups, merged) for point in (result or group)]
+            if digest_size(reduced) >= size:
+                break
+            logger.info(f"Reduced digest from {size} to {digest_size(reduced)} chars in {len(groups)} groups")
+            points = reduced
+        return fit_points(points, budget)
+
+    def _build_reduce_prompt(self, points: list, max_points: int) -> str:
+        """Prompt merging the key points of consecutive parts of one source."""
+        listed = "\n\n".join(points)
+        return f"""
+        You are preparing source material for a social media writer.
+        The points below were extracted from consecutive parts of one source.
+        Merge them into at most {max_points} points: combine overlapping points, drop repetition,
+        keep the most important facts, insights, quotes and numbers, in their original order.
+        Do NOT add information that is not in the points.
+
+        Return the result strictly as a valid JSON object: {{"key_points": ["point 1", "point 2", ...]}}
+
+        ---
+        {listed}
+        ---
+        """
+
+    def _build_digest_prompt(self, chunk: str) -> str:
+        """Prompt extracting key points from one chunk of a long source."""
+        return f"""
+        You are preparing source material for a social media writer.
+        Extract the {settings.AI_DIGEST_POINTS_PER_CHUNK} most important facts, insights, quotes
+        and numbers from the text below. Keep each point self-contained and specific.
+        Do NOT add information that is not in the text.
+
+        Return the result strictly as a valid JSON object: {{"key_points": ["point 1", "point 2", ...]}}
+
+        ---
+        {chunk}
+        ---
+        """
+
+    @staticmethod
+    def _parse_key_points(chunk: str, response) -> list:
+        """Key points from one batch response. Returns an empty list for a failed chunk."""
+        if isinstance(response, Exception):
+            logger.error(f"Error summarizing chunk ({len(chunk)} chars): {str(response)}")
+            return []
+        try:
+            points = json.loads(response).get('key_points', [])
+            return [str(point).strip() for point in points if str(point).strip()]
+        except Exception as e:
+            logger.error(f"Error summarizing chunk ({len(chunk)} chars): {str(e)}")
+            return []
+
+    def distill_voice(self, name: str, description: str, sample_posts: str, timeout=None) -> str:
+        """
+        Condenses a brand voice's sample posts into a short, reusable style instruction.
+        Returns '' if the model gave no usable answer; rate limits propagate.
+        """
+        samples = (sample_posts or '')[:settings.AI_BRAND_VOICE_SAMPLES_MAX_CHARS]
+        prompt = f"""
+        You are a copywriting coach. Study the sample posts below, written in the brand voice
+        "{name}" ({description or 'no description'}).
+        Describe how to write in this voice as compact instructions for another writer:
+        tone, sentence length, vocabulary, formatting, emoji and hashtag habits, typical hooks
+        and calls to action. Use at most {settings.AI_BRAND_VOICE_INSTRUCTION_MAX_WORDS} words.
+        Do NOT quote the samples or mention their topics.
+
+        Return the result strictly as a valid JSON object: {{"style_instruction": "..."}}
+
+        ---
+        {samples}
+        ---
+        """
+        try:
+            response_text = self._call_model(prompt, timeout=timeout, tenant=current_schema(), task=TASK_STYLE)
+            instruction = json.loads(response_text).get('style_instruction', '')
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Error distilling brand voice '{name}': {str(e)}")
+            return ''
+        return str(instruction).strip() if instruction else ''
+
+    def _voice_instruction(self, brand_voice=None) -> str:
         if brand_voice:
-            voice_instruction = f"Use the following brand voice/style: {brand_voice.name}. {brand_voice.description}"
-        else:
-            voice_instruction = "Write in a professional yet engaging, human-like tone. Avoid buzzwords. Be punchy."
+            if brand_voice.style_instruction:
+                return f"Use the brand voice \"{brand_voice.name}\": {brand_voice.style_instruction}"
+            return f"Use the following brand voice/style: {brand_voice.name}. {brand_voice.description}"
+        return "Write in a professional yet engaging, human-like tone. Avoid buzzwords. Be punchy."
 
-        custom_instruction = ""
+    def _custom_instruction(self, user_prompt=None) -> str:
         if user_prompt:
-            custom_instruction = f"IMPORTANT - User's Custom Instruction: {user_prompt}"
-
-        platform_instruction = ""
-        if platform == 'twitter':
-            platform_instruction = "Create a Twitter thread (3-6 tweets). Each tweet must be under 280 chars. Focus on specific value nuggets."
-        elif platform == 'linkedin':
-            platform_instruction = "Create a LinkedIn post. Use line breaks for readability. Use a strong hook. Focus on storytelling and professional insights."
-        elif platform == 'youtube':
-            platform_instruction = "Create an engaging YouTube video title (hook) and a detailed, SEO-friendly video description (content)."
-        elif platform == 'instagram':
-            platform_instruction = "Create a vibrant Instagram caption. Use emojis creatively and keep the flow energetic. Focus on engagement."
-        elif platform == 'facebook':
-            platform_instruction = "Create an engaging Facebook post. Use a conversational tone, ask a question to drive comments, and use relevant emojis."
+            return f"IMPORTANT - User's Custom Instruction: {user_prompt}"
+        return ""
+
+    def _platform_instruction(self, platform: str) -> str:
+        return self.PLATFORM_INSTRUCTIONS.get(platform, "")
+
+    def _build_prompt(self, content: str, platform: str, brand_voice=None, user_prompt=None) -> str:
+        """Constructs a specific prompt for the target platform requesting JSON."""
+        
+        voice_instruction = self._voice_instruction(brand_voice)
+        custom_instruction = self._custom_instruction(user_prompt)
+        platform_instruction = self._platform_instruction(platform)
 
         base_prompt = f"""
         You are an expert social media manager. I will provide you with content.
@@ -115,9 +615,83 @@ class AIEngine:
         
         Here is the source content to repurpose:
         ---
-        {content[:20000]}
+        {content[:settings.AI_PROMPT_SOURCE_MAX_CHARS]}
         ---
         """
         
         return base_prompt
 
+    def _build_variants_prompt(self, content: str, platform: str, count: int, brand_voice=None,
+                               user_prompt=None) -> str:
+        """Constructs a prompt asking for several distinct alternatives for one platform."""
+
+        voice_instruction = self._voice_instruction(brand_voice)
+        custom_instruction = self._custom_instruction(user_prompt)
+        platform_instruction = self._platform_instruction(platform)
+
+        base_prompt = f"""
+        You are an expert social media manager. I will provide you with content.
+        Your task is to repurpose this into {count} distinct high-quality posts for {platform}.
+        Each alternative must take a different angle or hook; do not repeat wording between them.
+        
+        {platform_instruction}
+        {voice_instruction}
+        {custom_instruction}
+        
+        Return the result strictly as a valid JSON object: {{"variants": [...]}} with exactly {count} entries.
+        Each entry must be an object with the following schema:
+        {{
+            "hook": "For YouTube: The video title. For others: The opening attention-grabber.",
+            "content": "The main body of the post. For YouTube: The description.",
+            "hashtags": ["tag1", "tag2"],
+            "thread_posts": ["tweet 1", "tweet 2", ...] (Only for Twitter threads. Otherwise omit.)
+        }}
+
+        IMPORTANT: Base your posts ONLY on the content provided below. Do NOT make up information.
+        
+        Here is the source content to repurpose:
+        ---
+        {content[:settings.AI_PROMPT_SOURCE_MAX_CHARS]}
+        ---
+        """
+
+        return base_prompt
+
+    def _build_combined_prompt(self, content: str, platforms, brand_voice=None, user_prompt=None) -> str:
+        """Constructs one prompt asking for every platform, keyed by platform, in a single JSON object."""
+
+        voice_instruction = self._voice_instruction(brand_voice)
+        custom_instruction = self._custom_instruction(user_prompt)
+        platform_instructions = "\n        ".join(
+            f"- {platform}: {self._platform_instruction(platform) or 'Create an engaging post.'}"
+            for platform in platforms
+        )
+        keys = ", ".join(f'"{platform}"' for platform in platforms)
+
+        base_prompt = f"""
+        You are an expert social media manager. I will provide you with content.
+        Your task is to repurpose this into a high-quality post for EACH of these platforms: {keys}.
+        
+        Platform requirements:
+        {platform_instructions}
+        {voice_instruction}
+        {custom_instruction}
+        
+        Return the result strictly as a valid JSON object with exactly these top-level keys: {keys}.
+        The value for each key must be an object with the following schema:
+        {{
+            "hook": "For YouTube: The video title. For others: The opening attention-grabber.",
+            "content": "The main body of the post. For YouTube: The description.",
+            "hashtags": ["tag1", "tag2"],
+            "thread_posts": ["tweet 1", "tweet 2", ...] (Only for Twitter threads. Otherwise omit.)
+        }}
+
+        IMPORTANT: Base your posts ONLY on the content provided below. Do NOT make up information.
+        
+        Here is the source content to repurpose:
+        ---
+        {content[:settings.AI_PROMPT_SOURCE_MAX_CHARS]}
+        ---
+        """
+
+        return base_prompt
@@ -0,0 +1,256 @@
+"""
+Article text extraction from HTML.
+
+Pages are parsed with the BeautifulSoup tree builder named by EXTRACTION_HTML_PARSER:
+'lxml' (C-backed, the default) or 'html.parser' (pure Python, always available).
+If lxml is not installed the pure-Python parser is used instead.
+
+EXTRACTION_BLOG_MODE picks how text is taken from the page:
+- 'paragraphs': every <p> over MIN_PARAGRAPH_CHARS in the <article>, main content
+  block or whole page.
+- 'readability': blocks are scored by text and link density (as Arc90's Readability
+  does) and only the highest scoring container and its strong siblings are kept, which
+  drops navigation, cookie banners, bylines, related links and comments. Subheadings
+  and list items of the article are kept, so on pages without boilerplate the text can
+  be longer than in 'paragraphs' mode. Falls back to 'paragraphs' when too little text
+  is found.
+"""
+import logging
+import re
+
+from bs4 import BeautifulSoup, FeatureNotFound
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PARSERS = ('lxml', 'html.parser')
+
+MODE_PARAGRAPHS = 'paragraphs'
+MODE_READABILITY = 'readability'
+MODES = (MODE_PARAGRAPHS, MODE_READABILITY)
+
+DEFAULT_TITLE = "Blog Article"
+
+# Paragraphs shorter than this are treated as navigation/ads
+MIN_PARAGRAPH_CHARS = 50
+
+CONTENT_CLASSES = ['content', 'post-content', 'article-content', 'story-content']
+
+# Readability scoring
+UNLIKELY_TAGS = [
+    'script', 'style', 'noscript', 'template', 'nav', 'header', 'footer', 'aside',
+    'form', 'iframe', 'svg', 'button', 'select',
+]
+# 'ad-' only at the start of a class/id word, so 'lead-in', 'thread-' or 'read-more' survive
+UNLIKELY_CANDIDATES = re.compile(
+    r'(?:^|[\s_-])ad-|advert|banner|breadcrumb|byline|comment|consent|cookie|footer|menu|modal|'
+    r'\bnav|newsletter|popup|promo|recommend|related|share|sidebar|social|sponsor|subscribe',
+    re.I
+)
+POSITIVE_CLASSES = re.compile(r'article|blog|body|content|entry|main|post|story|text', re.I)
+NEGATIVE_CLASSES = re.compile(r'author|byline|caption|comment|footer|meta|related|share|sidebar|widget', re.I)
+# Never stripped, whatever their class says
+PROTECTED_TAGS = {'html', 'body', 'article', 'main'}
+TAG_WEIGHTS = {
+    'article': 10, 'main': 10, 'div': 5, 'section': 3, 'blockquote': 3, 'pre': 3, 'td': 3,
+    'ol': -3, 'ul': -3, 'dl': -3, 'li': -3, 'form': -3,
+    'h1': -5, 'h2': -5, 'h3': -5, 'h4': -5, 'th': -5,
+}
+SCORED_TAGS = ['p', 'pre']
+BLOCK_TAGS = ['p', 'pre', 'blockquote', 'li', 'h2', 'h3', 'h4']
+HEADING_TAGS = {'h2', 'h3', 'h4'}
+# Blocks shorter than this are not scored or kept (headings excepted)
+MIN_BLOCK_CHARS = 25
+# Kept blocks may be at most this share link text
+MAX_BLOCK_LINK_DENSITY = 0.5
+# Below this much text the readability result is discarded for the paragraphs mode
+MIN_READABILITY_CHARS = 200
+
+_unavailable = set()
+
+
+def resolve_parser(parser: str = None) -> str:
+    """The tree builder to use for a parser name (default EXTRACTION_HTML_PARSER)."""
+    parser = parser or settings.EXTRACTION_HTML_PARSER
+    if parser not in PARSERS:
+        raise ValueError(f"Unknown HTML parser '{parser}'. Choose from: {', '.join(PARSERS)}")
+    return 'html.parser' if parser in _unavailable else parser
+
+
+def available_parsers() -> list[str]:
+    """Parser names whose tree builder is installed."""
+    available = []
+    for parser in PARSERS:
+        try:
+            BeautifulSoup('', parser)
+        except FeatureNotFound:
+            continue
+        available.append(parser)
+    return available
+
+
+def make_soup(html, parser: str = None) -> BeautifulSoup:
+    """Parses HTML (str or bytes), falling back to html.parser when a builder is missing."""
+    parser = resolve_parser(parser)
+    try:
+        return BeautifulSoup(html, parser)
+    except FeatureNotFound:
+        logger.warning(f"HTML parser '{parser}' is not installed; using html.parser")
+        _unavailable.add(parser)
+        return BeautifulSoup(html, 'html.parser')
+
+
+def page_title(soup) -> str:
+    title = soup.title.get_text(strip=True) if soup.title else ''
+    return title or DEFAULT_TITLE
+
+
+def paragraph_text(soup) -> str:
+    """Text of the article's paragraphs: <article>, else the main content block, else the whole page."""
+    container = (
+        soup.find('article')
+        or soup.find('main')
+        or soup.find('div', {'class': CONTENT_CLASSES})
+        or soup
+    )
+    text_parts = []
+    for p in container.find_all('p'):
+        text = p.get_text().strip()
+        if len(text) > MIN_PARAGRAPH_CHARS:
+            text_parts.append(text)
+    text = "\n\n".join(text_parts)
+
+    if not text:
+        # If no paragraphs found, try getting all text from body
+        body = soup.find('body')
+        if body:
+            text = body.get_text(separator='\n', strip=True)
+    return text
+
+
+class _Scorer:
+    """Readability scoring over one parsed page; caches each node's normalized text."""
+
+    def __init__(self, soup):
+        self.soup = soup
+        self._texts = {}
+
+    def text(self, node) -> str:
+        key = id(node)
+        if key not in self._texts:
+            self._texts[key] = ' '.join(node.get_text(' ').split())
+        return self._texts[key]
+
+    def link_density(self, node) -> float:
+        length = len(self.text(node))
+        if not length:
+            return 0.0
+        return sum(len(self.text(link)) for link in node.find_all('a')) / length
+
+    @staticmethod
+    def class_weight(node) -> int:
+        weight = 0
+        for value in (' '.join(node.get('class') or []), node.get('id') or ''):
+            if NEGATIVE_CLASSES.search(value):
+                weight -= 25
+            if POSITIVE_CLASSES.search(value):
+                weight += 25
+        return weight
+
+    def strip_unlikely(self) -> None:
+        for node in self.soup.find_all(UNLIKELY_TAGS):
+            node.decompose()
+        for node in self.soup.find_all(True):
+            if node.decomposed or node.name in PROTECTED_TAGS:
+                continue
+            names = f"{' '.join(node.get('class') or [])} {node.get('id') or ''}"
+            if UNLIKELY_CANDIDATES.search(names) and not POSITIVE_CLASSES.search(names):
+                node.decompose()
+
+    def candidates(self) -> dict:
+        """Containers of scoreable paragraphs mapped to [node, score]."""
+        candidates = {}
+        for block in self.soup.find_all(SCORED_TAGS):
+            text = self.text(block)
+            if len(text) < MIN_BLOCK_CHARS:
+                continue
+            score = 1 + text.count(',') + min(len(text) // 100, 3)
+            # Parent gets the full score, grandparent half
+            for divider, ancestor in ((1, block.parent), (2, block.parent.parent if block.parent else None)):
+                if ancestor is None or ancestor.name in (None, '[document]'):
+                    break
+                entry = candidates.get(id(ancestor))
+                if entry is None:
+                    entry = candidates[id(ancestor)] = [ancestor, TAG_WEIGHTS.get(ancestor.name, 0) + self.class_weight(ancestor)]
+                entry[1] += score / divider
+
+        for entry in candidates.values():
+            entry[1] *= 1 - self.link_density(entry[0])
+        return candidates
+
+    def content_nodes(self, candidates: dict) -> list:
+        """The top candidate plus siblings that score well or read like article paragraphs."""
+        top, top_score = max(candidates.values(), key=lambda entry: entry[1])
+        if top.parent is None:
+            return [top]
+        threshold = max(10, top_score * 0.2)
+        nodes = []
+        for sibling in top.parent.find_all(True, recursive=False):
+            if sibling is top:
+                nodes.append(sibling)
+                continue
+            entry = candidates.get(id(sibling))
+            if entry and entry[1] >= threshold:
+                nodes.append(sibling)
+            elif sibling.name == 'p' and len(self.text(sibling)) > 80 and self.link_density(sibling) < 0.25:
+                nodes.append(sibling)
+        return nodes
+
+    def block_text(self, node) -> str:
+        text = self.text(node)
+        if node.name in HEADING_TAGS:
+            return text
+        if len(text) < MIN_BLOCK_CHARS or self.link_density(node) > MAX_BLOCK_LINK_DENSITY:
+            return ''
+        return text
+
+    def article_text(self) -> str:
+        self.strip_unlikely()
+        candidates = self.candidates()
+        if not candidates:
+            return ''
+
+        parts = []
+        for node in self.content_nodes(candidates):
+            if node.name in BLOCK_TAGS:
+                blocks = [node]
+            else:
+                # Innermost blocks only, so quoted or listed paragraphs are not repeated
+                blocks = [block for block in node.find_all(BLOCK_TAGS) if block.find(BLOCK_TAGS) is None]
+            for block in blocks:
+                text = self.block_text(block)
+                if text:
+                    parts.append(text)
+        return "\n\n".join(parts)
+
+
+def readability_text(soup) -> str:
+    """Main article text by text/link density scoring. Removes boilerplate nodes from soup."""
+    return _Scorer(soup).article_text()
+
+
+def parse_article(html, parser: str = None, mode: str = None) -> tuple[str, str]:
+    """Returns (text, title) of an HTML page. text is empty if nothing usable was found."""
+    mode = mode or settings.EXTRACTION_BLOG_MODE
+    if mode not in MODES:
+        raise ValueError(f"Unknown extraction mode '{mode}'. Choose from: {', '.join(MODES)}")
+
+    soup = make_soup(html, parser)
+    title = page_title(soup)
+    if mode == MODE_READABILITY:
+        text = readability_text(soup)
+        if len(text) >= MIN_READABILITY_CHARS:
+            return text, title
+        # The soup is already stripped of boilerplate, which only helps here
+        return paragraph_text(soup), title
+    return paragraph_text(soup), title
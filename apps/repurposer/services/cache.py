@@ -0,0 +1,228 @@
+"""
+Two-tier cache: a small in-process LRU in front of Redis.
+
+Values are stored as JSON so every process (gunicorn workers, Celery
+workers) can read what another one wrote; the local tier keeps the same
+JSON so callers always get a fresh copy they are free to mutate. Redis failures are logged and
+treated as misses; the cache never breaks the request path. After a connection error Redis is
+skipped for REDIS_FAILURE_BACKOFF seconds, so requests do not each wait out the socket timeout.
+
+Hit/miss counters are kept per process and added to the cluster-wide totals in Redis in
+batches (every CACHE_STATS_FLUSH_EVERY lookups or CACHE_STATS_FLUSH_INTERVAL seconds), so a
+local hit never costs a Redis round-trip.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_redis_client = None
+_redis_missing = False
+_redis_down_until = 0.0
+_redis_lock = threading.Lock()
+
+
+def get_redis():
+    """
+    Process-wide Redis client, created lazily. Returns None if Redis is not available
+    or failed within the last REDIS_FAILURE_BACKOFF seconds.
+    """
+    global _redis_client, _redis_missing
+    if _redis_down_until and time.monotonic() < _redis_down_until:
+        return None
+    if _redis_client is not None or _redis_missing:
+        return _redis_client
+
+    with _redis_lock:
+        if _redis_client is None and not _redis_missing:
+            try:
+                import redis
+            except ImportError:
+                logger.warning("redis package not installed; shared caches disabled.")
+                _redis_missing = True
+                return None
+
+            options = {
+                'socket_timeout': settings.REDIS_SOCKET_TIMEOUT,
+                'socket_connect_timeout': settings.REDIS_SOCKET_TIMEOUT,
+            }
+            if settings.REDIS_URL.startswith('rediss://'):
+                options['ssl_cert_reqs'] = None
+            _redis_client = redis.Redis.from_url(settings.REDIS_URL, **options)
+    return _redis_client
+
+
+def redis_failed(error: Exception) -> None:
+    """Skips Redis for REDIS_FAILURE_BACKOFF seconds if error is a connection failure."""
+    global _redis_down_until
+    try:
+        from redis.exceptions import ConnectionError, TimeoutError
+    except ImportError:
+        return
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        if time.monotonic() >= _redis_down_until:
+            logger.warning(f"Redis unreachable, skipping it for {settings.REDIS_FAILURE_BACKOFF}s: {str(error)}")
+        _redis_down_until = time.monotonic() + settings.REDIS_FAILURE_BACKOFF
+
+
+class LayeredCache:
+    """In-process LRU (bounded by entries and bytes) backed by Redis with TTLs."""
+
+    def __init__(self, namespace: str, ttl: int, local_max_entries: int = 128,
+                 local_max_bytes: int = 32 * 1024 * 1024, local_ttl: int = None,
+                 max_value_bytes: int = None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local_ttl = min(local_ttl or ttl, ttl)
+        self.local_max_entries = local_max_entries
+        self.local_max_bytes = local_max_bytes
+        self.max_value_bytes = max_value_bytes
+
+        self._local = OrderedDict()  # key -> (expires_at, raw JSON)
+        self._local_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'redis_hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0, 'errors': 0}
+        # Counts not yet added to the cluster-wide totals
+        self._pending = {'hits': 0, 'misses': 0}
+        self._last_flush = time.monotonic()
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+            if name not in ('local_hits', 'redis_hits', 'misses'):
+                return
+            self._pending['misses' if name == 'misses' else 'hits'] += 1
+            due = (
+                sum(self._pending.values()) >= settings.CACHE_STATS_FLUSH_EVERY
+                or time.monotonic() - self._last_flush >= settings.CACHE_STATS_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """Adds this process's pending hit/miss counts to the cluster-wide totals (best effort)."""
+        with self._lock:
+            pending = {name: count for name, count in self._pending.items() if count}
+            self._pending = {'hits': 0, 'misses': 0}
+            self._last_flush = time.monotonic()
+        client = get_redis()
+        if client is None or not pending:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for name, count in pending.items():
+                pipe.hincrby(f"{self.namespace}:stats", name, count)
+            pipe.execute()
+        except Exception as e:
+            redis_failed(e)
+
+    def get(self, key: str, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                expires_at, raw = entry
+                if expires_at > now:
+                    self._local.move_to_end(key)
+                    hit = True
+                else:
+                    self._evict(key)
+                    hit = False
+            else:
+                hit = False
+        if hit:
+            self._count('local_hits')
+            return json.loads(raw)
+
+        client = get_redis()
+        if client is not None:
+            try:
+                raw = client.get(self._redis_key(key))
+            except Exception as e:
+                logger.warning(f"Cache read failed for {self.namespace}:{key}: {str(e)}")
+                redis_failed(e)
+                self._count('errors')
+                raw = None
+            if raw is not None:
+                raw = raw.decode() if isinstance(raw, bytes) else raw
+                self._store_local(key, raw)
+                self._count('redis_hits')
+                return json.loads(raw)
+
+        self._count('misses')
+        return default
+
+    def set(self, key: str, value, ttl: int = None):
+        raw = json.dumps(value)
+        if self.max_value_bytes and len(raw) > self.max_value_bytes:
+            logger.info(f"Not caching {self.namespace}:{key}: {len(raw)} bytes exceeds limit")
+            return
+
+        self._store_local(key, raw, ttl)
+        with self._lock:
+            self._stats['sets'] += 1
+
+        client = get_redis()
+        if client is not None:
+            try:
+                client.set(self._redis_key(key), raw, ex=ttl or self.ttl)
+            except Exception as e:
+                logger.warning(f"Cache write failed for {self.namespace}:{key}: {str(e)}")
+                redis_failed(e)
+                self._count('errors')
+
+    def delete(self, key: str):
+        with self._lock:
+            self._evict(key)
+        client = get_redis()
+        if client is not None:
+            try:
+                client.delete(self._redis_key(key))
+            except Exception as e:
+                logger.warning(f"Cache delete failed for {self.namespace}:{key}: {str(e)}")
+                redis_failed(e)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process plus cluster-wide totals from Redis."""
+        self.flush_stats()
+        with self._lock:
+            stats = dict(self._stats)
+            stats['local_entries'] = len(self._local)
+            stats['local_bytes'] = self._local_bytes
+
+        client = get_redis()
+        if client is not None:
+            try:
+                shared = client.hgetall(f"{self.namespace}:stats")
+                stats['cluster'] = {k.decode(): int(v) for k, v in shared.items()}
+            except Exception as e:
+                redis_failed(e)
+        return stats
+
+    def _store_local(self, key: str, raw: str, ttl: int = None):
+        if len(raw) > self.local_max_bytes:
+            return
+        expires_at = time.monotonic() + min(ttl or self.local_ttl, self.local_ttl)
+        with self._lock:
+            self._evict(key)
+            self._local[key] = (expires_at, raw)
+            self._local_bytes += len(raw)
+            while self._local and (len(self._local) > self.local_max_entries
+                                   or self._local_bytes > self.local_max_bytes):
+                oldest = next(iter(self._local))
+                self._evict(oldest)
+                self._stats['evictions'] += 1
+
+    def _evict(self, key: str):
+        """Remove a key from the local tier. Caller holds the lock."""
+        entry = self._local.pop(key, None)
+        if entry is not None:
+            self._local_bytes -= len(entry[1])
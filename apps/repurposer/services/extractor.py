@@ -1,37 +1,173 @@
 
 import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse, parse_qs
-from youtube_transcript_api import YouTubeTranscriptApi
+from youtube_transcript_api import NoTranscriptFound, TranscriptsDisabled, VideoUnavailable, YouTubeTranscriptApi
 import requests
-from bs4 import BeautifulSoup
-import PyPDF2
 import io
+from django.conf import settings
+
+from ..utils import normalize_url, file_sha256
+from .article import parse_article
+from .cache import LayeredCache
+from .http import backoff_delay, get_session, read_limited, retry_after_seconds
+from .pdf import extract_pdf_text
 
 logger = logging.getLogger(__name__)
 
+_extraction_cache = None
+_metadata_executor = None
+_metadata_executor_lock = threading.Lock()
+
+YOUTUBE_OEMBED_URL = "https://www.youtube.com/oembed"
+
+# Permanent for a given video: cached as failures for EXTRACTION_NEGATIVE_CACHE_TTL
+NO_TRANSCRIPT_ERRORS = (TranscriptsDisabled, NoTranscriptFound, VideoUnavailable)
+
+# Browser user agents rotated when a site answers 403
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15",
+]
+
+# Statuses worth another attempt (403 retries with a different user agent)
+RETRY_STATUSES = {403, 429, 500, 502, 503, 504}
+
+
+def get_extraction_cache() -> LayeredCache:
+    """Shared cache of extraction results, keyed by video id, normalized URL or file hash."""
+    global _extraction_cache
+    if _extraction_cache is None:
+        _extraction_cache = LayeredCache(
+            'extract',
+            ttl=settings.EXTRACTION_CACHE_TTL,
+            local_max_entries=settings.EXTRACTION_CACHE_LOCAL_MAX_ENTRIES,
+            local_max_bytes=settings.EXTRACTION_CACHE_LOCAL_MAX_BYTES,
+            max_value_bytes=settings.EXTRACTION_CACHE_MAX_VALUE_BYTES,
+        )
+    return _extraction_cache
+
+
+def get_metadata_executor() -> ThreadPoolExecutor:
+    """Shared pool fetching video metadata alongside transcripts."""
+    global _metadata_executor
+    if _metadata_executor is None:
+        with _metadata_executor_lock:
+            if _metadata_executor is None:
+                _metadata_executor = ThreadPoolExecutor(
+                    max_workers=settings.YOUTUBE_METADATA_WORKERS,
+                    thread_name_prefix='youtube-metadata'
+                )
+    return _metadata_executor
+
+
 class ContentExtractor:
     """Service to extract text content from various sources."""
 
     @staticmethod
     def extract_youtube(url: str) -> tuple[str, str]:
-        """Extracts transcript and title from a YouTube video URL."""
+        """
+        Extracts transcript and title from a YouTube video URL (cached by video id).
+        Videos without a transcript are cached as failures and raise at once on resubmission.
+        """
+        video_id = ContentExtractor._get_youtube_video_id(url)
+        if not video_id:
+            raise ValueError("Invalid YouTube URL")
+
+        cache = get_extraction_cache()
+        cache_key = f"youtube:{video_id}"
+        cached = cache.get(cache_key)
+        if isinstance(cached, dict):
+            raise ValueError(cached['error'])
+        if cached:
+            return cached[0], cached[1]
+
+        try:
+            text, title = ContentExtractor._extract_youtube(video_id)
+        except NO_TRANSCRIPT_ERRORS as e:
+            logger.info(f"No transcript for YouTube video {video_id}: {type(e).__name__}")
+            message = (
+                "This video has no transcript available (captions are disabled, missing or the video is unavailable). "
+                "Please paste the text in the 'Text' tab instead."
+            )
+            cache.set(cache_key, {'error': message}, ttl=settings.EXTRACTION_NEGATIVE_CACHE_TTL)
+            raise ValueError(message) from e
+
+        cache.set(cache_key, [text, title])
+        return text, title
+
+    @staticmethod
+    def extract_blog(url: str) -> tuple[str, str]:
+        """
+        Extracts main text content and title from a blog article URL (cached by normalized URL
+        and extraction mode). Entries older than EXTRACTION_BLOG_REVALIDATE_AFTER are revalidated
+        with a conditional GET, so an unchanged article costs a 304 instead of a download.
+        """
+        cache = get_extraction_cache()
+        cache_key = f"url:{normalize_url(url)}:{settings.EXTRACTION_BLOG_MODE}"
+        cached = cache.get(cache_key)
+        if cached and time.time() - cached.get('fetched_at', 0) < settings.EXTRACTION_BLOG_REVALIDATE_AFTER:
+            return cached['text'], cached['title']
+
+        entry = ContentExtractor._extract_blog(url, cached=cached)
+        cache.set(cache_key, entry)
+        return entry['text'], entry['title']
+
+    @staticmethod
+    def extract_pdf_content(file_obj) -> str:
+        """Extracts text from a PDF file object (cached by SHA-256 of the file and the text budget)."""
+        cache = get_extraction_cache()
+        # v2: pages are separated by pdf.PAGE_BREAK
+        cache_key = f"pdf:v2:{file_sha256(file_obj)}:{settings.PDF_EXTRACT_MAX_CHARS}"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        text = ContentExtractor._extract_pdf_content(file_obj)
+        cache.set(cache_key, text)
+        return text
+
+    @staticmethod
+    def _youtube_title(video_id: str) -> str:
+        """Video title from YouTube's oEmbed endpoint, or a placeholder if it cannot be fetched."""
         try:
-            video_id = ContentExtractor._get_youtube_video_id(url)
-            if not video_id:
-                raise ValueError("Invalid YouTube URL")
+            response = get_session('extract').get(
+                YOUTUBE_OEMBED_URL,
+                params={'url': f"https://www.youtube.com/watch?v={video_id}", 'format': 'json'},
+                timeout=settings.YOUTUBE_OEMBED_TIMEOUT
+            )
+            response.raise_for_status()
+            title = (response.json().get('title') or '').strip()
+            if title:
+                return title[:255]
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Could not fetch title of YouTube video {video_id}: {str(e)}")
+        return f"YouTube Video ({video_id})"
 
+    @staticmethod
+    def _extract_youtube(video_id: str) -> tuple[str, str]:
+        """Fetches the transcript of a YouTube video while its title is fetched on the metadata pool."""
+        title_future = get_metadata_executor().submit(ContentExtractor._youtube_title, video_id)
+        try:
             # Use new instance-based API (youtube-transcript-api >= 0.6.3)
             api = YouTubeTranscriptApi()
             transcript = api.fetch(video_id)
             # Convert to raw data format for compatibility
             transcript_list = transcript.to_raw_data()
-            full_transcript = " ".join([item['text'] for item in transcript_list])
-            
-            # TODO: Fetch actual title using an API or scraping
-            title = f"YouTube Video ({video_id})"
-            
-            return full_transcript, title
+            # One caption per line so normalization can drop repeated captions
+            full_transcript = "\n".join(item['text'] for item in transcript_list)
+
+            return full_transcript, title_future.result()
+        except NO_TRANSCRIPT_ERRORS:
+            title_future.cancel()
+            raise
         except Exception as e:
+            title_future.cancel()
             error_str = str(e)
             logger.error(f"Error extracting YouTube transcript: {error_str}")
             
@@ -45,89 +181,86 @@ class ContentExtractor:
             raise e
 
     @staticmethod
-    def extract_blog(url: str) -> tuple[str, str]:
-        """Extracts main text content and title from a blog article URL."""
-        try:
-            import random
-            import time
-            
-            # Check if it's a Medium URL - these require special handling
-            is_medium = 'medium.com' in url.lower()
-            
-            # List of user agents to rotate
-            user_agents = [
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0",
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15",
-            ]
-            
-            headers = {
-                "User-Agent": random.choice(user_agents),
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-                "Accept-Language": "en-US,en;q=0.9",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Connection": "keep-alive",
-                "Referer": "https://www.google.com/search?q=blog",
-                "Upgrade-Insecure-Requests": "1",
-                "Sec-Fetch-Dest": "document",
-                "Sec-Fetch-Mode": "navigate",
-                "Sec-Fetch-Site": "cross-site",
-                "Sec-Fetch-User": "?1",
-                "Cache-Control": "max-age=0",
-            }
-            
-            # Use session for better cookie handling
-            session = requests.Session()
-            
-            # Add delay for Medium to look more human
-            if is_medium:
-                time.sleep(random.uniform(1, 2))
-            
-            # Try up to 3 times with different user agents
-            last_error = None
-            for attempt in range(3):
-                try:
-                    if attempt > 0:
-                        headers["User-Agent"] = random.choice(user_agents)
-                        time.sleep(random.uniform(1, 3))
-                    
-                    response = session.get(url, headers=headers, timeout=20, verify=True, allow_redirects=True)
-                    response.raise_for_status()
-                    break
-                except requests.exceptions.HTTPError as e:
-                    last_error = e
-                    if response.status_code == 403 and attempt < 2:
-                        continue  # Retry with different user agent
+    def _fetch(url: str, cached: dict = None):
+        """
+        GETs a page on the pooled extraction session, conditionally if validators are cached.
+        Retries connection errors, 403 (with another user agent), 429 and 5xx with
+        exponential backoff. Returns the final streamed response.
+        """
+        headers = {
+            "User-Agent": random.choice(USER_AGENTS),
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.9",
+            "Accept-Encoding": "gzip, deflate, br",
+            "Referer": "https://www.google.com/search?q=blog",
+            "Upgrade-Insecure-Requests": "1",
+            "Sec-Fetch-Dest": "document",
+            "Sec-Fetch-Mode": "navigate",
+            "Sec-Fetch-Site": "cross-site",
+            "Sec-Fetch-User": "?1",
+            "Cache-Control": "max-age=0",
+        }
+        if cached:
+            if cached.get('etag'):
+                headers["If-None-Match"] = cached['etag']
+            if cached.get('last_modified'):
+                headers["If-Modified-Since"] = cached['last_modified']
+
+        session = get_session('extract')
+        attempts = 1 + settings.EXTRACTION_HTTP_RETRIES
+        for attempt in range(1, attempts + 1):
+            try:
+                response = session.get(
+                    url,
+                    headers=headers,
+                    timeout=(settings.EXTRACTION_HTTP_CONNECT_TIMEOUT, settings.EXTRACTION_HTTP_READ_TIMEOUT),
+                    allow_redirects=True,
+                    stream=True
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == attempts:
                     raise
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            title = soup.title.string if soup.title else "Blog Article"
-            
-            # Try to find article content first (works better for Medium, blogs)
-            article = soup.find('article')
-            if article:
-                paragraphs = article.find_all('p')
-            else:
-                # Fallback: look for main content div
-                main = soup.find('main') or soup.find('div', {'class': ['content', 'post-content', 'article-content', 'story-content']})
-                if main:
-                    paragraphs = main.find_all('p')
-                else:
-                    # Last resort: all paragraphs
-                    paragraphs = soup.find_all('p')
-            
-            # Filter out short paragraphs (likely navigation/ads)
-            text_parts = [p.get_text().strip() for p in paragraphs if len(p.get_text().strip()) > 50]
-            text = "\n\n".join(text_parts)
-            
-            if not text:
-                # If no paragraphs found, try getting all text from body
-                body = soup.find('body')
-                if body:
-                    text = body.get_text(separator='\n', strip=True)
-            
+                time.sleep(backoff_delay(attempt, settings.EXTRACTION_HTTP_BACKOFF, settings.EXTRACTION_HTTP_BACKOFF_MAX))
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt == attempts:
+                return response
+
+            response.close()
+            if response.status_code == 403:
+                headers["User-Agent"] = random.choice(USER_AGENTS)
+            delay = retry_after_seconds(response, settings.EXTRACTION_HTTP_BACKOFF_MAX) or backoff_delay(
+                attempt, settings.EXTRACTION_HTTP_BACKOFF, settings.EXTRACTION_HTTP_BACKOFF_MAX
+            )
+            logger.info(f"Retrying {url} after HTTP {response.status_code} in {delay:.1f}s")
+            time.sleep(delay)
+
+    @staticmethod
+    def _extract_blog(url: str, cached: dict = None) -> dict:
+        """
+        Downloads and parses a blog article URL. Returns a cache entry with text, title,
+        validators and fetch time; a 304 returns the cached entry refreshed.
+        """
+        try:
+            response = ContentExtractor._fetch(url, cached)
+            if response.status_code == 304 and cached:
+                response.close()
+                logger.info(f"Blog content not modified: {url}")
+                return dict(cached, fetched_at=time.time())
+            if response.status_code >= 400:
+                response.close()
+            response.raise_for_status()
+
+            body, truncated = read_limited(response, settings.EXTRACTION_HTTP_MAX_BYTES)
+            if truncated:
+                logger.warning(f"Blog page truncated at {settings.EXTRACTION_HTTP_MAX_BYTES} bytes: {url}")
+            # Let the parser sniff <meta charset> unless the server declared one
+            html = body
+            if 'charset' in response.headers.get('Content-Type', '').lower():
+                html = body.decode(response.encoding, errors='replace')
+
+            text, title = parse_article(html)
+
             # Check if we got meaningful content
             if not text or len(text) < 100:
                 raise ValueError(
@@ -135,7 +268,13 @@ class ContentExtractor:
                     "require login, or block automated access. Try copying the text directly instead."
                 )
                     
-            return text, title
+            return {
+                'text': text,
+                'title': title,
+                'etag': response.headers.get('ETag', ''),
+                'last_modified': response.headers.get('Last-Modified', ''),
+                'fetched_at': time.time(),
+            }
         except requests.exceptions.Timeout:
             logger.error(f"Timeout extracting blog content from: {url}")
             raise ValueError("The website took too long to respond. Please try again.")
@@ -157,17 +296,10 @@ class ContentExtractor:
 
 
     @staticmethod
-    def extract_pdf_content(file_obj) -> str:
-        """Extracts text from a PDF file object."""
+    def _extract_pdf_content(file_obj) -> str:
+        """Parses text out of a PDF file object, page-parallel and within the text budget."""
         try:
-            # Ensure pointer is at the start
-            if hasattr(file_obj, 'seek'):
-                file_obj.seek(0)
-            reader = PyPDF2.PdfReader(file_obj)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text
+            return extract_pdf_text(file_obj)
         except Exception as e:
             logger.error(f"Error extracting PDF content: {str(e)}")
             raise e
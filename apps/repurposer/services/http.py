@@ -0,0 +1,72 @@
+"""
+Shared HTTP plumbing for outbound fetches.
+
+One pooled requests.Session per purpose keeps keep-alive connections per host
+across calls and threads; downloads are streamed and capped in size.
+"""
+import random
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(name: str, pool_maxsize: int = None) -> requests.Session:
+    """Process-wide pooled session for a purpose (e.g. 'extract'), created lazily."""
+    session = _sessions.get(name)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = requests.Session()
+                # Retries are handled by callers so they can back off and rotate headers
+                adapter = HTTPAdapter(
+                    pool_connections=settings.HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=pool_maxsize or settings.HTTP_POOL_MAXSIZE,
+                    max_retries=0
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _sessions[name] = session
+    return session
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (1-based)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def retry_after_seconds(response, cap: float) -> float:
+    """Seconds from a numeric Retry-After header, capped; 0 if absent or unparseable."""
+    value = response.headers.get('Retry-After', '')
+    try:
+        return min(cap, max(0.0, float(value)))
+    except ValueError:
+        return 0.0
+
+
+def read_limited(response, max_bytes: int) -> tuple[bytes, bool]:
+    """
+    Reads a streamed response body up to max_bytes and closes the connection.
+    Returns (body, truncated).
+    """
+    chunks = []
+    size = 0
+    truncated = False
+    try:
+        for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if max_bytes and size > max_bytes:
+                truncated = True
+                break
+    finally:
+        response.close()
+    body = b"".join(chunks)
+    return (body[:max_bytes], truncated) if truncated else (body, False)
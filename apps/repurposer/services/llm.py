@@ -0,0 +1,280 @@
+"""
+LLM backends used by AIEngine.
+
+A backend turns a prompt into response text; prompt building, validation,
+caching and rate limiting stay in AIEngine. AI_BACKEND selects the backend:
+'gemini' (Google Gemini) or 'stub', an offline deterministic backend with
+configurable latency and error injection for load tests and benchmarks.
+"""
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from ..exceptions import LLMBackendError, RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+# Expected response shapes, passed by AIEngine so backends that fabricate
+# output (the stub) know what to return
+TASK_POST = 'post'
+TASK_COMBINED = 'combined'
+TASK_KEY_POINTS = 'key_points'
+TASK_VARIANTS = 'variants'
+TASK_STYLE = 'style'
+
+# Process-wide Gemini state. genai.configure() resets the SDK's cached clients
+# (and their connections), so it runs once per API key, not per backend.
+_registry_lock = threading.RLock()
+_configured_api_key = None
+_models = {}
+
+
+def get_model(model_name: str = None):
+    """Shared GenerativeModel for a model name, created lazily and reused across threads."""
+    import google.generativeai as genai
+
+    model_name = model_name or settings.GEMINI_MODEL
+    api_key = settings.GEMINI_API_KEY
+    key = (api_key, model_name)
+
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    global _configured_api_key
+    with _registry_lock:
+        model = _models.get(key)
+        if model is None:
+            if _configured_api_key != api_key:
+                if not api_key:
+                    logger.warning("GEMINI_API_KEY is not set.")
+                genai.configure(api_key=api_key)
+                _configured_api_key = api_key
+            model = genai.GenerativeModel(model_name)
+            _models[key] = model
+    return model
+
+
+class LLMBackend:
+    """
+    Interface of a text generation backend. Responses are JSON text.
+
+    task/platforms/count describe the expected JSON shape (TASK_* constants);
+    count is the number of alternatives for TASK_VARIANTS.
+    """
+    name = ''
+    # Whether calls draw from the shared Gemini rate limit budget
+    rate_limited = False
+
+    def __init__(self, model_name: str = None):
+        self.model_name = model_name or settings.GEMINI_MODEL
+
+    def generate(self, prompt: str, timeout=None, task: str = TASK_POST, platforms=None, count: int = 1) -> str:
+        raise NotImplementedError
+
+    def stream(self, prompt: str, timeout=None, task: str = TASK_POST, platforms=None, count: int = 1):
+        """Yields response text in chunks. Defaults to a single chunk."""
+        yield self.generate(prompt, timeout=timeout, task=task, platforms=platforms, count=count)
+
+    def batch_generate(self, prompts, timeout=None, task: str = TASK_POST, platforms=None, count: int = 1,
+                       max_workers=None) -> list:
+        """
+        Generates several prompts concurrently. Returns one entry per prompt, in order:
+        the response text, or the exception raised for that prompt.
+        """
+        if not prompts:
+            return []
+
+        def run(prompt):
+            try:
+                return self.generate(prompt, timeout=timeout, task=task, platforms=platforms, count=count)
+            except Exception as e:
+                return e
+
+        max_workers = max_workers or settings.AI_GENERATION_MAX_CONCURRENCY
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(prompts))),
+                                thread_name_prefix=f'llm-{self.name}') as executor:
+            return list(executor.map(run, prompts))
+
+
+def _is_quota_error(error: Exception) -> bool:
+    """True for Gemini 429 / RESOURCE_EXHAUSTED responses."""
+    try:
+        from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+    except ImportError:
+        return '429' in str(error)
+    return isinstance(error, (ResourceExhausted, TooManyRequests))
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini through google.generativeai, in JSON mode."""
+    name = 'gemini'
+    rate_limited = True
+
+    def __init__(self, model_name: str = None):
+        super().__init__(model_name)
+        self.model = get_model(self.model_name)
+
+    @staticmethod
+    def _json_config():
+        import google.generativeai as genai
+
+        return genai.types.GenerationConfig(
+            candidate_count=1,
+            response_mime_type="application/json"
+        )
+
+    def _call(self, prompt: str, timeout=None, stream: bool = False):
+        try:
+            return self.model.generate_content(
+                prompt,
+                generation_config=self._json_config(),
+                request_options={'timeout': timeout or settings.AI_GENERATION_TIMEOUT},
+                stream=stream
+            )
+        except Exception as e:
+            if _is_quota_error(e):
+                logger.warning(f"Gemini quota exhausted: {str(e)}")
+                raise RateLimitExceeded(settings.AI_RATE_LIMIT_RETRY_AFTER) from e
+            raise
+
+    def generate(self, prompt: str, timeout=None, task: str = TASK_POST, platforms=None, count: int = 1) -> str:
+        return self._call(prompt, timeout=timeout).text
+
+    def stream(self, prompt: str, timeout=None, task: str = TASK_POST, platforms=None, count: int = 1):
+        try:
+            for chunk in self._call(prompt, timeout=timeout, stream=True):
+                if chunk.text:
+                    yield chunk.text
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            if _is_quota_error(e):
+                raise RateLimitExceeded(settings.AI_RATE_LIMIT_RETRY_AFTER) from e
+            raise
+
+
+class StubBackend(LLMBackend):
+    """
+    Offline backend returning well-formed JSON derived from the prompt.
+
+    Output depends only on the prompt. Latency (AI_STUB_LATENCY +/- AI_STUB_LATENCY_JITTER
+    seconds) and injected failures (AI_STUB_ERROR_RATE, AI_STUB_RATE_LIMIT_RATE) are drawn
+    from one RNG seeded with AI_STUB_SEED, so a run is reproducible per process.
+    """
+    name = 'stub'
+
+    def __init__(self, model_name: str = None, latency: float = None, jitter: float = None,
+                 error_rate: float = None, rate_limit_rate: float = None, seed: int = None):
+        super().__init__(model_name)
+        self.latency = settings.AI_STUB_LATENCY if latency is None else latency
+        self.jitter = settings.AI_STUB_LATENCY_JITTER if jitter is None else jitter
+        self.error_rate = settings.AI_STUB_ERROR_RATE if error_rate is None else error_rate
+        self.rate_limit_rate = settings.AI_STUB_RATE_LIMIT_RATE if rate_limit_rate is None else rate_limit_rate
+        self._random = random.Random(settings.AI_STUB_SEED if seed is None else seed)
+        self._lock = threading.Lock()
+
+    def _draw(self) -> tuple[float, float]:
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            return delay, self._random.random()
+
+    def _simulate_call(self, timeout=None) -> float:
+        """Draws the latency of a call and raises injected failures. Returns the latency to spend."""
+        delay, roll = self._draw()
+        timeout = timeout or settings.AI_GENERATION_TIMEOUT
+        if delay > timeout:
+            time.sleep(timeout)
+            raise LLMBackendError(f"Stub backend timed out after {timeout}s")
+        if roll < self.rate_limit_rate:
+            raise RateLimitExceeded(settings.AI_RATE_LIMIT_RETRY_AFTER, scope=self.name)
+        if roll < self.rate_limit_rate + self.error_rate:
+            time.sleep(delay / 2)
+            raise LLMBackendError("Injected stub backend error")
+        return delay
+
+    def generate(self, prompt: str, timeout=None, task: str = TASK_POST, platforms=None, count: int = 1) -> str:
+        time.sleep(self._simulate_call(timeout))
+        return self.render(prompt, task, platforms, count)
+
+    def stream(self, prompt: str, timeout=None, task: str = TASK_POST, platforms=None, count: int = 1):
+        delay = self._simulate_call(timeout)
+        text = self.render(prompt, task, platforms, count)
+        size = max(1, settings.AI_STUB_STREAM_CHUNK_CHARS)
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        for chunk in chunks:
+            time.sleep(delay / len(chunks))
+            yield chunk
+
+    @staticmethod
+    def _source(prompt: str) -> str:
+        """The source text, which every AIEngine prompt wraps in '---' lines."""
+        parts = re.split(r'\n\s*---\s*\n', prompt)
+        source = parts[-2] if len(parts) >= 3 else prompt
+        return ' '.join(source.split())
+
+    @classmethod
+    def _post(cls, source: str, platform: str, digest: str) -> dict:
+        sentences = [s for s in re.split(r'(?<=[.!?])\s+', source) if s] or [source or 'Stub content.']
+        words = re.findall(r'[A-Za-z]{5,}', source)
+        post = {
+            'hook': sentences[0][:80],
+            'content': ' '.join(sentences[:3])[:1200],
+            'hashtags': [f"#{word.lower()}" for word in list(dict.fromkeys(words))[:3]] or [f"#{platform}"],
+        }
+        if platform == 'twitter':
+            post['thread_posts'] = [sentence[:270] for sentence in sentences[:4]]
+        post['content'] += f" [stub:{platform}:{digest[:8]}]"
+        return post
+
+    def render(self, prompt: str, task: str = TASK_POST, platforms=None, count: int = 1) -> str:
+        """Deterministic JSON response for a prompt."""
+        source = self._source(prompt)
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+        if task == TASK_STYLE:
+            words = re.findall(r'[A-Za-z]{5,}', source)
+            return json.dumps({'style_instruction': f"Stub voice {digest[:8]}: concise, upbeat; favour {', '.join(words[:3]) or 'plain words'}."})
+        if task == TASK_KEY_POINTS:
+            sentences = [s for s in re.split(r'(?<=[.!?])\s+', source) if s]
+            return json.dumps({'key_points': sentences[:settings.AI_DIGEST_POINTS_PER_CHUNK]})
+        if task == TASK_COMBINED:
+            return json.dumps({platform: self._post(source, platform, digest) for platform in platforms or []})
+        platform = (platforms or ['generic'])[0]
+        if task == TASK_VARIANTS:
+            return json.dumps({'variants': [
+                self._post(source, platform, f"{digest}{index}") for index in range(count)
+            ]})
+        return json.dumps(self._post(source, platform, digest))
+
+
+BACKENDS = {
+    GeminiBackend.name: GeminiBackend,
+    StubBackend.name: StubBackend,
+}
+
+_backends = {}
+
+
+def get_backend(model_name: str = None, name: str = None) -> LLMBackend:
+    """Shared backend instance for AI_BACKEND (or name) and a model name."""
+    name = name or settings.AI_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown AI_BACKEND '{name}'. Choose from: {', '.join(BACKENDS)}")
+
+    key = (name, settings.GEMINI_API_KEY, model_name or settings.GEMINI_MODEL)
+    backend = _backends.get(key)
+    if backend is None:
+        with _registry_lock:
+            backend = _backends.get(key)
+            if backend is None:
+                backend = BACKENDS[name](model_name)
+                _backends[key] = backend
+    return backend
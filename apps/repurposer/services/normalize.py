@@ -0,0 +1,198 @@
+"""
+Text normalization between extraction and generation.
+
+Extracted text carries noise that costs tokens in every later LLM call:
+YouTube captions repeat rolling lines and fillers, PDFs break words across
+lines and repeat page headers/footers. normalize_text() cleans text per
+source type so ContentSource.raw_text holds the compact version.
+"""
+import re
+import unicodedata
+from collections import Counter
+
+from django.conf import settings
+
+from .pdf import PAGE_BREAK
+
+# Invisible characters that survive extraction
+ZERO_WIDTH = dict.fromkeys(map(ord, '\u200b\u200c\u200d\u2060\ufeff\u00ad'))
+
+CAPTION_TAGS = re.compile(r'\[(?:music|applause|laughter|laughs|inaudible|silence|cheering|noise)\]|>>', re.I)
+# Standalone fillers only: not part of a hyphenated word ("mm-wave"), a unit after a number ("35 um")
+# or an acronym (case-sensitive, so "HMM" stays)
+FILLERS = re.compile(r'(?<![\w-])(?<!\d\s)(?:[Uu]m+|[Uu]h+|[Ee]rm+|[Hh]mm*)(?![\w-])[,.]?\s*')
+# Speech stutters on words nobody repeats on purpose ("I I think", "the the"); "so so good" or
+# "had had" are kept. Only applied to captions.
+CAPTION_STUTTER = re.compile(r'\b(I|a|an|the|to|and|it|we|you|he|she|they|of|in)(?:\s+\1\b)+', re.I)
+PAGE_NUMBER = re.compile(r'^(?:page\s*)?\d{1,4}(?:\s*(?:of|/)\s*\d{1,4})?$', re.I)
+HYPHEN_BREAK = re.compile(r'(\w)-\n(?=[a-z])')
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=["\'(A-Z0-9])')
+BULLET = re.compile(r'^(?:[-*•▪●]|\d{1,3}[.)])\s')
+
+# Lines this short that recur on this many pages are headers/footers
+REPEATED_LINE_MAX_CHARS = 100
+REPEATED_LINE_MIN_COUNT = 3
+# Target words per paragraph when re-segmenting transcripts
+TRANSCRIPT_PARAGRAPH_WORDS = 120
+
+
+def collapse_whitespace(text: str) -> str:
+    """Unicode NFC, no invisible characters, single spaces, stripped lines, at most one blank line."""
+    text = unicodedata.normalize('NFC', text).translate(ZERO_WIDTH)
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = re.sub(r'[^\S\n]+', ' ', text)
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    return re.sub(r'\n{3,}', '\n\n', text).strip()
+
+
+def drop_page_numbers(text: str) -> str:
+    """
+    Removes page numbers: a number ("12", "Page 3 of 10") as the first or last line of a page.
+    Pages are separated by pdf.PAGE_BREAK; numbers inside a page (years, table cells) are kept.
+    """
+    pages = []
+    for page in text.split(PAGE_BREAK):
+        lines = page.split('\n')
+        filled = [index for index, line in enumerate(lines) if line.strip()]
+        boundaries = {filled[0], filled[-1]} if filled else set()
+        pages.append('\n'.join(
+            line for index, line in enumerate(lines)
+            if not (index in boundaries and PAGE_NUMBER.match(line.strip()))
+        ))
+    return '\n'.join(pages)
+
+
+def drop_repeated_lines(text: str) -> str:
+    """Removes short lines recurring REPEATED_LINE_MIN_COUNT+ times (running headers/footers), except numbers."""
+    lines = text.split('\n')
+    counts = Counter(
+        line.lower() for line in lines
+        if line and len(line) <= REPEATED_LINE_MAX_CHARS and not PAGE_NUMBER.match(line)
+    )
+    kept = [line for line in lines if counts.get(line.lower(), 0) < REPEATED_LINE_MIN_COUNT]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(kept)).strip()
+
+
+def drop_duplicate_paragraphs(text: str) -> str:
+    """Removes paragraphs that repeat an earlier one verbatim."""
+    seen = set()
+    paragraphs = []
+    for paragraph in text.split('\n\n'):
+        key = paragraph.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        paragraphs.append(paragraph)
+    return '\n\n'.join(paragraphs)
+
+
+def reflow(text: str) -> str:
+    """
+    Joins hard-wrapped lines and words hyphenated across lines. A line starts a new
+    paragraph after a short line ending a sentence, or when it is a bullet item.
+    """
+    text = HYPHEN_BREAK.sub(r'\1', text)
+    blocks = []
+    for block in text.split('\n\n'):
+        lines = block.split('\n')
+        width = max(len(line) for line in lines)
+        paragraphs = []
+        previous_line = ''
+        for line in lines:
+            ends_paragraph = previous_line.endswith(('.', '!', '?', ':')) and len(previous_line) < width * 0.8
+            if not paragraphs or BULLET.match(line) or ends_paragraph:
+                paragraphs.append(line)
+            else:
+                paragraphs[-1] = f"{paragraphs[-1]} {line}"
+            previous_line = line
+        blocks.append('\n'.join(paragraphs))
+    return '\n\n'.join(blocks)
+
+
+def _overlap(previous: list[str], current: list[str]) -> int:
+    """Number of words at the end of previous that start current."""
+    for size in range(min(len(previous), len(current)), 0, -1):
+        if previous[-size:] == current[:size]:
+            return size
+    return 0
+
+
+def dedupe_captions(lines: list[str]) -> list[str]:
+    """
+    Drops caption lines repeating the end of the previous one, replaces lines extended
+    by the next one and trims words a rolling caption carries over from the previous line,
+    even a single word (otherwise "about | about the" reads "about about").
+    Lines are compared with the previous caption as received, not its trimmed version.
+    """
+    kept = []
+    previous = []
+    for line in lines:
+        words = line.split()
+        if not words:
+            continue
+        current = line.lower().split()
+        if kept:
+            if previous[-len(current):] == current:
+                continue
+            if current[:len(previous)] == previous:
+                # Extends the previous caption: add only the new words
+                kept[-1] = ' '.join([kept[-1], *words[len(previous):]])
+                previous = current
+                continue
+            words = words[_overlap(previous, current):]
+        kept.append(' '.join(words))
+        previous = current
+    return kept
+
+
+def segment(text: str) -> str:
+    """Re-segments run-on text into paragraphs of whole sentences (or word groups without punctuation)."""
+    target = TRANSCRIPT_PARAGRAPH_WORDS
+    sentences = SENTENCE_END.split(text)
+    paragraphs, current, size = [], [], 0
+    for sentence in sentences:
+        sentence_words = sentence.split()
+        if len(sentence_words) > target * 2:
+            # A long unpunctuated stretch: flush, then split it by words
+            if current:
+                paragraphs.append(' '.join(current))
+                current, size = [], 0
+            paragraphs.extend(' '.join(sentence_words[i:i + target]) for i in range(0, len(sentence_words), target))
+            continue
+        current.append(sentence)
+        size += len(sentence_words)
+        if size >= target:
+            paragraphs.append(' '.join(current))
+            current, size = [], 0
+    if current:
+        paragraphs.append(' '.join(current))
+    return '\n\n'.join(paragraphs)
+
+
+def normalize_transcript(text: str) -> str:
+    text = CAPTION_TAGS.sub(' ', text)
+    lines = dedupe_captions([line.strip() for line in text.split('\n')])
+    text = ' '.join(lines)
+    text = FILLERS.sub('', text)
+    text = CAPTION_STUTTER.sub(r'\1', text)
+    return segment(' '.join(text.split()))
+
+
+def normalize_text(text: str, source_type: str) -> str:
+    """Normalized text for a ContentSource.SourceType value; unchanged if TEXT_NORMALIZATION_ENABLED is off."""
+    from ..models import ContentSource
+
+    if not text or not settings.TEXT_NORMALIZATION_ENABLED:
+        return text or ''
+
+    if source_type == ContentSource.SourceType.PDF:
+        # Before whitespace is collapsed, while page breaks are still there
+        text = drop_page_numbers(text)
+    text = collapse_whitespace(text)
+    if source_type == ContentSource.SourceType.YOUTUBE:
+        return normalize_transcript(text)
+    if source_type == ContentSource.SourceType.PDF:
+        return drop_duplicate_paragraphs(reflow(drop_repeated_lines(text)))
+    if source_type == ContentSource.SourceType.BLOG:
+        return drop_duplicate_paragraphs(text)
+    return text
@@ -0,0 +1,162 @@
+"""
+Page-parallel, memory-bounded PDF text extraction.
+
+Uploads are read from disk (Django's temporary upload file, local storage, or
+a temp file the upload is spooled into) rather than held in memory. Page ranges
+are parsed on a shared process pool and joined in page order; extraction stops
+once PDF_EXTRACT_MAX_CHARS is reached. Inside daemonic processes (Celery prefork
+workers), which may not start children, and for short documents, pages are
+parsed sequentially in-process from a single reader with the same budget.
+"""
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing, contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SPOOL_CHUNK_SIZE = 1024 * 1024
+# Separates pages in the extracted text, so normalization can tell page headers and footers apart
+PAGE_BREAK = '\f'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def page_texts(reader, start: int, stop: int) -> list[str]:
+    """Text of pages [start, stop) of an open PdfReader."""
+    return [reader.pages[index].extract_text() or '' for index in range(start, stop)]
+
+
+def extract_page_range(path: str, start: int, stop: int) -> list[str]:
+    """Text of pages [start, stop) of the PDF at path. Runs in pool worker processes, which open their own reader."""
+    import PyPDF2
+
+    return page_texts(PyPDF2.PdfReader(path), start, stop)
+
+
+def _get_pool():
+    """Shared process pool, or None where child processes cannot be used."""
+    global _pool
+    if settings.PDF_EXTRACT_WORKERS < 2 or multiprocessing.current_process().daemon:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # 'spawn' avoids forking a process that already runs threads
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.PDF_EXTRACT_WORKERS,
+                    mp_context=multiprocessing.get_context(settings.PDF_EXTRACT_MP_CONTEXT)
+                )
+    return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+@contextmanager
+def local_path(file_obj):
+    """
+    Yields a filesystem path holding the file's bytes. Uses the file's own path when
+    it has one; otherwise copies it in chunks to a temp file that is removed afterwards.
+    """
+    path = None
+    if hasattr(file_obj, 'temporary_file_path'):
+        path = file_obj.temporary_file_path()
+    else:
+        try:
+            path = file_obj.path  # FieldFile on local storage
+        except (AttributeError, NotImplementedError, ValueError):
+            path = None
+
+    if path and os.path.isfile(path):
+        yield path
+        return
+
+    spool = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+    try:
+        with spool:
+            if hasattr(file_obj, 'seek'):
+                file_obj.seek(0)
+            shutil.copyfileobj(file_obj, spool, SPOOL_CHUNK_SIZE)
+        yield spool.name
+    finally:
+        os.unlink(spool.name)
+
+
+def _page_batches(path: str, reader, pool=None):
+    """
+    Yields lists of page texts in page order. Without a pool all batches are read from
+    the one already parsed reader; with one, a bounded window of tasks is kept in flight.
+    """
+    page_count = len(reader.pages)
+    size = max(1, settings.PDF_EXTRACT_PAGES_PER_TASK)
+    ranges = ((start, min(start + size, page_count)) for start in range(0, page_count, size))
+
+    if pool is None:
+        for start, stop in ranges:
+            yield page_texts(reader, start, stop)
+        return
+
+    window = settings.PDF_EXTRACT_WORKERS * 2
+    pending = deque()
+    try:
+        for start, stop in ranges:
+            pending.append(pool.submit(extract_page_range, path, start, stop))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Early stop: drop work nobody will read
+        for future in pending:
+            future.cancel()
+
+
+def _collect(batches, max_chars: int, page_count: int) -> list[str]:
+    """Page texts in order, up to the character budget."""
+    parts = []
+    size = 0
+    with closing(batches):
+        for texts in batches:
+            parts.extend(texts)
+            size += sum(len(text) + 2 for text in texts)
+            if max_chars and size >= max_chars:
+                logger.info(f"PDF text budget of {max_chars} chars reached after {len(parts)}/{page_count} pages")
+                break
+    return parts
+
+
+def extract_pdf_text(file_obj, max_chars: int = None) -> str:
+    """Extracts PDF text page by page, stopping after max_chars (default PDF_EXTRACT_MAX_CHARS)."""
+    import PyPDF2
+
+    max_chars = settings.PDF_EXTRACT_MAX_CHARS if max_chars is None else max_chars
+
+    with local_path(file_obj) as path:
+        reader = PyPDF2.PdfReader(path)
+        page_count = len(reader.pages)
+        pool = _get_pool() if page_count >= settings.PDF_EXTRACT_PARALLEL_MIN_PAGES else None
+
+        try:
+            parts = _collect(_page_batches(path, reader, pool), max_chars, page_count)
+        except BrokenProcessPool:
+            logger.warning("PDF extraction pool broke; extracting sequentially")
+            _reset_pool()
+            parts = _collect(_page_batches(path, reader), max_chars, page_count)
+
+    text = PAGE_BREAK.join(f"{part}\n" for part in parts)
+    return text[:max_chars] if max_chars else text
@@ -0,0 +1,163 @@
+"""
+Stages of the repurpose pipeline (extract -> generate -> persist).
+
+Shared by the synchronous RepurposeView and the background Celery tasks so
+both paths produce identical ContentSource/RepurposedPost rows.
+"""
+import logging
+import os
+
+from ..models import ContentSource, RepurposedPost
+from ..utils import file_sha256, normalize_url, text_sha256
+
+logger = logging.getLogger(__name__)
+
+
+def _file_title(source_file, fallback: str) -> str:
+    name = os.path.basename(source_file.name or '')
+    return name.rsplit('.', 1)[0] or fallback
+
+
+def dedup_keys(source_url: str = '', source_file=None, raw_text: str = '') -> dict:
+    """normalized_url/content_hash identifying a submission; URLs win over files over text."""
+    if source_url:
+        return {'normalized_url': normalize_url(source_url), 'content_hash': ''}
+    if source_file:
+        return {'normalized_url': '', 'content_hash': file_sha256(source_file)}
+    if raw_text:
+        return {'normalized_url': '', 'content_hash': text_sha256(raw_text)}
+    return {'normalized_url': '', 'content_hash': ''}
+
+
+def find_reusable_source(user, normalized_url: str = '', content_hash: str = ''):
+    """The user's latest successfully extracted source with the same URL or content, or None."""
+    if normalized_url:
+        lookup = {'normalized_url': normalized_url}
+    elif content_hash:
+        lookup = {'content_hash': content_hash}
+    else:
+        return None
+    return ContentSource.objects.filter(
+        user=user, is_processed=True, **lookup
+    ).exclude(raw_text='').order_by('-created_at').first()
+
+
+def extract_source(content_source, source_file=None, title: str = '') -> tuple[str, str]:
+    """
+    Runs the extractor matching the source type.
+    Returns a (text, title) tuple; raw text sources are returned unchanged.
+    """
+    from .extractor import ContentExtractor
+
+    extractor = ContentExtractor()
+    source_type = content_source.source_type
+    source_url = content_source.source_url
+
+    if source_type == ContentSource.SourceType.YOUTUBE:
+        return extractor.extract_youtube(source_url)
+    if source_type == ContentSource.SourceType.BLOG:
+        return extractor.extract_blog(source_url)
+    if source_type == ContentSource.SourceType.PDF and source_file:
+        text = extractor.extract_pdf_content(source_file)
+        return text, title or _file_title(source_file, 'Uploaded Document')
+    if source_type == ContentSource.SourceType.TEXT and source_file:
+        # It's a text file upload
+        source_file.seek(0)
+        text = source_file.read().decode('utf-8', errors='ignore')
+        return text, title or _file_title(source_file, 'Uploaded Text')
+    return content_source.raw_text, title or 'Untitled'
+
+
+def save_extracted(content_source, text: str, title: str) -> None:
+    """
+    Stores normalized extraction output on the source, with its size before and after
+    normalization. A new text invalidates any previous digest.
+    """
+    from .normalize import normalize_text
+
+    text = text or ''
+    normalized = normalize_text(text, content_source.source_type)
+    content_source.extracted_chars = len(text)
+    content_source.normalized_chars = len(normalized)
+    content_source.raw_text = normalized
+    content_source.title = title or content_source.title or 'Untitled'
+    content_source.key_insights = []
+    content_source.save()
+
+
+def ensure_digest(content_source, ai_engine) -> None:
+    """
+    Builds the map-reduce digest of a long source once and stores it on
+    ContentSource.key_insights, so later generations and regenerations reuse it.
+    """
+    if content_source.key_insights:
+        return
+    digest = ai_engine.build_digest(content_source.raw_text or '')
+    if digest:
+        content_source.key_insights = digest
+        content_source.save(update_fields=['key_insights', 'updated_at'])
+
+
+def generation_input(content_source) -> str:
+    """The text sent to the model: the stored digest if there is one, else the raw text."""
+    if content_source.key_insights:
+        return "Key points from the source:\n" + "\n".join(
+            f"- {point}" for point in content_source.key_insights
+        )
+    return content_source.raw_text
+
+
+def generate_for_posts(ai_engine, posts, **kwargs):
+    """
+    AIEngine.generate_posts for a list of posts, yielding (post, result) for every post.
+    generate_posts returns one result per platform, so posts sharing a platform (a reused
+    source can hold several) are generated in separate rounds. kwargs go to generate_posts.
+    """
+    rounds = []
+    for post in posts:
+        for posts_by_platform in rounds:
+            if post.platform not in posts_by_platform:
+                posts_by_platform[post.platform] = post
+                break
+        else:
+            rounds.append({post.platform: post})
+
+    for posts_by_platform in rounds:
+        for platform, result in ai_engine.generate_posts(platforms=list(posts_by_platform), **kwargs):
+            yield posts_by_platform[platform], result
+
+
+def apply_generated(post, generated: dict) -> bool:
+    """
+    Copies an AIEngine result onto a post and marks it ready. An error result (a model
+    error or a platform that timed out) marks the post failed instead, so its error text
+    is never stored as content that could be published. Returns True if content was applied.
+    """
+    if 'error' in generated:
+        post.status = RepurposedPost.Status.FAILED
+        post.error_message = generated['error'] or 'Generation failed.'
+        post.save()
+        return False
+
+    post.generated_content = generated.get('content', '')
+    post.hook = generated.get('hook', '')
+    post.hashtags = generated.get('hashtags') or []
+    post.thread_posts = generated.get('thread_posts') or []
+    post.variants = generated.get('variants') or []
+    post.generation_fingerprint = generated.get('fingerprint', '')
+    post.generation_cache_hit = bool(generated.get('cached'))
+    post.status = RepurposedPost.Status.READY
+    post.error_message = ''
+    post.save()
+    return True
+
+
+def mark_failed(content_source, posts, error: str, post_error: str = None) -> None:
+    """Records a processing failure on the source and all of its pending posts."""
+    content_source.processing_error = error
+    content_source.save()
+
+    for post in posts:
+        post.status = RepurposedPost.Status.FAILED
+        post.error_message = post_error or error
+        post.save()
@@ -0,0 +1,220 @@
+"""
+Publishing of repurposed posts to connected social accounts.
+
+Used by the publish tasks and by scheduled posting. send() calls the platform's
+SocialMediaService method and record_result() stores the outcome on the post.
+Every attempt is written to PostingLog. publish_in_lanes() publishes many
+posts at once, each platform on its own bounded thread pool, so a slow
+platform (a YouTube upload) does not hold up the others.
+"""
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Platforms without direct publishing, and what the user is told instead
+DISABLED_PLATFORMS = {
+    'instagram': 'Direct publishing to Instagram is currently disabled. You can copy the generated content and post manually.',
+    'facebook': 'Direct publishing to Facebook is currently disabled. You can copy the generated content and post manually.',
+}
+
+
+def publish_blocker(post) -> str:
+    """Why the post cannot be published as it stands, or '' if it can."""
+    from ..models import RepurposedPost
+
+    if post.platform in DISABLED_PLATFORMS:
+        return DISABLED_PLATFORMS[post.platform]
+    if post.platform == RepurposedPost.Platform.YOUTUBE and not post.media_file:
+        return 'Video file is required for YouTube.'
+    return ''
+
+
+def claim(post) -> bool:
+    """
+    Marks the post as publishing unless a publish is already in flight. A claim
+    older than PUBLISH_STALE_AFTER (lost worker) can be taken over.
+    """
+    from ..models import RepurposedPost
+
+    stale_before = timezone.now() - timedelta(seconds=settings.PUBLISH_STALE_AFTER)
+    claimed = RepurposedPost.objects.filter(pk=post.pk).exclude(
+        status=RepurposedPost.Status.PUBLISHING, updated_at__gt=stale_before
+    ).update(status=RepurposedPost.Status.PUBLISHING, error_message='', updated_at=timezone.now())
+    if claimed:
+        post.status = RepurposedPost.Status.PUBLISHING
+        post.error_message = ''
+    return bool(claimed)
+
+
+def send(post, account, video_title: str = None) -> dict:
+    """Publishes the post with the account. Returns the service's result dict."""
+    from apps.social_accounts.models import MediaUpload, SocialAccount
+    from apps.social_accounts.services import SocialMediaService
+
+    blocker = publish_blocker(post)
+    if blocker:
+        return {'success': False, 'error': blocker}
+
+    if post.platform == SocialAccount.Platform.LINKEDIN:
+        return SocialMediaService.post_to_linkedin(
+            account.access_token,
+            account.platform_user_id,
+            post.generated_content,
+            media_file=post.media_file
+        )
+    if post.platform == SocialAccount.Platform.TWITTER:
+        return SocialMediaService.post_to_twitter(
+            account,
+            post.generated_content,
+            media_file=post.media_file
+        )
+    if post.platform == SocialAccount.Platform.YOUTUBE:
+        return SocialMediaService.post_to_youtube(
+            account.access_token,
+            title=post.hook or video_title or f"Video by {account.user.username}",
+            description=post.generated_content,
+            video_file=post.media_file,
+            upload=MediaUpload.resume_or_start(account, post)
+        )
+    return {'success': False, 'error': f'Unsupported platform: {post.platform}'}
+
+
+def record_result(post, account, result: dict, final: bool = True):
+    """
+    Writes a PostingLog row for the attempt and updates the post. With final=False
+    (the attempt will be retried) the post keeps its status and only the error is noted.
+    """
+    from apps.social_accounts.models import PostingLog
+    from ..models import RepurposedPost
+
+    if result.get('success'):
+        log_status = PostingLog.Status.SUCCESS
+    elif result.get('rate_limited'):
+        log_status = PostingLog.Status.RATE_LIMITED
+    else:
+        log_status = PostingLog.Status.FAILED
+    log = PostingLog.objects.create(
+        social_account=account,
+        repurposed_post=post,
+        status=log_status,
+        platform_response={key: value for key, value in result.items() if key not in ('success', 'error')},
+        error_message=result.get('error', '') or ''
+    )
+
+    if result.get('success'):
+        post.status = RepurposedPost.Status.PUBLISHED
+        post.published_at = timezone.now()
+        post.platform_post_id = str(result.get('id', ''))
+        post.platform_post_url = result.get('url', '') or ''
+        post.error_message = ''
+        account.mark_used()
+    else:
+        if final:
+            post.status = RepurposedPost.Status.FAILED
+        post.error_message = result.get('error', 'Unknown error')
+    post.save(update_fields=['status', 'published_at', 'platform_post_id', 'platform_post_url', 'error_message', 'updated_at'])
+    return log
+
+
+def publish(post, account, video_title: str = None, can_retry: bool = False) -> dict:
+    """
+    send() and record_result() in one call. With can_retry, a failure the platform
+    can resume from (result['resumable']) leaves the post in its current status.
+    """
+    try:
+        result = send(post, account, video_title=video_title)
+    except Exception as e:
+        logger.exception(f"Publishing post {post.id} to {account.platform} failed")
+        result = {'success': False, 'error': str(e)}
+
+    final = not (can_retry and result.get('resumable'))
+    record_result(post, account, result, final=final)
+    if result.get('success'):
+        logger.info(f"Published post {post.id} to {account.platform}")
+    return result
+
+
+def lane_limit(platform: str) -> int:
+    """Concurrent publishes allowed for a platform (PUBLISH_LANE_CONCURRENCY)."""
+    return max(1, settings.PUBLISH_LANE_CONCURRENCY.get(platform, settings.PUBLISH_LANE_DEFAULT_CONCURRENCY))
+
+
+def _publish_in_schema(schema_name, post, account):
+    """publish() on a worker thread, which has its own database connection."""
+    from django.db import connection
+    from django_tenants.utils import schema_context
+
+    try:
+        with schema_context(schema_name):
+            return publish(post, account, can_retry=True)
+    finally:
+        connection.close()
+
+
+def publish_in_lanes(targets, schema_name) -> dict:
+    """
+    Publishes (post, account) pairs concurrently: one thread pool per platform,
+    sized by lane_limit(), with all lanes running at once. Returns
+    {platform: {'published', 'failed', 'resumable', 'seconds', 'posts': [...]}}.
+    Resumable failures leave their post publishing, for the caller to retry.
+    """
+    lanes = defaultdict(list)
+    for post, account in targets:
+        lanes[post.platform].append((post, account))
+
+    executors = {
+        platform: ThreadPoolExecutor(
+            max_workers=min(lane_limit(platform), len(pairs)),
+            thread_name_prefix=f'publish-{platform}'
+        )
+        for platform, pairs in lanes.items()
+    }
+    started = time.monotonic()
+    futures = {
+        executors[platform].submit(_publish_in_schema, schema_name, post, account): (platform, post)
+        for platform, pairs in lanes.items()
+        for post, account in pairs
+    }
+
+    summary = {
+        platform: {'published': 0, 'failed': 0, 'resumable': 0, 'seconds': 0.0, 'posts': []}
+        for platform in lanes
+    }
+    remaining = {platform: len(pairs) for platform, pairs in lanes.items()}
+    try:
+        for future in as_completed(futures):
+            platform, post = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.exception(f"Publishing post {post.id} to {platform} failed")
+                result = {'success': False, 'error': str(e)}
+
+            lane = summary[platform]
+            if result.get('success'):
+                lane['published'] += 1
+            elif result.get('resumable'):
+                lane['resumable'] += 1
+            else:
+                lane['failed'] += 1
+            lane['posts'].append({
+                'post_id': post.id,
+                'success': bool(result.get('success')),
+                'resumable': bool(result.get('resumable')),
+                'url': result.get('url', ''),
+                'error': result.get('error', ''),
+            })
+            remaining[platform] -= 1
+            if not remaining[platform]:
+                lane['seconds'] = round(time.monotonic() - started, 2)
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+    return summary
@@ -0,0 +1,155 @@
+"""
+Cluster-wide token-bucket limiter for model calls.
+
+Buckets live in Redis so every gunicorn and Celery process draws from the
+same requests-per-minute and tokens-per-minute budget per API key (and,
+optionally, per tenant). All buckets of one call are checked and charged
+atomically in a Lua script.
+"""
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+
+from ..exceptions import RateLimitExceeded
+from .cache import get_redis, redis_failed
+
+logger = logging.getLogger(__name__)
+
+# KEYS: bucket keys. ARGV[1]: now; then (capacity, refill per second, cost) per key.
+# Returns '0' and charges every bucket, or the seconds to wait (nothing charged).
+# Numbers are returned as strings because Redis truncates Lua numbers to integers.
+ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local levels = {}
+local wait = 0
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[i * 3 - 1])
+    local rate = tonumber(ARGV[i * 3])
+    local cost = tonumber(ARGV[i * 3 + 1])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    local needed = math.min(cost, capacity)
+    if tokens < needed then
+        wait = math.max(wait, (needed - tokens) / rate)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[i * 3 - 1])
+    local rate = tonumber(ARGV[i * 3])
+    local cost = tonumber(ARGV[i * 3 + 1])
+    redis.call('HSET', KEYS[i], 'tokens', tostring(levels[i] - cost), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[i], math.ceil(capacity / rate) + 60)
+end
+return '0'
+"""
+
+
+def estimate_tokens(prompt: str) -> int:
+    """Rough token count of a call: ~4 characters per input token plus the expected output."""
+    return len(prompt) // 4 + settings.AI_RATE_LIMIT_OUTPUT_TOKENS
+
+
+class TokenBucketLimiter:
+    """Requests-per-minute and tokens-per-minute buckets for one API key."""
+
+    def __init__(self, api_key: str, namespace: str = 'gemini'):
+        key_id = hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:12]
+        self.prefix = f"ratelimit:{namespace}:{key_id}"
+        self.namespace = namespace
+        self._script = None
+
+    def _buckets(self, tokens: int, tenant: str = None) -> list:
+        """(key, capacity, refill per second, cost) for every bucket this call draws from."""
+        buckets = []
+        limits = [('', settings.AI_RATE_LIMIT_RPM, settings.AI_RATE_LIMIT_TPM)]
+        if tenant:
+            limits.append((f":tenant:{tenant}", settings.AI_RATE_LIMIT_TENANT_RPM, settings.AI_RATE_LIMIT_TENANT_TPM))
+
+        for suffix, rpm, tpm in limits:
+            if rpm:
+                buckets.append((f"{self.prefix}{suffix}:rpm", rpm, rpm / 60.0, 1))
+            if tpm:
+                buckets.append((f"{self.prefix}{suffix}:tpm", tpm, tpm / 60.0, tokens))
+        return buckets
+
+    def try_acquire(self, tokens: int, tenant: str = None) -> float:
+        """Charge the buckets if there is room. Returns 0 on success, else seconds to wait."""
+        client = get_redis()
+        buckets = self._buckets(tokens, tenant)
+        if client is None or not buckets:
+            return 0
+
+        if self._script is None:
+            self._script = client.register_script(ACQUIRE_SCRIPT)
+        args = [time.time()]
+        for _, capacity, rate, cost in buckets:
+            args.extend([capacity, rate, cost])
+        try:
+            return float(self._script(keys=[key for key, *_ in buckets], args=args))
+        except Exception as e:
+            # Fail open: a Redis outage must not stop generation altogether
+            logger.warning(f"Rate limiter unavailable, allowing call: {str(e)}")
+            redis_failed(e)
+            return 0
+
+    def acquire(self, tokens: int, tenant: str = None, max_wait: float = None):
+        """
+        Wait (up to max_wait seconds) for budget, then charge it.
+        Raises RateLimitExceeded with a retry-after hint if the wait would be longer.
+        """
+        max_wait = settings.AI_RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self.try_acquire(tokens, tenant)
+            if wait <= 0:
+                return
+            remaining = deadline - time.monotonic()
+            if wait > remaining:
+                raise RateLimitExceeded(wait, scope=self.namespace)
+            time.sleep(wait)
+
+    def state(self, tenant: str = None) -> list:
+        """Current fill level of each bucket (global, plus the tenant's if given), for monitoring."""
+        client = get_redis()
+        if client is None:
+            return []
+
+        now = time.time()
+        state = []
+        for key, capacity, rate, _ in self._buckets(0, tenant):
+            try:
+                tokens, ts = client.hmget(key, 'tokens', 'ts')
+            except Exception as e:
+                logger.warning(f"Could not read rate limit bucket {key}: {str(e)}")
+                continue
+            level = capacity if tokens is None else min(
+                capacity, float(tokens) + max(0.0, now - float(ts)) * rate
+            )
+            state.append({
+                'bucket': key.rsplit(':', 1)[-1],
+                'tenant': tenant if ':tenant:' in key else None,
+                'capacity': capacity,
+                'available': round(level, 2),
+                'refill_per_second': round(rate, 4),
+            })
+        return state
+
+
+_limiters = {}
+
+
+def get_limiter(api_key: str = None) -> TokenBucketLimiter:
+    """Shared limiter per API key."""
+    api_key = settings.GEMINI_API_KEY if api_key is None else api_key
+    limiter = _limiters.get(api_key)
+    if limiter is None:
+        limiter = _limiters.setdefault(api_key, TokenBucketLimiter(api_key))
+    return limiter
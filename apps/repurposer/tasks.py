@@ -57,6 +57,7 @@ def publish_scheduled_post(scheduled_post_id, schema_name=None):
     """
     Publish a specific scheduled post to configured platforms.
     """
+    from .exceptions import RateLimitExceeded
     from .models import ScheduledPost, RepurposedPost
     from apps.social_accounts.models import SocialAccount
     from apps.social_accounts.services import SocialMediaService
@@ -105,6 +106,11 @@ def publish_scheduled_post(scheduled_post_id, schema_name=None):
                 scheduled.save()
                 logger.error(f"Failed to publish scheduled post {scheduled.id}: {result.get('error')}")
                 
+        except RateLimitExceeded as e:
+            # Leave the schedule due; the next beat run picks it up again
+            scheduled.error_message = str(e)
+            scheduled.save(update_fields=['error_message', 'updated_at'])
+            logger.warning(f"Scheduled post {scheduled.id} rate limited: {str(e)}")
         except Exception as e:
             scheduled.status = ScheduledPost.Status.FAILED
             scheduled.error_message = str(e)
@@ -115,7 +121,7 @@ def publish_scheduled_post(scheduled_post_id, schema_name=None):
 def _publish_post_to_platforms(user, post):
     """Helper to publish a post to its platform."""
     from apps.social_accounts.models import SocialAccount
-    from apps.social_accounts.services import SocialMediaService
+    from .services.publishing import publish
     
     # Get user's social account for this platform
     account = SocialAccount.objects.filter(
@@ -127,85 +133,63 @@ def _publish_post_to_platforms(user, post):
     if not account:
         return {'success': False, 'error': f'No connected {post.platform} account found'}
     
-    # Publish based on platform
-    if post.platform == 'linkedin':
-        return SocialMediaService.post_to_linkedin(
-            account.access_token,
-            account.platform_user_id,
-            post.generated_content,
-            media_file=post.media_file
-        )
-    elif post.platform == 'youtube':
-        if not post.media_file:
-            return {'success': False, 'error': 'Video file required for YouTube'}
-        return SocialMediaService.post_to_youtube(
-            account.access_token,
-            title=post.hook or 'Scheduled Post',
-            description=post.generated_content,
-            video_file=post.media_file
-        )
-    elif post.platform == 'twitter':
-        return SocialMediaService.post_to_twitter(
-            account,
-            post.generated_content,
-            media_file=post.media_file
-        )
-    
-    return {'success': False, 'error': f'Unsupported platform: {post.platform}'}
+    return publish(post, account, video_title='Scheduled Post')
 
 
 def _generate_and_publish(scheduled):
     """Generate AI content from prompt and publish."""
-    from .services.ai_engine import AIEngine
+    from .exceptions import RateLimitExceeded
+    from .services.ai_engine import get_ai_engine
     from .models import ContentSource, RepurposedPost
     
     if not scheduled.prompt:
         return {'success': False, 'error': 'No prompt provided for AI generation'}
     
-    ai_engine = AIEngine()
+    ai_engine = get_ai_engine()
     results = []
     
-    for platform in scheduled.platforms:
-        try:
-            # Generate content
-            generated = ai_engine.generate_post(
-                content=scheduled.prompt,
-                platform=platform,
-                brand_voice=scheduled.brand_voice,
-                user_prompt="Generate a fresh, engaging post based on this topic/prompt."
-            )
-            
-            # Create a content source for tracking
-            source = ContentSource.objects.create(
-                user=scheduled.user,
-                source_type='text',
-                raw_text=scheduled.prompt,
-                title=f"Scheduled AI Post - {timezone.now().strftime('%Y-%m-%d %H:%M')}",
-                is_processed=True
-            )
-            
-            # Create the post
-            post = RepurposedPost.objects.create(
-                source=source,
-                platform=platform,
-                brand_voice=scheduled.brand_voice,
-                generated_content=generated.get('content', ''),
-                hook=generated.get('hook', ''),
-                hashtags=generated.get('hashtags', []),
-                status='ready'
-            )
+    # Generate content for all platforms concurrently, publishing each as it completes
+    try:
+        for platform, generated in ai_engine.generate_posts(
+            content=scheduled.prompt,
+            platforms=scheduled.platforms,
+            brand_voice=scheduled.brand_voice,
+            user_prompt="Generate a fresh, engaging post based on this topic/prompt."
+        ):
+            try:
+                # Create a content source for tracking
+                source = ContentSource.objects.create(
+                    user=scheduled.user,
+                    source_type='text',
+                    raw_text=scheduled.prompt,
+                    title=f"Scheduled AI Post - {timezone.now().strftime('%Y-%m-%d %H:%M')}",
+                    is_processed=True
+                )
             
-            # Publish it
-            result = _publish_post_to_platforms(scheduled.user, post)
-            results.append(result)
+                # Create the post
+                post = RepurposedPost.objects.create(
+                    source=source,
+                    platform=platform,
+                    brand_voice=scheduled.brand_voice,
+                    generated_content=generated.get('content', ''),
+                    hook=generated.get('hook', ''),
+                    hashtags=generated.get('hashtags', []),
+                    generation_fingerprint=generated.get('fingerprint', ''),
+                    generation_cache_hit=bool(generated.get('cached')),
+                    status='ready'
+                )
             
-            if result['success']:
-                post.status = 'published'
-                post.published_at = timezone.now()
-                post.save()
+                # Publish it (the post's status is updated with the result)
+                result = _publish_post_to_platforms(scheduled.user, post)
+                results.append(result)
                 
-        except Exception as e:
-            results.append({'success': False, 'error': str(e)})
+            except Exception as e:
+                results.append({'success': False, 'error': str(e)})
+    except RateLimitExceeded as e:
+        # Nothing published yet: let the caller retry the whole run later
+        if not any(r.get('success') for r in results):
+            raise
+        results.append({'success': False, 'error': str(e)})
     
     # Check if at least one succeeded
     if any(r.get('success') for r in results):
@@ -213,6 +197,412 @@ def _generate_and_publish(scheduled):
     return {'success': False, 'error': results[0].get('error') if results else 'Unknown error'}
 
 
+def _publish_options(**options):
+    from django.conf import settings
+
+    if settings.PUBLISH_QUEUE:
+        options['queue'] = settings.PUBLISH_QUEUE
+    return options
+
+
+def start_publish(post, account, schema_name, countdown=None):
+    """Enqueue publishing of a post (already marked as publishing) to an account."""
+    return publish_post.apply_async(
+        (post.id, account.id), {'schema_name': schema_name}, **_publish_options(countdown=countdown)
+    )
+
+
+def start_source_publish(targets, schema_name):
+    """Enqueue publishing of claimed (post, account) pairs of a source in per-platform lanes."""
+    pairs = [[post.id, account.id] for post, account in targets]
+    return publish_source.apply_async((pairs,), {'schema_name': schema_name}, **_publish_options())
+
+
+@shared_task
+def publish_source(pairs, schema_name=None):
+    """
+    Publish many posts at once, each platform in its own lane with its own concurrency
+    limit, so the run takes as long as the slowest platform. Returns results per platform.
+    Interrupted resumable uploads continue in publish_post.
+    """
+    from .models import RepurposedPost
+    from .services.publishing import publish_in_lanes
+    from apps.social_accounts.models import SocialAccount
+    from django.conf import settings
+    from django_tenants.utils import schema_context
+
+    with schema_context(schema_name):
+        posts = RepurposedPost.objects.in_bulk([post_id for post_id, _ in pairs])
+        accounts = SocialAccount.objects.select_related('user').filter(is_active=True).in_bulk(
+            {account_id for _, account_id in pairs}
+        )
+
+        targets = []
+        for post_id, account_id in pairs:
+            post = posts.get(post_id)
+            if post is None:
+                continue
+            if account_id not in accounts:
+                post.status = RepurposedPost.Status.FAILED
+                post.error_message = 'The social account was disconnected before publishing.'
+                post.save(update_fields=['status', 'error_message', 'updated_at'])
+                continue
+            targets.append((post, accounts[account_id]))
+
+        summary = publish_in_lanes(targets, schema_name)
+
+        for post, account in targets:
+            if post.status == RepurposedPost.Status.PUBLISHING:
+                # Not finished (resumable upload interrupted): continue with the single-post task's retries
+                start_publish(post, account, schema_name, countdown=settings.PUBLISH_RETRY_DELAY)
+
+        logger.info("Published source posts: " + ", ".join(
+            f"{platform} {lane['published']}/{len(lane['posts'])} in {lane['seconds']}s"
+            for platform, lane in summary.items()
+        ))
+        return summary
+
+
+@shared_task(bind=True, max_retries=3)
+def publish_post(self, post_id, account_id, schema_name=None):
+    """
+    Publish a post to a social account outside the request cycle, logging each attempt
+    to PostingLog. Interrupted resumable uploads are retried and continue from the
+    offset the platform acknowledged.
+    """
+    from .models import RepurposedPost
+    from .services.publishing import publish
+    from apps.social_accounts.models import SocialAccount
+    from django.conf import settings
+    from django_tenants.utils import schema_context
+
+    with schema_context(schema_name):
+        try:
+            post = RepurposedPost.objects.select_related('source').get(id=post_id)
+        except RepurposedPost.DoesNotExist:
+            logger.error(f"RepurposedPost {post_id} not found in schema {schema_name}")
+            return {'success': False, 'error': 'Post not found'}
+
+        account = SocialAccount.objects.select_related('user').filter(id=account_id, is_active=True).first()
+        if account is None:
+            post.status = RepurposedPost.Status.FAILED
+            post.error_message = 'The social account was disconnected before publishing.'
+            post.save(update_fields=['status', 'error_message', 'updated_at'])
+            return {'success': False, 'error': post.error_message}
+
+        can_retry = self.request.retries < self.max_retries
+        result = publish(post, account, can_retry=can_retry)
+        if not result.get('success') and can_retry and result.get('resumable'):
+            countdown = settings.PUBLISH_RETRY_DELAY * 2 ** self.request.retries
+            logger.warning(f"Publishing post {post_id} interrupted, resuming in {countdown}s")
+            raise self.retry(countdown=countdown)
+
+        return {'success': bool(result.get('success')), 'error': result.get('error', ''), 'url': result.get('url', '')}
+
+
+def _repurpose_chain(job_id, schema_name):
+    """The extract -> generate -> persist chain for one RepurposeJob."""
+    from celery import chain
+
+    return chain(
+        run_repurpose_extract.si(job_id, schema_name=schema_name),
+        run_repurpose_generate.si(job_id, schema_name=schema_name),
+        run_repurpose_persist.s(job_id, schema_name=schema_name),
+    )
+
+
+def start_repurpose_job(job, schema_name):
+    """Enqueue the pipeline for a RepurposeJob."""
+    result = _repurpose_chain(job.id, schema_name).apply_async()
+    job.celery_task_id = result.id
+    job.save(update_fields=['celery_task_id', 'updated_at'])
+    return result
+
+
+def start_repurpose_batch(jobs, schema_name):
+    """Enqueue the pipelines of a batch as one Celery group."""
+    from celery import group
+    from .models import RepurposeJob
+
+    result = group(_repurpose_chain(job.id, schema_name) for job in jobs).apply_async()
+    for job, chain_result in zip(jobs, result.results):
+        job.celery_task_id = chain_result.id
+    RepurposeJob.objects.bulk_update(jobs, ['celery_task_id'])
+    return result
+
+
+def _fail_repurpose_job(job, error):
+    """Mark a job, its source and its pending posts as failed."""
+    from .models import RepurposeJob, RepurposedPost
+    from .services.pipeline import mark_failed
+
+    # Only this job's posts; a reused source keeps the posts of other runs
+    pending = job.get_posts().filter(status=RepurposedPost.Status.PENDING)
+    mark_failed(job.source, pending, str(error))
+    job.error_message = str(error)
+    job.set_stage(RepurposeJob.Stage.FAILED, error=str(error))
+
+
+@shared_task
+def run_repurpose_extract(job_id, schema_name=None):
+    """Pipeline stage 1: fetch/parse the source and store the extracted text."""
+    from .models import RepurposeJob
+    from django_tenants.utils import schema_context
+
+    with schema_context(schema_name):
+        job = RepurposeJob.objects.select_related('source').get(id=job_id)
+        source = job.source
+        job.set_stage(RepurposeJob.Stage.EXTRACTING)
+
+        # Reused sources already hold their extracted text
+        if job.progress.get('reused_source') and source.raw_text:
+            job.progress[RepurposeJob.Stage.EXTRACTING].update(chars=len(source.raw_text), reused=True)
+            job.save(update_fields=['progress', 'updated_at'])
+            return
+
+        try:
+            from .services.pipeline import extract_source, save_extracted
+
+            source_file = source.source_file.open('rb') if source.source_file else None
+            try:
+                text, title = extract_source(source, source_file=source_file, title=source.title)
+            finally:
+                if source_file:
+                    source_file.close()
+            save_extracted(source, text, title)
+        except Exception as e:
+            logger.exception(f"Extraction failed for repurpose job {job_id}")
+            _fail_repurpose_job(job, e)
+            raise
+
+        job.progress.setdefault(RepurposeJob.Stage.EXTRACTING, {}).update(
+            chars=source.normalized_chars, extracted_chars=source.extracted_chars
+        )
+        job.save(update_fields=['progress', 'updated_at'])
+
+
+@shared_task(bind=True, max_retries=5)
+def run_repurpose_generate(self, job_id, schema_name=None):
+    """
+    Pipeline stage 2: generate content for every pending post. Returns {post_id: result}.
+    Retried with the limiter's retry-after when the shared model budget is exhausted.
+    """
+    from .exceptions import RateLimitExceeded
+    from .models import RepurposeJob, RepurposedPost
+    from django_tenants.utils import schema_context
+
+    with schema_context(schema_name):
+        job = RepurposeJob.objects.select_related('source', 'brand_voice').get(id=job_id)
+        source = job.source
+        posts = list(job.get_posts().filter(status=RepurposedPost.Status.PENDING))
+        job.set_stage(RepurposeJob.Stage.GENERATING, total=len(posts))
+
+        try:
+            from .services.ai_engine import get_ai_engine
+            from .services.pipeline import ensure_digest, generate_for_posts, generation_input
+
+            ai_engine = get_ai_engine()
+            ensure_digest(source, ai_engine)
+            if source.key_insights:
+                job.progress.setdefault(RepurposeJob.Stage.GENERATING, {})['digest_points'] = len(source.key_insights)
+
+            for post in posts:
+                job.progress.setdefault('platforms', {})[post.platform] = 'generating'
+            job.save(update_fields=['progress', 'updated_at'])
+
+            generated = {}
+            for post, result in generate_for_posts(
+                ai_engine,
+                posts,
+                content=generation_input(source),
+                brand_voice=job.brand_voice,
+                source_url=source.source_url,
+                user_prompt=job.user_prompt or None
+            ):
+                generated[str(post.id)] = result
+                job.set_platform_status(post.platform, 'generated')
+        except RateLimitExceeded as e:
+            if self.request.retries >= self.max_retries:
+                logger.error(f"Giving up on repurpose job {job_id} after {self.request.retries} rate-limited retries")
+                _fail_repurpose_job(job, e)
+                raise
+            logger.warning(f"Repurpose job {job_id} rate limited, retrying in {e.retry_after}s")
+            job.set_stage(RepurposeJob.Stage.QUEUED, rate_limited=True, retry_after=e.retry_after)
+            raise self.retry(exc=e, countdown=e.retry_after)
+        except Exception as e:
+            logger.exception(f"Generation failed for repurpose job {job_id}")
+            _fail_repurpose_job(job, e)
+            raise
+
+        return generated
+
+
+@shared_task
+def run_repurpose_persist(generated, job_id, schema_name=None):
+    """Pipeline stage 3: save generated content and charge the user's usage."""
+    from .models import RepurposeJob, RepurposedPost
+    from django_tenants.utils import schema_context
+
+    with schema_context(schema_name):
+        job = RepurposeJob.objects.select_related('source', 'source__user').get(id=job_id)
+        source = job.source
+        job.set_stage(RepurposeJob.Stage.PERSISTING)
+
+        try:
+            from .services.pipeline import apply_generated
+
+            posts = RepurposedPost.objects.filter(id__in=[int(pk) for pk in generated])
+            applied = 0
+            for post in posts:
+                applied += apply_generated(post, generated[str(post.id)])
+                job.set_platform_status(post.platform, post.status)
+
+            source.is_processed = True
+            source.save()
+            if applied:
+                source.user.increment_usage()
+        except Exception as e:
+            logger.exception(f"Persisting failed for repurpose job {job_id}")
+            _fail_repurpose_job(job, e)
+            raise
+
+        job.set_stage(RepurposeJob.Stage.COMPLETED, generated=applied, failed=len(posts) - applied)
+
+
+def start_regeneration(job, post_ids, schema_name, variants=1):
+    """Enqueue the regeneration of some posts of a source."""
+    result = run_regenerate_posts.delay(job.id, list(post_ids), variants=variants, schema_name=schema_name)
+    job.celery_task_id = result.id
+    job.save(update_fields=['celery_task_id', 'updated_at'])
+    return result
+
+
+@shared_task(bind=True, max_retries=5)
+def run_regenerate_posts(self, job_id, post_ids, variants=1, schema_name=None):
+    """
+    Regenerates existing posts from the source's stored text (or digest); the source
+    is never fetched again. Posts whose regeneration fails keep their current content.
+    """
+    from .exceptions import RateLimitExceeded
+    from .models import RepurposeJob
+    from django_tenants.utils import schema_context
+
+    with schema_context(schema_name):
+        job = RepurposeJob.objects.select_related('source', 'user').get(id=job_id)
+        source = job.source
+        posts = list(source.repurposed_posts.filter(id__in=post_ids).select_related('brand_voice'))
+        job.set_stage(RepurposeJob.Stage.GENERATING, total=len(posts), variants=variants)
+
+        try:
+            from .services.ai_engine import get_ai_engine
+            from .services.pipeline import ensure_digest, generate_for_posts, generation_input
+
+            ai_engine = get_ai_engine()
+            ensure_digest(source, ai_engine)
+            content = generation_input(source)
+
+            # Posts edited after submission may use different brand voices
+            by_voice = {}
+            for post in posts:
+                by_voice.setdefault(post.brand_voice_id, []).append(post)
+
+            generated = {}
+            for group in by_voice.values():
+                for post, result in generate_for_posts(
+                    ai_engine,
+                    group,
+                    content=content,
+                    brand_voice=group[0].brand_voice,
+                    source_url=source.source_url,
+                    user_prompt=job.user_prompt or None,
+                    use_cache=False,
+                    variants=variants
+                ):
+                    generated[post.id] = result
+                    job.set_platform_status(post.platform, 'generated')
+        except RateLimitExceeded as e:
+            if self.request.retries >= self.max_retries:
+                logger.error(f"Giving up on regeneration job {job_id} after {self.request.retries} rate-limited retries")
+                job.error_message = str(e)
+                job.set_stage(RepurposeJob.Stage.FAILED, error=str(e))
+                raise
+            logger.warning(f"Regeneration job {job_id} rate limited, retrying in {e.retry_after}s")
+            job.set_stage(RepurposeJob.Stage.QUEUED, rate_limited=True, retry_after=e.retry_after)
+            raise self.retry(exc=e, countdown=e.retry_after)
+        except Exception as e:
+            logger.exception(f"Regeneration failed for job {job_id}")
+            job.error_message = str(e)
+            job.set_stage(RepurposeJob.Stage.FAILED, error=str(e))
+            raise
+
+        from .models import RepurposedPost
+        from .services.pipeline import apply_generated
+
+        job.set_stage(RepurposeJob.Stage.PERSISTING)
+        # Posts claimed for publishing while generating keep their content
+        locked = set(RepurposedPost.objects.filter(
+            id__in=[post.id for post in posts], status__in=RepurposedPost.LOCKED_STATUSES
+        ).values_list('id', flat=True))
+        regenerated = 0
+        for post in posts:
+            result = generated.get(post.id)
+            if post.id in locked:
+                job.set_platform_status(post.platform, 'skipped')
+            elif result and 'error' not in result:
+                apply_generated(post, result)
+                regenerated += 1
+                job.set_platform_status(post.platform, post.status)
+            else:
+                post.error_message = result['error'] if result else 'Regeneration produced no result.'
+                post.save(update_fields=['error_message', 'updated_at'])
+                job.set_platform_status(post.platform, 'failed')
+
+        if regenerated:
+            job.user.increment_usage()
+        job.set_stage(RepurposeJob.Stage.COMPLETED, regenerated=regenerated)
+
+
+@shared_task(bind=True, max_retries=5)
+def distill_brand_voice(self, brand_voice_id, schema_name=None):
+    """
+    Distills a brand voice's sample posts into BrandVoice.generated_prompt.
+    Skipped if the stored instruction already matches the current samples.
+    """
+    from .exceptions import RateLimitExceeded
+    from .models import BrandVoice
+    from .utils import text_sha256
+    from django_tenants.utils import schema_context
+
+    with schema_context(schema_name):
+        try:
+            brand_voice = BrandVoice.objects.get(id=brand_voice_id)
+        except BrandVoice.DoesNotExist:
+            logger.warning(f"BrandVoice {brand_voice_id} not found in schema {schema_name}")
+            return
+        if brand_voice.style_instruction or not brand_voice.sample_posts.strip():
+            return
+
+        from .services.ai_engine import get_ai_engine
+
+        samples_hash = text_sha256(brand_voice.sample_posts)
+        try:
+            instruction = get_ai_engine().distill_voice(
+                brand_voice.name, brand_voice.description, brand_voice.sample_posts
+            )
+        except RateLimitExceeded as e:
+            raise self.retry(exc=e, countdown=e.retry_after)
+        if not instruction:
+            return
+
+        # Samples may have been edited while the model was working
+        updated = BrandVoice.objects.filter(id=brand_voice_id, sample_posts=brand_voice.sample_posts).update(
+            generated_prompt=instruction,
+            samples_hash=samples_hash
+        )
+        if updated:
+            logger.info(f"Distilled brand voice {brand_voice_id} ({len(instruction)} chars)")
+
+
 def _calculate_next_run(scheduled):
     """Calculate the next run time for recurring posts."""
     from datetime import timedelta
@@ -1,3 +1,829 @@
-from django.test import TestCase
+import json
+import time
+from threading import Thread as threading_thread
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django_tenants.test.cases import TenantTestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+try:
+    import fakeredis
+except ImportError:  # Lua scripting needs fakeredis[lua]
+    fakeredis = None
+
+from .exceptions import RateLimitExceeded
+from .models import ContentSource, RepurposedPost, RepurposeJob
+from .serializers import BatchRepurposeRequestSerializer, RepurposeJobSerializer
+from .services.ai_engine import AIEngine
+from .services import cache, rate_limit
+from .services.article import make_soup, readability_text
+from .services.normalize import dedupe_captions, normalize_text, normalize_transcript
+from .services.pdf import PAGE_BREAK
+from .services.pipeline import apply_generated, dedup_keys, find_reusable_source
+
+
+@override_settings(AI_BACKEND='stub', AI_STUB_LATENCY=0, AI_STUB_LATENCY_JITTER=0, AI_RATE_LIMIT_ENABLED=False)
+class ApplyGeneratedTests(SimpleTestCase):
+    def _generate(self, generate_post, timeout=None):
+        engine = AIEngine()
+        with mock.patch.object(engine, 'generate_post', side_effect=generate_post):
+            return dict(engine.generate_posts(
+                'Source text about caching.', ['linkedin'], mode=AIEngine.MODE_PER_PLATFORM,
+                use_cache=False, timeout=timeout
+            ))
+
+    def _apply(self, result):
+        post = RepurposedPost(platform=RepurposedPost.Platform.LINKEDIN, status=RepurposedPost.Status.PENDING)
+        with mock.patch.object(RepurposedPost, 'save') as save:
+            applied = apply_generated(post, result)
+        save.assert_called_once()
+        return post, applied
+
+    def test_timed_out_platform_is_marked_failed(self):
+        def slow(**kwargs):
+            time.sleep(0.5)
+            return {'content': 'Too late', 'hook': 'Too late', 'hashtags': []}
+
+        results = self._generate(slow, timeout=0.05)
+        post, applied = self._apply(results['linkedin'])
+
+        self.assertFalse(applied)
+        self.assertEqual(post.status, RepurposedPost.Status.FAILED)
+        self.assertIn('Timed out', post.error_message)
+        self.assertEqual(post.generated_content, '')
+
+    def test_malformed_model_output_is_an_error_result(self):
+        engine = AIEngine()
+        for response in ('"just a string"', '["a", "list"]', '{"hook": "No content"}'):
+            with mock.patch.object(engine, '_call_model', return_value=response):
+                results = dict(engine.generate_posts(
+                    'Source text.', ['linkedin'], mode=AIEngine.MODE_PER_PLATFORM, use_cache=False
+                ))
+            self.assertEqual(results['linkedin']['error'], 'Model returned a malformed post')
+            self.assertTrue(results['linkedin']['fingerprint'])
+
+    def test_generated_post_is_ready(self):
+        results = self._generate(lambda **kwargs: {'content': 'Body', 'hook': 'Hook', 'hashtags': ['#a']})
+        post, applied = self._apply(results['linkedin'])
+
+        self.assertTrue(applied)
+        self.assertEqual(post.status, RepurposedPost.Status.READY)
+        self.assertEqual(post.generated_content, 'Body')
+        self.assertEqual(post.error_message, '')
+
+
+class ReadabilityTests(SimpleTestCase):
+    PARAGRAPH = "Small teams ship faster because every decision has fewer owners, fewer meetings and fewer handoffs."
+
+    def _text(self, body: str) -> str:
+        return readability_text(make_soup(f"<html><body>{body}</body></html>", 'html.parser'))
+
+    def test_lead_class_is_not_an_ad(self):
+        text = self._text(
+            '<article><p class="lead-in">The opening paragraph, with a lead-in class, sets up the whole story.</p>'
+            f'<p>{self.PARAGRAPH}</p><p class="read-more-hint">{self.PARAGRAPH} Again.</p></article>'
+        )
+        self.assertIn('The opening paragraph', text)
+        self.assertIn('Again.', text)
+
+    def test_ads_and_bylines_are_dropped(self):
+        text = self._text(
+            f'<article><p class="byline">By Sam Rivera, staff writer for the engineering section</p>'
+            f'<div class="top-ad-slot"><p>Buy the premium plan today and save forty percent on your subscription.</p></div>'
+            f'<div id="ad-banner"><p>Another advertisement that is long enough to look like a paragraph.</p></div>'
+            f'<p>{self.PARAGRAPH}</p></article>'
+        )
+        self.assertIn(self.PARAGRAPH, text)
+        self.assertNotIn('Sam Rivera', text)
+        self.assertNotIn('premium plan', text)
+        self.assertNotIn('advertisement', text)
+
+
+@override_settings(CACHE_STATS_FLUSH_EVERY=3, CACHE_STATS_FLUSH_INTERVAL=60, REDIS_FAILURE_BACKOFF=30)
+class LayeredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.client = mock.Mock()
+        self.client.get.return_value = None
+        patcher = mock.patch.object(cache, '_redis_client', self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, cache, '_redis_down_until', 0.0)
+
+    def test_hit_counters_are_flushed_in_batches(self):
+        layered = cache.LayeredCache('test', ttl=60)
+        layered.set('key', {'a': 1})
+        for _ in range(5):
+            layered.get('key')
+
+        self.client.hincrby.assert_not_called()
+        self.client.pipeline.assert_called_once()
+        self.client.pipeline.return_value.hincrby.assert_called_once_with('test:stats', 'hits', 3)
+
+    def test_redis_is_skipped_after_connection_error(self):
+        from redis.exceptions import ConnectionError
+
+        self.client.get.side_effect = ConnectionError('refused')
+        layered = cache.LayeredCache('test', ttl=60)
+        self.assertIsNone(layered.get('first'))
+        self.assertIsNone(layered.get('second'))
+
+        self.assertEqual(self.client.get.call_count, 1)
+        self.assertIsNone(cache.get_redis())
+
+
+class CaptionNormalizationTests(SimpleTestCase):
+    def test_rolling_captions_are_not_re_appended(self):
+        lines = [
+            'we went to the store and',
+            'the store and bought some',
+            'store and bought some milk',
+        ]
+        self.assertEqual(
+            ' '.join(dedupe_captions(lines)),
+            'we went to the store and bought some milk'
+        )
+
+    def test_extended_caption_keeps_trimmed_start(self):
+        lines = ['so we went to the', 'to the store', 'to the store and left']
+        self.assertEqual(' '.join(dedupe_captions(lines)), 'so we went to the store and left')
+
+    def test_one_word_rolling_overlap_is_trimmed(self):
+        lines = ['we talked about', 'about the new release']
+        self.assertEqual(' '.join(dedupe_captions(lines)), 'we talked about the new release')
+
+    def test_only_speech_stutters_are_collapsed(self):
+        text = normalize_transcript('I I think the the demo worked. It was so so good, she had had 10 10 tries that that day.')
+        self.assertEqual(text, 'I think the demo worked. It was so so good, she had had 10 10 tries that that day.')
+
+    def test_only_standalone_fillers_are_removed(self):
+        text = normalize_transcript('Um, the mm-wave radar uses an HMM model, uh, and a 35 mm lens. Hmm.')
+        self.assertEqual(text, 'the mm-wave radar uses an HMM model, and a 35 mm lens.')
+
+
+@override_settings(TEXT_NORMALIZATION_ENABLED=True)
+class PdfNormalizationTests(SimpleTestCase):
+    def _normalize(self, *pages):
+        return normalize_text(PAGE_BREAK.join(f"{page}\n" for page in pages), ContentSource.SourceType.PDF)
+
+    def test_page_numbers_at_page_boundaries_are_dropped(self):
+        text = self._normalize(
+            '1\nRevenue grew in every region this year.',
+            'Costs fell after the migration finished.\nPage 2 of 3',
+            '3\nHiring resumes next quarter.\n3',
+        )
+        self.assertEqual(
+            text.split(),
+            'Revenue grew in every region this year. Costs fell after the migration finished. '
+            'Hiring resumes next quarter.'.split()
+        )
+
+    def test_numbers_inside_pages_are_kept(self):
+        table = 'Year\n2021\n2022\n2023\nRevenue by year, in millions.'
+        text = self._normalize(f'Results\n{table}', f'Results\n{table}', f'Results\n{table}')
+        for year in ('2021', '2022', '2023'):
+            self.assertIn(year, text)
+        self.assertNotIn('Results', text)
+
+    def test_running_headers_and_hyphenation(self):
+        text = self._normalize(
+            'ACME Annual Report\nThe platform team re-\nbuilt the deploy pipeline.',
+            'ACME Annual Report\nReleases now ship daily.',
+            'ACME Annual Report\nIncidents fell by half.',
+        )
+        self.assertNotIn('ACME', text)
+        self.assertIn('rebuilt the deploy pipeline.', text)
+
+
+@override_settings(REPURPOSE_UPLOAD_MAX_BYTES=1024, REPURPOSE_BATCH_MAX_SOURCES=20)
+class BatchUploadValidationTests(SimpleTestCase):
+    def _errors(self, *files):
+        serializer = BatchRepurposeRequestSerializer(data={'source_files': list(files), 'platforms': ['linkedin']})
+        self.assertFalse(serializer.is_valid())
+        return str(serializer.errors['source_files'])
+
+    def test_unsupported_file_type_is_rejected(self):
+        errors = self._errors(SimpleUploadedFile('notes.txt', b'text'), SimpleUploadedFile('setup.exe', b'MZ'))
+        self.assertIn('Unsupported file type: setup.exe', errors)
+
+    def test_oversized_file_is_rejected(self):
+        errors = self._errors(SimpleUploadedFile('report.pdf', b'%PDF' + b'0' * 2048))
+        self.assertIn('report.pdf is larger than', errors)
+
+    def test_supported_files_are_accepted(self):
+        serializer = BatchRepurposeRequestSerializer(data={
+            'source_files': [SimpleUploadedFile('report.pdf', b'%PDF-1.4'), SimpleUploadedFile('notes.TXT', b'text')],
+            'platforms': ['linkedin']
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+
+@override_settings(SUBSCRIPTION_LIMITS={'free': {'repurposes_per_month': 2}, 'pro': {'repurposes_per_month': 50}})
+class RepurposeBatchViewTests(TenantTestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='writer', password='secret', subscription_tier='free')
+
+    def _submit(self, sources, **data):
+        from .views import RepurposeBatchView
+
+        request = APIRequestFactory().post('/api/repurposer/repurpose/batch/', {
+            'sources': sources, 'platforms': ['linkedin', 'twitter'], **data
+        }, format='json')
+        request.tenant = self.tenant
+        force_authenticate(request, user=self.user)
+        with mock.patch('apps.repurposer.tasks.start_repurpose_batch') as start:
+            response = RepurposeBatchView.as_view()(request)
+        return response, start
+
+    def test_quota_counts_sources_after_duplicates_collapse(self):
+        self.user.repurposes_used_this_month = 1
+        self.user.save(update_fields=['repurposes_used_this_month'])
+        sources = [{'raw_text': 'Same text.'}, {'raw_text': 'Same text.'}]
+
+        response, start = self._submit(sources, reuse_source=True)
+        self.assertEqual(response.status_code, 202, response.data)
+        self.assertEqual(len(response.data['jobs']), 1)
+
+        response, start = self._submit([{'raw_text': 'One.'}, {'raw_text': 'Two.'}], reuse_source=True)
+        self.assertEqual(response.status_code, 403)
+        start.assert_not_called()
+
+    def test_response_lists_each_jobs_posts_in_one_query(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self.user.subscription_tier = 'pro'
+        self.user.save(update_fields=['subscription_tier'])
+        with CaptureQueriesContext(connection) as queries:
+            response, start = self._submit([{'raw_text': 'One.'}, {'raw_text': 'Two.'}, {'raw_text': 'Three.'}])
+
+        self.assertEqual(response.status_code, 202, response.data)
+        jobs = response.data['jobs']
+        self.assertEqual([job['source_id'] for job in jobs], sorted({job['source_id'] for job in jobs}))
+        for job in jobs:
+            self.assertFalse(job['reused_source'])
+            self.assertCountEqual([post['platform'] for post in job['posts']], ['linkedin', 'twitter'])
+            self.assertEqual({post['status'] for post in job['posts']}, {RepurposedPost.Status.PENDING})
+        post_selects = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'repurposer_repurposedpost' in query['sql'].split('FROM', 1)[1][:60]
+        ]
+        self.assertEqual(len(post_selects), 1)
+
+
+@override_settings(AI_BACKEND='stub', AI_STUB_LATENCY=0, AI_STUB_LATENCY_JITTER=0, AI_RATE_LIMIT_ENABLED=False,
+                   AI_GENERATION_CACHE_ENABLED=False)
+class RegeneratePostsTests(TenantTestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='writer', password='secret')
+        self.source = ContentSource.objects.create(
+            user=self.user, source_type=ContentSource.SourceType.TEXT,
+            raw_text='Small teams ship faster.', is_processed=True
+        )
+
+    def _post(self, platform, **kwargs):
+        return RepurposedPost.objects.create(
+            source=self.source, platform=platform, generated_content='Old', status=RepurposedPost.Status.READY,
+            **kwargs
+        )
+
+    def test_posts_on_the_same_platform_are_each_regenerated(self):
+        from .tasks import run_regenerate_posts
+
+        posts = [self._post('linkedin'), self._post('linkedin'), self._post('twitter')]
+        job = RepurposeJob.objects.create(user=self.user, source=self.source, kind=RepurposeJob.Kind.REGENERATE)
+        calls = []
+
+        def generate_post(**kwargs):
+            calls.append(kwargs['platform'])
+            return {'content': f"New {len(calls)}", 'hook': 'Hook', 'hashtags': []}
+
+        with mock.patch.object(AIEngine, 'generate_post', side_effect=generate_post):
+            run_regenerate_posts.apply(args=(job.id, [post.id for post in posts]), kwargs={'schema_name': 'test'})
+
+        self.assertCountEqual(calls, ['linkedin', 'linkedin', 'twitter'])
+        contents = set()
+        for post in posts:
+            post.refresh_from_db()
+            self.assertEqual(post.status, RepurposedPost.Status.READY)
+            self.assertEqual(post.error_message, '')
+            contents.add(post.generated_content)
+        self.assertEqual(len(contents), 3)
+        job.refresh_from_db()
+        self.assertEqual(job.progress[RepurposeJob.Stage.COMPLETED]['regenerated'], 3)
+
+
+class SourceReuseTests(TenantTestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='writer', password='secret')
+
+    def _source(self, user=None, **kwargs):
+        fields = {'source_type': ContentSource.SourceType.BLOG, 'raw_text': 'Extracted text.', 'is_processed': True}
+        fields.update(kwargs)
+        return ContentSource.objects.create(user=user or self.user, **fields)
+
+    def _submit(self, **data):
+        from .views import RepurposeView
+
+        request = APIRequestFactory().post('/api/repurposer/repurpose/', {
+            'source_url': 'https://www.example.com/post/?utm_source=feed',
+            'platforms': ['linkedin'], 'run_async': True, 'reuse_source': True, **data
+        }, format='json')
+        request.tenant = self.tenant
+        force_authenticate(request, user=self.user)
+        with mock.patch('apps.repurposer.tasks.start_repurpose_job') as start:
+            response = RepurposeView.as_view()(request)
+        return response, start
+
+    def test_dedup_keys(self):
+        self.assertEqual(
+            dedup_keys('https://WWW.Example.com/post/?utm_source=feed&b=2&a=1#top'),
+            {'normalized_url': 'https://example.com/post?a=1&b=2', 'content_hash': ''}
+        )
+        text_keys = dedup_keys(raw_text='Same text')
+        self.assertEqual(text_keys['normalized_url'], '')
+        self.assertEqual(text_keys, dedup_keys(raw_text='Same text'))
+        self.assertNotEqual(text_keys, dedup_keys(raw_text='Other text'))
+        upload = SimpleUploadedFile('notes.txt', b'Same text')
+        self.assertEqual(dedup_keys(source_file=upload, raw_text='ignored'), text_keys)
+        self.assertEqual(upload.tell(), 0)
+        self.assertEqual(dedup_keys(), {'normalized_url': '', 'content_hash': ''})
+
+    def test_find_reusable_source(self):
+        url = 'https://example.com/post'
+        other_user = get_user_model().objects.create_user(username='other', password='secret')
+        self._source(normalized_url=url)
+        latest = self._source(normalized_url=url)
+        self._source(normalized_url=url, is_processed=False)
+        self._source(normalized_url=url, raw_text='')
+        self._source(user=other_user, normalized_url=url)
+
+        self.assertEqual(find_reusable_source(self.user, normalized_url=url), latest)
+        self.assertIsNone(find_reusable_source(other_user, normalized_url='https://example.com/other'))
+        self.assertIsNone(find_reusable_source(self.user))
+
+    def test_reused_source_job_owns_only_its_posts(self):
+        source = self._source(normalized_url='https://example.com/post')
+        earlier = RepurposedPost.objects.create(source=source, platform='linkedin', status=RepurposedPost.Status.PENDING)
+
+        response, start = self._submit()
+
+        self.assertEqual(response.status_code, 202)
+        start.assert_called_once()
+        job = start.call_args.args[0]
+        self.assertEqual(job.source, source)
+        self.assertTrue(job.progress['reused_source'])
+        self.assertEqual(ContentSource.objects.count(), 1)
+        own = list(job.get_posts())
+        self.assertEqual(len(own), 1)
+        self.assertNotEqual(own[0], earlier)
+        self.assertEqual([post['id'] for post in response.data['job']['posts']], [own[0].id])
+
+    def test_job_serializer_lists_only_its_posts(self):
+        source = self._source()
+        mine = RepurposedPost.objects.create(source=source, platform='linkedin')
+        RepurposedPost.objects.create(source=source, platform='linkedin')
+        job = RepurposeJob.objects.create(user=self.user, source=source, progress={'post_ids': [mine.id]})
+        old_job = RepurposeJob.objects.create(user=self.user, source=source)
+
+        self.assertEqual([post['id'] for post in RepurposeJobSerializer(job).data['posts']], [mine.id])
+        self.assertEqual(len(RepurposeJobSerializer(old_job).data['posts']), 2)
+
+    @override_settings(PUBLISH_STALE_AFTER=60)
+    def test_claim_refuses_a_publish_in_flight(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .services.publishing import claim
+
+        post = RepurposedPost.objects.create(source=self._source(), platform='linkedin', status=RepurposedPost.Status.READY)
+        self.assertTrue(claim(post))
+        self.assertEqual(post.status, RepurposedPost.Status.PUBLISHING)
+        self.assertFalse(claim(RepurposedPost.objects.get(pk=post.pk)))
+
+        # A claim left behind by a lost worker can be taken over
+        RepurposedPost.objects.filter(pk=post.pk).update(updated_at=timezone.now() - timedelta(seconds=120))
+        self.assertTrue(claim(RepurposedPost.objects.get(pk=post.pk)))
+
+
+class InlineThread:
+    """Runs a thread's target on start(), so it shares the test's database transaction."""
+
+    def __init__(self, target, args=(), **kwargs):
+        self.target = target
+        self.args = args
+
+    def start(self):
+        self.target(*self.args)
+
+
+def stream_thread(*args, **kwargs):
+    """threading.Thread, except the stream view's pipeline thread runs inline."""
+    if kwargs.get('name', '').startswith('repurpose-stream'):
+        return InlineThread(**kwargs)
+    return threading_thread(*args, **kwargs)
+
+
+@override_settings(AI_BACKEND='stub', AI_STUB_LATENCY=0, AI_STUB_LATENCY_JITTER=0, AI_STUB_ERROR_RATE=0,
+                   AI_RATE_LIMIT_ENABLED=False, AI_GENERATION_CACHE_ENABLED=False, TEXT_NORMALIZATION_ENABLED=True)
+class RepurposeStreamTests(TenantTestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='writer', password='secret')
+
+    def _stream(self, **data):
+        from .views import RepurposeStreamView
+
+        request = APIRequestFactory().post('/api/repurposer/repurpose/stream/', {
+            'raw_text': 'Small teams ship faster. Every decision has fewer owners.', **data
+        }, format='json')
+        request.tenant = self.tenant
+        force_authenticate(request, user=self.user)
+        with mock.patch('threading.Thread', stream_thread), \
+                mock.patch('django.db.connection.close'):
+            response = RepurposeStreamView.as_view()(request)
+            body = b''.join(response.streaming_content).decode()
+        events = []
+        for frame in body.strip().split('\n\n'):
+            event, data = frame.split('\n')
+            events.append((event.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+        return response, events
+
+    def test_streams_extraction_posts_and_done(self):
+        response, events = self._stream(platforms=['linkedin', 'twitter'], stream_tokens=True)
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        names = [event for event, _ in events]
+        self.assertEqual(names[0], 'extraction')
+        self.assertEqual(names[-1], 'done')
+        self.assertIn('delta', names)
+        posts = [payload for event, payload in events if event == 'post']
+        self.assertCountEqual([post['platform'] for post in posts], ['linkedin', 'twitter'])
+        for post in posts:
+            self.assertEqual(post['status'], RepurposedPost.Status.READY)
+            self.assertTrue(post['generated_content'])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.repurposes_used_this_month, 1)
+
+    def test_invalid_request_is_not_streamed(self):
+        from .views import RepurposeStreamView
+
+        request = APIRequestFactory().post('/api/repurposer/repurpose/stream/', {'platforms': ['linkedin']}, format='json')
+        request.tenant = self.tenant
+        force_authenticate(request, user=self.user)
+        response = RepurposeStreamView.as_view()(request)
+        self.assertEqual(response.status_code, 400)
+
+
+class FakeClock:
+    """Stands in for the time module in rate_limit: sleeping advances the clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    monotonic = time
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@override_settings(AI_RATE_LIMIT_RPM=6, AI_RATE_LIMIT_TPM=0, AI_RATE_LIMIT_TENANT_RPM=0,
+                   AI_RATE_LIMIT_TENANT_TPM=0, AI_RATE_LIMIT_MAX_WAIT=0, REDIS_FAILURE_BACKOFF=30)
+class TokenBucketLimiterTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        for patcher in (mock.patch.object(rate_limit, 'time', self.clock),
+                        mock.patch.object(cache, '_redis_client', fakeredis.FakeRedis() if fakeredis else None)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, cache, '_redis_down_until', 0.0)
+        self.limiter = rate_limit.TokenBucketLimiter('key')
+
+    def _available(self, tenant=None):
+        return {
+            (entry['tenant'], entry['bucket']): entry['available'] for entry in self.limiter.state(tenant)
+        }
+
+    @skipUnless(fakeredis, "fakeredis[lua] is not installed")
+    def test_requests_bucket_empties_and_refills(self):
+        for _ in range(6):
+            self.assertEqual(self.limiter.try_acquire(100), 0)
+        # 6 per minute: one request refills every 10s
+        self.assertAlmostEqual(self.limiter.try_acquire(100), 10)
+        self.clock.now += 10
+        self.assertEqual(self.limiter.try_acquire(100), 0)
+
+    @skipUnless(fakeredis, "fakeredis[lua] is not installed")
+    @override_settings(AI_RATE_LIMIT_RPM=0, AI_RATE_LIMIT_TPM=1200)
+    def test_tokens_bucket_charges_the_call_size(self):
+        self.assertEqual(self.limiter.try_acquire(1000), 0)
+        # 200 left, 20 tokens per second
+        self.assertAlmostEqual(self.limiter.try_acquire(600), 20)
+        self.assertEqual(self._available()[(None, 'tpm')], 200)
+
+    @skipUnless(fakeredis, "fakeredis[lua] is not installed")
+    @override_settings(AI_RATE_LIMIT_TENANT_RPM=1)
+    def test_tenant_bucket_is_checked_with_the_global_one(self):
+        self.assertEqual(self.limiter.try_acquire(100, tenant='acme'), 0)
+        self.assertGreater(self.limiter.try_acquire(100, tenant='acme'), 0)
+        # The refused call charged nothing, and other tenants are unaffected
+        self.assertEqual(self._available()[(None, 'rpm')], 5)
+        self.assertEqual(self.limiter.try_acquire(100, tenant='globex'), 0)
+        self.assertEqual(self._available('acme')[('acme', 'rpm')], 0)
+
+    @skipUnless(fakeredis, "fakeredis[lua] is not installed")
+    def test_acquire_waits_up_to_max_wait(self):
+        for _ in range(6):
+            self.limiter.acquire(100)
+        self.limiter.acquire(100, max_wait=15)
+        self.assertEqual(self.clock.slept, [10])
+
+        with self.assertRaises(RateLimitExceeded) as raised:
+            self.limiter.acquire(100, max_wait=5)
+        self.assertEqual(raised.exception.retry_after, 10)
+
+    def test_acquire_raises_with_retry_after(self):
+        with mock.patch.object(self.limiter, 'try_acquire', return_value=42.3):
+            with self.assertRaises(RateLimitExceeded) as raised:
+                self.limiter.acquire(100, max_wait=5)
+        self.assertEqual(raised.exception.retry_after, 43)
+        self.assertEqual(self.clock.slept, [])
+
+    def test_redis_errors_fail_open(self):
+        from redis.exceptions import ConnectionError
+
+        client = mock.Mock()
+        client.register_script.return_value = mock.Mock(side_effect=ConnectionError('refused'))
+        with mock.patch.object(cache, '_redis_client', client):
+            self.assertEqual(self.limiter.try_acquire(100), 0)
+            self.limiter.acquire(100)
+        # Backing off: the second call did not touch Redis
+        self.assertEqual(client.register_script.return_value.call_count, 1)
+
+    def test_no_redis_allows_calls(self):
+        with mock.patch.object(rate_limit, 'get_redis', return_value=None):
+            self.assertEqual(self.limiter.try_acquire(100), 0)
+            self.assertEqual(self.limiter.state(), [])
+
+
+@override_settings(AI_BACKEND='stub', AI_STUB_LATENCY=0, AI_STUB_LATENCY_JITTER=0, AI_STUB_RATE_LIMIT_RATE=1,
+                   AI_RATE_LIMIT_RETRY_AFTER=30, AI_RATE_LIMIT_ENABLED=False, AI_GENERATION_CACHE_ENABLED=False)
+class RateLimitedGenerationTests(TenantTestCase):
+    def setUp(self):
+        from .services import ai_engine, llm
+
+        # Shared engines and backends read the stub settings when built, so keep these ones private
+        for registry in (ai_engine._engines, llm._backends):
+            patcher = mock.patch.dict(registry, clear=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = get_user_model().objects.create_user(username='writer', password='secret')
+        self.source = ContentSource.objects.create(
+            user=self.user, source_type=ContentSource.SourceType.TEXT, raw_text='Small teams ship faster.'
+        )
+        self.post = RepurposedPost.objects.create(source=self.source, platform='linkedin')
+        self.job = RepurposeJob.objects.create(user=self.user, source=self.source, progress={'post_ids': [self.post.id]})
+
+    def test_stub_429_raises_rate_limit_exceeded(self):
+        with self.assertRaises(RateLimitExceeded) as raised:
+            list(AIEngine().generate_posts('Source text.', ['linkedin', 'twitter'], mode=AIEngine.MODE_PER_PLATFORM))
+        self.assertEqual(raised.exception.retry_after, 30)
+
+    def test_generate_stage_is_retried_after_the_hint(self):
+        from celery.exceptions import Retry
+        from .tasks import run_repurpose_generate
+
+        with mock.patch.object(run_repurpose_generate, 'retry', side_effect=Retry()) as retry:
+            run_repurpose_generate.apply(args=(self.job.id,), kwargs={'schema_name': 'test'})
+
+        self.assertEqual(retry.call_args.kwargs['countdown'], 30)
+        self.job.refresh_from_db()
+        self.post.refresh_from_db()
+        self.assertEqual(self.job.stage, RepurposeJob.Stage.QUEUED)
+        self.assertTrue(self.job.progress[RepurposeJob.Stage.QUEUED]['rate_limited'])
+        self.assertEqual(self.post.status, RepurposedPost.Status.PENDING)
+
+    def test_generate_stage_gives_up_after_max_retries(self):
+        from .tasks import run_repurpose_generate
+
+        result = run_repurpose_generate.apply(
+            args=(self.job.id,), kwargs={'schema_name': 'test'}, retries=run_repurpose_generate.max_retries
+        )
+
+        self.assertTrue(result.failed())
+        self.job.refresh_from_db()
+        self.post.refresh_from_db()
+        self.assertEqual(self.job.stage, RepurposeJob.Stage.FAILED)
+        self.assertEqual(self.post.status, RepurposedPost.Status.FAILED)
+
+
+class InlineExecutor:
+    """ThreadPoolExecutor stand-in that runs each call on submit(), inside the test's transaction."""
+
+    def __init__(self, max_workers=None, thread_name_prefix=''):
+        self.max_workers = max_workers
+
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class PublishingTests(TenantTestCase):
+    def setUp(self):
+        from apps.social_accounts.models import SocialAccount
+
+        self.user = get_user_model().objects.create_user(username='writer', password='secret')
+        self.source = ContentSource.objects.create(
+            user=self.user, source_type=ContentSource.SourceType.TEXT, raw_text='Small teams ship faster.'
+        )
+        self.posts = [
+            RepurposedPost.objects.create(
+                source=self.source, platform=platform, generated_content=f'Post for {platform}',
+                status=RepurposedPost.Status.READY
+            )
+            for platform in ('linkedin', 'linkedin', 'twitter')
+        ]
+        self.accounts = {
+            platform: SocialAccount.objects.create(
+                user=self.user, platform=platform, platform_user_id=f'{platform}-1', access_token='token'
+            )
+            for platform in ('linkedin', 'twitter')
+        }
+
+    def _publish_source(self, **data):
+        from .views import ContentSourceViewSet
+
+        request = APIRequestFactory().post(f'/api/repurposer/sources/{self.source.id}/publish/', data, format='json')
+        request.tenant = self.tenant
+        force_authenticate(request, user=self.user)
+        with mock.patch('apps.repurposer.tasks.start_source_publish') as start:
+            response = ContentSourceViewSet.as_view({'post': 'publish'})(request, pk=self.source.id)
+        return response, start
+
+    def _run_source_task(self, send):
+        from .tasks import publish_source
+
+        pairs = [[post.id, self.accounts[post.platform].id] for post in self.posts]
+        with mock.patch('apps.repurposer.services.publishing.ThreadPoolExecutor', InlineExecutor), \
+                mock.patch('apps.repurposer.services.publishing.send', side_effect=send), \
+                mock.patch('django.db.connection.close'), \
+                mock.patch('apps.repurposer.tasks.start_publish') as start_publish:
+            summary = publish_source.apply(args=(pairs,), kwargs={'schema_name': 'test'}).get()
+        return summary, start_publish
+
+    def _statuses(self):
+        return [RepurposedPost.objects.get(pk=post.pk).status for post in self.posts]
+
+    def test_source_publish_claims_posts_and_refuses_a_second_publish(self):
+        response, start = self._publish_source()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertCountEqual(response.data['platforms']['linkedin']['queued'], [self.posts[0].id, self.posts[1].id])
+        self.assertEqual(len(start.call_args.args[0]), 3)
+        self.assertEqual(self._statuses(), [RepurposedPost.Status.PUBLISHING] * 3)
+
+        response, start = self._publish_source(post_ids=[self.posts[0].id])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data['platforms']['linkedin']['skipped'],
+            [{'post_id': self.posts[0].id, 'error': 'This post is already being published.'}]
+        )
+        start.assert_not_called()
+
+    def test_post_publish_is_refused_while_publishing(self):
+        from .views import RepurposedPostViewSet
+
+        post = self.posts[0]
+        RepurposedPost.objects.filter(pk=post.pk).update(status=RepurposedPost.Status.PUBLISHING)
+        request = APIRequestFactory().post(f'/api/repurposer/posts/{post.id}/publish/', {}, format='json')
+        request.tenant = self.tenant
+        force_authenticate(request, user=self.user)
+        with mock.patch('apps.repurposer.tasks.start_publish') as start:
+            response = RepurposedPostViewSet.as_view({'post': 'publish'})(request, pk=post.id)
+
+        self.assertEqual(response.status_code, 409)
+        start.assert_not_called()
+
+    @override_settings(PUBLISH_LANE_CONCURRENCY={'linkedin': 1}, PUBLISH_LANE_DEFAULT_CONCURRENCY=3)
+    def test_lanes_run_in_parallel_within_their_limits(self):
+        import threading
+        from .services import publishing
+
+        running = {'linkedin': 0, 'twitter': 0}
+        peak = dict(running)
+        lock = threading.Lock()
+        both_lanes = threading.Barrier(2, timeout=5)
+
+        def fake_publish(post, account, can_retry=False):
+            with lock:
+                running[post.platform] += 1
+                peak[post.platform] = max(peak[post.platform], running[post.platform])
+            if post == self.posts[0] or post.platform == 'twitter':
+                # The first linkedin post and the twitter post must be in flight together
+                both_lanes.wait()
+            time.sleep(0.05)
+            with lock:
+                running[post.platform] -= 1
+            return {'success': True, 'url': f'https://example.com/{post.id}'}
+
+        self.assertEqual(publishing.lane_limit('linkedin'), 1)
+        self.assertEqual(publishing.lane_limit('twitter'), 3)
+        targets = [(post, self.accounts[post.platform]) for post in self.posts]
+        with mock.patch.object(publishing, 'publish', side_effect=fake_publish):
+            summary = publishing.publish_in_lanes(targets, 'test')
+
+        self.assertEqual(peak, {'linkedin': 1, 'twitter': 1})
+        self.assertEqual(summary['linkedin']['published'], 2)
+        self.assertEqual(summary['twitter']['published'], 1)
+        self.assertCountEqual([entry['post_id'] for entry in summary['linkedin']['posts']], [self.posts[0].id, self.posts[1].id])
+
+    def test_partial_failure_leaves_other_posts_published(self):
+        RepurposedPost.objects.filter(source=self.source).update(status=RepurposedPost.Status.PUBLISHING)
+
+        def send(post, account, video_title=None):
+            if post.platform == 'twitter':
+                return {'success': False, 'error': 'Duplicate tweet'}
+            return {'success': True, 'id': f'urn:{post.id}', 'url': f'https://example.com/{post.id}'}
+
+        summary, start_publish = self._run_source_task(send)
+
+        self.assertEqual(summary['linkedin']['published'], 2)
+        self.assertEqual(summary['twitter']['failed'], 1)
+        self.assertEqual(self._statuses(), [
+            RepurposedPost.Status.PUBLISHED, RepurposedPost.Status.PUBLISHED, RepurposedPost.Status.FAILED
+        ])
+        self.assertEqual(RepurposedPost.objects.get(pk=self.posts[2].pk).error_message, 'Duplicate tweet')
+        start_publish.assert_not_called()
+
+    @override_settings(PUBLISH_RETRY_DELAY=7)
+    def test_resumable_failure_continues_in_publish_post(self):
+        from apps.social_accounts.models import PostingLog
+        from .tasks import publish_post
+
+        RepurposedPost.objects.filter(source=self.source).update(status=RepurposedPost.Status.PUBLISHING)
+        interrupted = self.posts[1]
+
+        def send(post, account, video_title=None):
+            if post == interrupted:
+                return {'success': False, 'resumable': True, 'error': 'Upload interrupted'}
+            return {'success': True, 'id': f'urn:{post.id}'}
+
+        summary, start_publish = self._run_source_task(send)
+
+        self.assertEqual(summary['linkedin']['resumable'], 1)
+        self.assertEqual(self._statuses(), [
+            RepurposedPost.Status.PUBLISHING if post == interrupted else RepurposedPost.Status.PUBLISHED
+            for post in self.posts
+        ])
+        post, account, schema_name = start_publish.call_args.args
+        self.assertEqual((post, account, schema_name), (interrupted, self.accounts['linkedin'], 'test'))
+        self.assertEqual(start_publish.call_args.kwargs['countdown'], 7)
+
+        # The single-post task retries until the upload completes
+        results = [
+            {'success': False, 'resumable': True, 'error': 'Upload interrupted'},
+            {'success': True, 'id': 'urn:done', 'url': 'https://example.com/done'},
+        ]
+        with mock.patch('apps.repurposer.services.publishing.send', side_effect=results):
+            result = publish_post.apply(
+                args=(interrupted.id, self.accounts['linkedin'].id), kwargs={'schema_name': 'test'}
+            ).get()
+
+        self.assertEqual(result, {'success': True, 'error': '', 'url': 'https://example.com/done'})
+        interrupted.refresh_from_db()
+        self.assertEqual(interrupted.status, RepurposedPost.Status.PUBLISHED)
+        self.assertEqual(interrupted.platform_post_id, 'urn:done')
+        self.assertEqual(
+            list(PostingLog.objects.filter(repurposed_post=interrupted).order_by('id').values_list('status', flat=True)),
+            [PostingLog.Status.FAILED, PostingLog.Status.FAILED, PostingLog.Status.SUCCESS]
+        )
+
+    def test_resumable_failure_is_final_after_the_last_retry(self):
+        from .tasks import publish_post
+
+        post = self.posts[0]
+        RepurposedPost.objects.filter(pk=post.pk).update(status=RepurposedPost.Status.PUBLISHING)
+        with mock.patch('apps.repurposer.services.publishing.send',
+                        return_value={'success': False, 'resumable': True, 'error': 'Upload interrupted'}):
+            result = publish_post.apply(
+                args=(post.id, self.accounts['linkedin'].id), kwargs={'schema_name': 'test'},
+                retries=publish_post.max_retries
+            ).get()
+
+        self.assertFalse(result['success'])
+        post.refresh_from_db()
+        self.assertEqual(post.status, RepurposedPost.Status.FAILED)
@@ -12,8 +12,12 @@ router.register(r'brand-voices', views.BrandVoiceViewSet, basename='brand-voice'
 router.register(r'sources', views.ContentSourceViewSet, basename='source')
 router.register(r'posts', views.RepurposedPostViewSet, basename='post')
 router.register(r'scheduled-posts', views.ScheduledPostViewSet, basename='scheduled-post')
+router.register(r'jobs', views.RepurposeJobViewSet, basename='job')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('repurpose/', views.RepurposeView.as_view(), name='repurpose'),
+    path('repurpose/stream/', views.RepurposeStreamView.as_view(), name='repurpose-stream'),
+    path('repurpose/batch/', views.RepurposeBatchView.as_view(), name='repurpose-batch'),
+    path('ai/rate-limit/', views.AIRateLimitView.as_view(), name='ai-rate-limit'),
 ]
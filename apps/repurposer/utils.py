@@ -0,0 +1,104 @@
+"""
+Small helpers shared by models, services and tasks of the repurposer app.
+"""
+import hashlib
+import re
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+# Query parameters that never change the page content
+TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'igshid', 'ref', 'ref_src', 'source'}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for cache keys and de-duplication:
+    lowercase scheme/host, no 'www.', no fragment, no tracking params,
+    sorted query string and no trailing slash.
+    """
+    if not url:
+        return ''
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parsed.port and parsed.port not in (80, 443):
+        host = f"{host}:{parsed.port}"
+
+    query = [
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    ]
+    path = parsed.path.rstrip('/') or '/'
+    return urlunparse(((parsed.scheme or 'https').lower(), host, path, '', urlencode(sorted(query)), ''))
+
+
+def file_sha256(file_obj, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file-like object, read in chunks. Leaves the pointer at the start."""
+    digest = hashlib.sha256()
+    if hasattr(file_obj, 'seek'):
+        file_obj.seek(0)
+    for chunk in iter(lambda: file_obj.read(chunk_size), b''):
+        digest.update(chunk)
+    if hasattr(file_obj, 'seek'):
+        file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def text_sha256(text: str) -> str:
+    """SHA-256 of a string."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _hard_split(text: str, max_chars: int) -> list[str]:
+    """Split text with no usable punctuation at the last whitespace before max_chars."""
+    pieces = []
+    while len(text) > max_chars:
+        cut = text.rfind(' ', 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(text[:cut].strip())
+        text = text[cut:].strip()
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def _split_sentences(paragraph: str, max_chars: int) -> list[str]:
+    """Split an oversized paragraph into sentence groups no longer than max_chars."""
+    groups, current = [], ''
+    for sentence in re.split(r'(?<=[.!?])\s+', paragraph):
+        if len(sentence) > max_chars:
+            if current:
+                groups.append(current)
+                current = ''
+            groups.extend(_hard_split(sentence, max_chars))
+        elif current and len(current) + len(sentence) + 1 > max_chars:
+            groups.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        groups.append(current)
+    return groups
+
+
+def chunk_text(text: str, max_chars: int) -> list[str]:
+    """
+    Split text into chunks of at most max_chars, breaking on paragraph
+    boundaries first, then sentences, then whitespace.
+    """
+    chunks, current, size = [], [], 0
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        pieces = [paragraph] if len(paragraph) <= max_chars else _split_sentences(paragraph, max_chars)
+        for piece in pieces:
+            if current and size + len(piece) + 2 > max_chars:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
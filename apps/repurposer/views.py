@@ -1,22 +1,73 @@
 """
 API Views for Content Repurposer app.
 """
+import json
+import logging
+import queue
+import threading
+import uuid
+
+from django.http import StreamingHttpResponse
 from rest_framework import generics, status, permissions, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 
-from .models import BrandVoice, ContentSource, RepurposedPost
+from .exceptions import RateLimitExceeded
+from .models import BrandVoice, ContentSource, RepurposedPost, RepurposeJob
 from .serializers import (
     BrandVoiceSerializer,
     ContentSourceSerializer,
     ContentSourceListSerializer,
     RepurposedPostSerializer,
     RepurposeRequestSerializer,
+    RepurposeJobSerializer,
+    BatchRepurposeRequestSerializer,
+    RegenerateRequestSerializer,
+    SourcePublishRequestSerializer,
     PublishPostSerializer
 )
 
+logger = logging.getLogger(__name__)
+
+
+def _queue_regeneration(request, source, posts, data):
+    """Validates and enqueues a background regeneration of some posts of one source."""
+    from .tasks import start_regeneration
+
+    if not request.user.can_repurpose():
+        return Response(
+            {'error': 'You have reached your monthly repurpose limit.'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    if not source.raw_text:
+        return Response(
+            {'error': 'This source has no extracted text to regenerate from. Repurpose it again.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    # A post being published keeps its content until the publish finishes
+    published = [post.id for post in posts if post.status in RepurposedPost.LOCKED_STATUSES]
+    if published:
+        return Response(
+            {'error': 'Published posts and posts being published cannot be regenerated.', 'post_ids': published},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    job = RepurposeJob.objects.create(
+        user=request.user,
+        source=source,
+        kind=RepurposeJob.Kind.REGENERATE,
+        user_prompt=data.get('user_prompt', ''),
+        progress={'post_ids': [post.id for post in posts]}
+    )
+    start_regeneration(job, [post.id for post in posts], request.tenant.schema_name, variants=data['variants'])
+
+    return Response({
+        'message': 'Regeneration queued.',
+        'job': RepurposeJobSerializer(job).data
+    }, status=status.HTTP_202_ACCEPTED)
+
 
 class BrandVoiceViewSet(viewsets.ModelViewSet):
     """CRUD operations for Brand Voices."""
@@ -26,6 +77,25 @@ class BrandVoiceViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return BrandVoice.objects.filter(user=self.request.user)
 
+    def perform_create(self, serializer):
+        self._queue_distillation(serializer.save())
+
+    def perform_update(self, serializer):
+        brand_voice = serializer.save()
+        # style_instruction is empty once the samples no longer match the distilled ones
+        if not brand_voice.style_instruction:
+            self._queue_distillation(brand_voice)
+
+    def _queue_distillation(self, brand_voice):
+        """Distill the sample posts in the background once the save is committed."""
+        from django.db import transaction
+        from .tasks import distill_brand_voice
+
+        if not brand_voice.sample_posts.strip():
+            return
+        schema_name = self.request.tenant.schema_name
+        transaction.on_commit(lambda: distill_brand_voice.delay(brand_voice.id, schema_name=schema_name))
+
 
 class ContentSourceViewSet(viewsets.ModelViewSet):
     """CRUD operations for Content Sources."""
@@ -39,6 +109,120 @@ class ContentSourceViewSet(viewsets.ModelViewSet):
             return ContentSourceListSerializer
         return ContentSourceSerializer
 
+    @action(detail=True, methods=['post'])
+    def regenerate(self, request, pk=None):
+        """Regenerate all or some of this source's posts in one background job."""
+        source = self.get_object()
+        serializer = RegenerateRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        posts = source.repurposed_posts.all()
+        if data.get('post_ids'):
+            posts = posts.filter(id__in=data['post_ids'])
+            missing = set(data['post_ids']) - {post.id for post in posts}
+            if missing:
+                return Response(
+                    {'error': 'Some posts do not belong to this source.', 'post_ids': sorted(missing)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            posts = posts.exclude(status__in=RepurposedPost.LOCKED_STATUSES)
+
+        posts = list(posts)
+        if not posts:
+            return Response({'error': 'No posts to regenerate.'}, status=status.HTTP_400_BAD_REQUEST)
+        return _queue_regeneration(request, source, posts, data)
+
+    @action(detail=True, methods=['post'])
+    def publish(self, request, pk=None):
+        """
+        Publish this source's posts to all their platforms at once. Accounts are resolved
+        in one query; the posts are published in the background, one lane per platform.
+        """
+        from apps.social_accounts.models import SocialAccount
+        from .services.publishing import claim, publish_blocker
+        from .tasks import start_source_publish
+
+        source = self.get_object()
+        serializer = SourcePublishRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        posts = source.repurposed_posts.all()
+        if data.get('post_ids'):
+            posts = posts.filter(id__in=data['post_ids'])
+            missing = set(data['post_ids']) - {post.id for post in posts}
+            if missing:
+                return Response(
+                    {'error': 'Some posts do not belong to this source.', 'post_ids': sorted(missing)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            posts = posts.exclude(status__in=RepurposedPost.LOCKED_STATUSES)
+        posts = list(posts)
+        if not posts:
+            return Response({'error': 'No posts to publish.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Every target account in one query; the first connected account of a platform wins
+        accounts = SocialAccount.objects.filter(
+            user=request.user,
+            platform__in={post.platform for post in posts},
+            is_active=True
+        )
+        if data.get('social_account_ids'):
+            accounts = accounts.filter(id__in=data['social_account_ids'])
+        accounts_by_platform = {}
+        for account in accounts:
+            accounts_by_platform.setdefault(account.platform, account)
+
+        platforms = {}
+        targets = []
+        for post in posts:
+            lane = platforms.setdefault(post.platform, {'queued': [], 'skipped': []})
+            account = accounts_by_platform.get(post.platform)
+            if account is None:
+                reason = f'No connected {post.get_platform_display()} account found.'
+            else:
+                reason = publish_blocker(post)
+            if not reason and not claim(post):
+                reason = 'This post is already being published.'
+            if reason:
+                lane['skipped'].append({'post_id': post.id, 'error': reason})
+                continue
+            lane['queued'].append(post.id)
+            targets.append((post, account))
+
+        if not targets:
+            return Response(
+                {'error': 'None of the posts can be published.', 'platforms': platforms},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        start_source_publish(targets, request.tenant.schema_name)
+        return Response({
+            'message': f'Publishing {len(targets)} posts.',
+            'source_id': source.id,
+            'platforms': platforms
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'], url_path='publish-status')
+    def publish_status(self, request, pk=None):
+        """Publishing state of this source's posts, grouped by platform."""
+        source = self.get_object()
+        platforms = {}
+        for post in source.repurposed_posts.order_by('platform', 'id'):
+            lane = platforms.setdefault(post.platform, {'counts': {}, 'posts': []})
+            lane['counts'][post.status] = lane['counts'].get(post.status, 0) + 1
+            lane['posts'].append({
+                'id': post.id,
+                'status': post.status,
+                'error_message': post.error_message,
+                'published_at': post.published_at,
+                'platform_post_url': post.platform_post_url,
+            })
+        return Response({'source_id': source.id, 'platforms': platforms})
+
 
 class RepurposedPostViewSet(viewsets.ModelViewSet):
     """CRUD operations for Repurposed Posts."""
@@ -52,10 +236,13 @@ class RepurposedPostViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def publish(self, request, pk=None):
-        """Publish a post to social media."""
+        """
+        Queue publishing of a post to social media. Returns 202 at once; the upload
+        runs in a Celery task and publish-status reports the outcome.
+        """
         from apps.social_accounts.models import SocialAccount
-        from apps.social_accounts.services import SocialMediaService
-        from django.utils import timezone
+        from .services.publishing import claim, publish_blocker
+        from .tasks import start_publish
 
         post = self.get_object()
         serializer = PublishPostSerializer(data=request.data)
@@ -78,79 +265,58 @@ class RepurposedPostViewSet(viewsets.ModelViewSet):
             if not account:
                 return Response({'error': f'No connected {post.get_platform_display()} account found.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 2. Call Service
-        result = {'success': False, 'error': 'Unknown platform'}
-        
-        if post.platform == SocialAccount.Platform.LINKEDIN:
-            result = SocialMediaService.post_to_linkedin(
-                account.access_token, 
-                account.platform_user_id, 
-                post.generated_content,
-                media_file=post.media_file
-            )
-        elif post.platform == SocialAccount.Platform.TWITTER:
-            result = SocialMediaService.post_to_twitter(
-                account,
-                post.generated_content,
-                media_file=post.media_file
-            )
-        elif post.platform == SocialAccount.Platform.YOUTUBE:
-            if not post.media_file:
-                return Response({'error': 'Video file is required for YouTube.'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            result = SocialMediaService.post_to_youtube(
-                account.access_token,
-                title=post.hook or f"Video by {request.user.username}", # Fallback title
-                description=post.generated_content,
-                video_file=post.media_file
-            )
-        elif post.platform == SocialAccount.Platform.INSTAGRAM:
-            return Response({
-                'error': 'Direct publishing to Instagram is currently disabled. You can copy the generated content and post manually.'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        elif post.platform == SocialAccount.Platform.FACEBOOK:
-            return Response({
-                'error': 'Direct publishing to Facebook is currently disabled. You can copy the generated content and post manually.'
-            }, status=status.HTTP_400_BAD_REQUEST)
-            
-        # 3. Handle Result
-        if result['success']:
-            post.status = RepurposedPost.Status.PUBLISHED
-            post.published_at = timezone.now()
-            post.platform_post_id = str(result.get('id', ''))
-            post.platform_post_url = result.get('url', '')
-            post.save()
-            
-            return Response({
-                'message': 'Post published successfully.',
-                'post': RepurposedPostSerializer(post).data
-            })
-        else:
-            post.status = RepurposedPost.Status.FAILED
-            post.error_message = result.get('error', 'Unknown error')
-            post.save()
-            return Response({
-                'error': f"Publishing failed: {result.get('error')}",
-                'post': RepurposedPostSerializer(post).data
-            }, status=status.HTTP_400_BAD_REQUEST)
+        # 2. Reject what the task would fail on anyway
+        blocker = publish_blocker(post)
+        if blocker:
+            return Response({'error': blocker}, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=True, methods=['post'])
-    def regenerate(self, request, pk=None):
-        """Regenerate content for this post."""
-        post = self.get_object()
-        
-        if not request.user.can_repurpose():
-            return Response(
-                {'error': 'You have reached your monthly repurpose limit.'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
+        # 3. Claim the post; a publish already in flight wins unless its worker was lost
+        if not claim(post):
+            return Response({'error': 'This post is already being published.'}, status=status.HTTP_409_CONFLICT)
+
+        # 4. Hand the upload to a worker
+        start_publish(post, account, request.tenant.schema_name)
+        post.refresh_from_db()
         return Response({
-            'message': 'Content regenerated.',
+            'message': 'Publishing started.',
             'post': RepurposedPostSerializer(post).data
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'], url_path='publish-status')
+    def publish_status(self, request, pk=None):
+        """Publishing state of a post: status, error, link, recent attempts and upload progress."""
+        from apps.social_accounts.serializers import MediaUploadSerializer, PostingLogSerializer
+
+        post = self.get_object()
+        logs = post.posting_logs.select_related('social_account')[:10]
+        upload = post.media_uploads.select_related('social_account').first()
+        return Response({
+            'id': post.id,
+            'status': post.status,
+            'error_message': post.error_message,
+            'published_at': post.published_at,
+            'platform_post_url': post.platform_post_url,
+            'attempts': PostingLogSerializer(logs, many=True).data,
+            'upload': MediaUploadSerializer(upload).data if upload else None,
         })
 
+    @action(detail=True, methods=['get'])
+    def uploads(self, request, pk=None):
+        """Media uploads of this post with their progress, newest first."""
+        from apps.social_accounts.serializers import MediaUploadSerializer
+
+        post = self.get_object()
+        uploads = post.media_uploads.select_related('social_account')
+        return Response(MediaUploadSerializer(uploads, many=True).data)
+
+    @action(detail=True, methods=['post'])
+    def regenerate(self, request, pk=None):
+        """Regenerate content for this post in the background, optionally as several variants."""
+        post = self.get_object()
+        serializer = RegenerateRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return _queue_regeneration(request, post.source, [post], serializer.validated_data)
+
 
 class RepurposeView(APIView):
     """Main endpoint to submit content for repurposing."""
@@ -159,10 +325,9 @@ class RepurposeView(APIView):
     from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
     parser_classes = [MultiPartParser, FormParser, JSONParser]
 
-    def post(self, request):
+    def _validate_request(self, request):
+        """Parse and validate the payload. Returns (validated_data, error_response)."""
         # Debug Logging for Payload
-        import logging
-        logger = logging.getLogger(__name__)
         logger.info(f"Repurpose Request Data: {request.data}")
         logger.info(f"Repurpose Request Files: {request.FILES}")
 
@@ -192,46 +357,42 @@ class RepurposeView(APIView):
             logger.error(f"Repurpose Validation Error: {serializer.errors}")
             # Format error for frontend
             error_msg = "Validation Error: " + ", ".join([f"{k}: {v[0]}" for k, v in serializer.errors.items()])
-            return Response({'error': error_msg, 'details': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
-        serializer.is_valid(raise_exception=True)
-        
-        user = request.user
+            return None, Response({'error': error_msg, 'details': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
         
         # Check user limits
-        if not user.can_repurpose():
-            return Response(
+        if not request.user.can_repurpose():
+            return None, Response(
                 {'error': 'You have reached your monthly repurpose limit. Upgrade to continue.'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        data = serializer.validated_data
-        
+        return serializer.validated_data, None
+
+    def _create_source_and_posts(self, user, data):
+        """
+        Create the ContentSource (or, with reuse_source, pick an already extracted duplicate)
+        and one pending RepurposedPost per platform. Returns (source, posts, brand_voice, reused).
+        """
+        from .services.pipeline import dedup_keys, find_reusable_source
+
         # Determine source type
         source_url = data.get('source_url', '')
         source_file = data.get('source_file')
-        
-        if source_file:
-            # Check for file type
-            filename = source_file.name.lower()
-            if filename.endswith('.txt'):
-                source_type = ContentSource.SourceType.TEXT # Reuse TEXT type or add FILE_TEXT
-            else:
-                source_type = ContentSource.SourceType.PDF
-        elif 'youtube.com' in source_url or 'youtu.be' in source_url:
-            source_type = ContentSource.SourceType.YOUTUBE
-        elif source_url:
-            source_type = ContentSource.SourceType.BLOG
-        else:
-            source_type = ContentSource.SourceType.TEXT
-        
-        # Create content source
-        content_source = ContentSource.objects.create(
-            user=user,
-            source_type=source_type,
-            source_url=source_url or None,
-            raw_text=data.get('raw_text', ''),
-            title=data.get('title', '')
-        )
+        source_type = ContentSource.detect_source_type(source_url, source_file)
+        keys = dedup_keys(source_url, source_file, data.get('raw_text', ''))
+
+        content_source = find_reusable_source(user, **keys) if data.get('reuse_source') else None
+        reused = content_source is not None
+        if not reused:
+            # Create content source
+            content_source = ContentSource.objects.create(
+                user=user,
+                source_type=source_type,
+                source_url=source_url or None,
+                raw_text=data.get('raw_text', ''),
+                title=data.get('title', ''),
+                **keys
+            )
 
         
         # Get brand voice if specified
@@ -250,57 +411,75 @@ class RepurposeView(APIView):
                 status=RepurposedPost.Status.PENDING
             )
             posts.append(post)
+
+        return content_source, posts, brand_voice, reused
+
+    def post(self, request):
+        data, error_response = self._validate_request(request)
+        if error_response:
+            return error_response
+        
+        user = request.user
+        source_file = data.get('source_file')
+        content_source, posts, brand_voice, reused = self._create_source_and_posts(user, data)
+
+        # Background mode: hand the pipeline to Celery and return immediately
+        if data.get('run_async'):
+            from .tasks import start_repurpose_job
+
+            if source_file and not reused:
+                content_source.source_file.save(source_file.name, source_file, save=True)
+
+            job = RepurposeJob.objects.create(
+                user=user,
+                source=content_source,
+                brand_voice=brand_voice,
+                user_prompt=data.get('user_prompt') or '',
+                progress={'reused_source': reused, 'post_ids': [post.id for post in posts]}
+            )
+            start_repurpose_job(job, request.tenant.schema_name)
+
+            return Response({
+                'message': 'Repurpose job queued.',
+                'job': RepurposeJobSerializer(job).data
+            }, status=status.HTTP_202_ACCEPTED)
         
         # Try to process content (AI services may not be available)
         try:
-            from .services.ai_engine import AIEngine
-            from .services.extractor import ContentExtractor
-            
-            # Extract content
-            extractor = ContentExtractor()
-            if source_type == ContentSource.SourceType.YOUTUBE:
-                extracted_text, title = extractor.extract_youtube(source_url)
-            elif source_type == ContentSource.SourceType.BLOG:
-                extracted_text, title = extractor.extract_blog(source_url)
-            elif source_type == ContentSource.SourceType.PDF and source_file:
-                extracted_text = extractor.extract_pdf_content(source_file)
-                title = data.get('title', '') or source_file.name.rsplit('.', 1)[0] or 'Uploaded Document'
-            elif source_type == ContentSource.SourceType.TEXT and source_file:
-                 # It's a text file upload
-                 source_file.seek(0)
-                 extracted_text = source_file.read().decode('utf-8', errors='ignore')
-                 title = data.get('title', '') or source_file.name.rsplit('.', 1)[0] or 'Uploaded Text'
-            else:
-                extracted_text = content_source.raw_text
-                title = data.get('title', 'Untitled')
-
-            
-            content_source.raw_text = extracted_text
-            content_source.title = title or content_source.title or 'Untitled'
-            content_source.save()
+            from .services.ai_engine import get_ai_engine
+            from .services.pipeline import (
+                extract_source, save_extracted, ensure_digest, generation_input, apply_generated
+            )
             
-            # Generate content for each platform
-            ai_engine = AIEngine()
-            for post in posts:
-                generated = ai_engine.generate_post(
-                    content=extracted_text,
-                    platform=post.platform,
-                    brand_voice=brand_voice,
-                    source_url=content_source.source_url,
-                    user_prompt=data.get('user_prompt')
+            # Extract content (a reused source already holds its text)
+            if not reused:
+                extracted_text, title = extract_source(
+                    content_source,
+                    source_file=source_file,
+                    title=data.get('title', '')
                 )
-                post.generated_content = generated.get('content', '')
-                post.hook = generated.get('hook', '')
-                post.hashtags = generated.get('hashtags') or []
-                post.thread_posts = generated.get('thread_posts') or []
-                post.status = RepurposedPost.Status.READY
-                post.save()
+                save_extracted(content_source, extracted_text, title)
+            
+            # Summarize long sources once, then generate for all platforms concurrently
+            ai_engine = get_ai_engine()
+            ensure_digest(content_source, ai_engine)
+            posts_by_platform = {post.platform: post for post in posts}
+            applied = 0
+            for platform, generated in ai_engine.generate_posts(
+                content=generation_input(content_source),
+                platforms=list(posts_by_platform),
+                brand_voice=brand_voice,
+                source_url=content_source.source_url,
+                user_prompt=data.get('user_prompt')
+            ):
+                applied += apply_generated(posts_by_platform[platform], generated)
             
             content_source.is_processed = True
             content_source.save()
             
-            # Increment user usage
-            user.increment_usage()
+            # Increment user usage (only if something was generated)
+            if applied:
+                user.increment_usage()
             
         except ImportError as e:
             # AI services not available (packages not installed)
@@ -317,6 +496,16 @@ class RepurposeView(APIView):
                 'source': ContentSourceSerializer(content_source).data,
                 'posts': RepurposedPostSerializer(posts, many=True).data
             }, status=status.HTTP_201_CREATED)
+
+        except RateLimitExceeded as e:
+            from .services.pipeline import mark_failed
+            pending = [post for post in posts if post.status == RepurposedPost.Status.PENDING]
+            mark_failed(content_source, pending, str(e))
+            return Response({
+                'error': str(e),
+                'retry_after': e.retry_after,
+                'source_id': content_source.id
+            }, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(e.retry_after)})
             
         except Exception as e:
             content_source.processing_error = str(e)
@@ -334,11 +523,326 @@ class RepurposeView(APIView):
         
         return Response({
             'message': 'Content repurposed successfully.',
+            'reused_source': reused,
             'source': ContentSourceSerializer(content_source).data,
             'posts': RepurposedPostSerializer(posts, many=True).data
         }, status=status.HTTP_201_CREATED)
 
 
+class RepurposeStreamView(RepurposeView):
+    """
+    Same input as RepurposeView, but streams progress as Server-Sent Events:
+    'extraction', then a 'post' event per platform as soon as it is ready
+    ('delta' token events too when stream_tokens is set), then 'done' or 'error'.
+    Each event is flushed as it happens under WSGI (gthread workers: an open stream
+    holds one thread) and under ASGI, where the body is an async generator.
+    """
+
+    def post(self, request):
+        data, error_response = self._validate_request(request)
+        if error_response:
+            return error_response
+
+        content_source, posts, brand_voice, reused = self._create_source_and_posts(request.user, data)
+
+        events = queue.Queue()
+        worker = threading.Thread(
+            target=self._run_pipeline,
+            args=(events, request.tenant.schema_name, request.user, content_source, posts, brand_voice, data, reused),
+            name=f'repurpose-stream-{content_source.id}',
+            daemon=True
+        )
+        worker.start()
+
+        from django.core.handlers.asgi import ASGIRequest
+
+        if isinstance(request._request, ASGIRequest):
+            stream = self._async_event_stream(events)
+        else:
+            stream = self._event_stream(events)
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Stop proxies from buffering the stream
+        return response
+
+    @staticmethod
+    def _run_pipeline(events, schema_name, user, content_source, posts, brand_voice, data, reused=False):
+        """Runs extract -> generate -> persist in a worker thread, pushing (event, payload) tuples."""
+        from django.db import connection
+        from django_tenants.utils import schema_context
+
+        def emit(event, payload):
+            events.put((event, payload))
+
+        try:
+            with schema_context(schema_name):
+                try:
+                    from .services.ai_engine import get_ai_engine
+                    from .services.pipeline import (
+                        extract_source, save_extracted, ensure_digest, generation_input, apply_generated
+                    )
+
+                    if not reused:
+                        extracted_text, title = extract_source(
+                            content_source,
+                            source_file=data.get('source_file'),
+                            title=data.get('title', '')
+                        )
+                        save_extracted(content_source, extracted_text, title)
+                    emit('extraction', {
+                        'source_id': content_source.id,
+                        'title': content_source.title,
+                        'chars': len(content_source.raw_text),
+                        'reused': reused
+                    })
+
+                    ai_engine = get_ai_engine()
+                    ensure_digest(content_source, ai_engine)
+
+                    def emit_delta(platform, text):
+                        emit('delta', {'platform': platform, 'text': text})
+
+                    posts_by_platform = {post.platform: post for post in posts}
+                    applied = 0
+                    for platform, generated in ai_engine.generate_posts(
+                        content=generation_input(content_source),
+                        platforms=list(posts_by_platform),
+                        brand_voice=brand_voice,
+                        source_url=content_source.source_url,
+                        user_prompt=data.get('user_prompt'),
+                        on_delta=emit_delta if data.get('stream_tokens') else None
+                    ):
+                        post = posts_by_platform[platform]
+                        applied += apply_generated(post, generated)
+                        emit('post', RepurposedPostSerializer(post).data)
+
+                    content_source.is_processed = True
+                    content_source.save()
+                    if applied:
+                        user.increment_usage()
+                    emit('done', {'source_id': content_source.id, 'status': 'completed'})
+                except RateLimitExceeded as e:
+                    from .services.pipeline import mark_failed
+                    pending = [post for post in posts if post.status == RepurposedPost.Status.PENDING]
+                    mark_failed(content_source, pending, str(e))
+                    emit('error', {'error': str(e), 'retry_after': e.retry_after, 'source_id': content_source.id})
+                except Exception as e:
+                    logger.exception(f"Streaming repurpose failed for source {content_source.id}")
+                    from .services.pipeline import mark_failed
+                    pending = [post for post in posts if post.status == RepurposedPost.Status.PENDING]
+                    mark_failed(content_source, pending, str(e))
+                    emit('error', {'error': f'Failed to process content: {str(e)}', 'source_id': content_source.id})
+        finally:
+            connection.close()
+            events.put(None)
+
+    @staticmethod
+    def _frame(event, payload) -> str:
+        from rest_framework.utils.encoders import JSONEncoder
+
+        return f"event: {event}\ndata: {json.dumps(payload, cls=JSONEncoder)}\n\n"
+
+    @classmethod
+    def _event_stream(cls, events):
+        """Formats queued events as SSE frames (WSGI)."""
+        for event, payload in iter(events.get, None):
+            yield cls._frame(event, payload)
+
+    @classmethod
+    async def _async_event_stream(cls, events):
+        """Formats queued events as SSE frames without blocking the event loop (ASGI)."""
+        from asgiref.sync import sync_to_async
+
+        next_event = sync_to_async(events.get, thread_sensitive=False)
+        while True:
+            item = await next_event()
+            if item is None:
+                break
+            yield cls._frame(*item)
+
+
+class RepurposeBatchView(APIView):
+    """Submit many sources with shared platforms and brand voice, processed in the background as one batch."""
+    permission_classes = [permissions.IsAuthenticated]
+    from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+
+    def post(self, request):
+        from django.db import transaction
+        from .services.pipeline import dedup_keys, find_reusable_source
+        from .tasks import start_repurpose_batch
+
+        # Multipart sends 'sources'/'platforms' as JSON strings and files as repeated 'source_files'
+        if hasattr(request.data, 'getlist'):
+            data = {key: request.data.get(key) for key in request.data.keys()}
+            data['source_files'] = request.FILES.getlist('source_files')
+        else:
+            data = dict(request.data)
+        for key in ('sources', 'platforms'):
+            if isinstance(data.get(key), str):
+                try:
+                    data[key] = json.loads(data[key])
+                except ValueError:
+                    pass
+
+        serializer = BatchRepurposeRequestSerializer(data=data, context={'request': request})
+        if not serializer.is_valid():
+            logger.error(f"Batch Repurpose Validation Error: {serializer.errors}")
+            error_msg = "Validation Error: " + ", ".join([f"{k}: {v[0]}" for k, v in serializer.errors.items()])
+            return Response({'error': error_msg, 'details': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+
+        user = request.user
+        items = list(data.get('sources') or []) + [{'source_file': f} for f in data['source_files']]
+
+        sources = []
+        uploads = []  # (source, file), stored inside the transaction below
+        reused_ids = set()
+        seen = set()
+        for item in items:
+            source_url = item.get('source_url', '')
+            source_file = item.get('source_file')
+            keys = dedup_keys(source_url, source_file, item.get('raw_text', ''))
+
+            if data.get('reuse_source'):
+                # Duplicates inside the batch collapse into one source
+                if (keys['normalized_url'], keys['content_hash']) in seen:
+                    continue
+                seen.add((keys['normalized_url'], keys['content_hash']))
+                existing = find_reusable_source(user, **keys)
+                if existing is not None:
+                    reused_ids.add(existing.id)
+                    sources.append(existing)
+                    continue
+
+            source = ContentSource(
+                user=user,
+                source_type=ContentSource.detect_source_type(source_url, source_file),
+                source_url=source_url or None,
+                raw_text=item.get('raw_text', ''),
+                title=item.get('title', ''),
+                **keys
+            )
+            if source_file:
+                uploads.append((source, source_file))
+            sources.append(source)
+
+        # Check the whole batch against the user's limit once, after duplicates collapsed
+        if not user.can_repurpose(count=len(sources)):
+            return Response(
+                {'error': f'This batch needs {len(sources)} repurposes, which exceeds your remaining monthly limit.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        brand_voice = None
+        if data.get('brand_voice_id'):
+            brand_voice = BrandVoice.objects.get(id=data['brand_voice_id'])
+
+        batch_id = uuid.uuid4()
+        stored = []
+        try:
+            with transaction.atomic():
+                for source, source_file in uploads:
+                    source.source_file.save(source_file.name, source_file, save=False)
+                    stored.append(source.source_file.name)
+                ContentSource.objects.bulk_create([source for source in sources if source.pk is None])
+                posts = RepurposedPost.objects.bulk_create([
+                    RepurposedPost(
+                        source=source,
+                        platform=platform,
+                        brand_voice=brand_voice,
+                        status=RepurposedPost.Status.PENDING
+                    )
+                    for source in sources
+                    for platform in data['platforms']
+                ])
+                post_ids = {}
+                for post in posts:
+                    post_ids.setdefault(post.source_id, []).append(post.id)
+                jobs = RepurposeJob.objects.bulk_create([
+                    RepurposeJob(
+                        user=user,
+                        source=source,
+                        batch_id=batch_id,
+                        brand_voice=brand_voice,
+                        user_prompt=data.get('user_prompt') or '',
+                        progress={'reused_source': source.id in reused_ids, 'post_ids': post_ids[source.id]}
+                    )
+                    for source in sources
+                ])
+        except Exception:
+            # Nothing references the stored uploads once the rows are rolled back
+            storage = ContentSource._meta.get_field('source_file').storage
+            for name in stored:
+                storage.delete(name)
+            raise
+
+        start_repurpose_batch(jobs, request.tenant.schema_name)
+
+        # Posts of every job in one query instead of one per job
+        jobs = list(
+            RepurposeJob.objects.filter(id__in=[job.id for job in jobs]).order_by('id')
+            .select_related('source').prefetch_related('source__repurposed_posts')
+        )
+        return Response({
+            'message': f'{len(jobs)} sources queued for repurposing.',
+            'batch_id': str(batch_id),
+            'jobs': [
+                {**RepurposeJobSerializer(job).data, 'reused_source': job.source_id in reused_ids}
+                for job in jobs
+            ]
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class RepurposeJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Status of background repurpose jobs."""
+    serializer_class = RepurposeJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return RepurposeJob.objects.filter(
+            user=self.request.user
+        ).select_related('source').prefetch_related('source__repurposed_posts')
+
+    @action(detail=False, methods=['get'], url_path=r'batch/(?P<batch_id>[0-9a-f-]+)')
+    def batch(self, request, batch_id=None):
+        """Aggregated progress of every job in a batch."""
+        jobs = list(self.get_queryset().filter(batch_id=batch_id))
+        if not jobs:
+            return Response({'error': 'Batch not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        by_stage = {}
+        for job in jobs:
+            by_stage[job.stage] = by_stage.get(job.stage, 0) + 1
+
+        return Response({
+            'batch_id': batch_id,
+            'total': len(jobs),
+            'completed': by_stage.get(RepurposeJob.Stage.COMPLETED, 0),
+            'failed': by_stage.get(RepurposeJob.Stage.FAILED, 0),
+            'by_stage': by_stage,
+            'is_finished': all(job.is_finished for job in jobs),
+            'jobs': RepurposeJobSerializer(jobs, many=True).data
+        })
+
+
+class AIRateLimitView(APIView):
+    """Current state of the shared Gemini rate limit buckets (staff only)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        from django.conf import settings
+        from .services.rate_limit import get_limiter
+
+        limiter = get_limiter()
+        tenant = request.query_params.get('tenant') or request.tenant.schema_name
+        return Response({
+            'enabled': settings.AI_RATE_LIMIT_ENABLED,
+            'max_wait': settings.AI_RATE_LIMIT_MAX_WAIT,
+            'buckets': limiter.state(tenant=tenant),
+        })
+
+
 class ScheduledPostViewSet(viewsets.ModelViewSet):
     """CRUD operations for Scheduled Posts."""
     permission_classes = [permissions.IsAuthenticated]
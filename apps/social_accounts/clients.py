@@ -0,0 +1,121 @@
+"""
+Pooled HTTP clients for the social platform APIs.
+
+Each platform gets one requests.Session per process, so publishes reuse
+keep-alive TLS connections instead of opening new ones. Every request has
+connect/read timeouts. Failed attempts are retried with exponential backoff
+and full jitter:
+
+- a connect timeout (nothing was sent) is always retried;
+- connection errors and 5xx responses are retried only for idempotent
+  requests (GET/PUT/DELETE/HEAD, or callers passing idempotent=True), so a
+  post that may already have been created is never sent twice.
+"""
+import logging
+import random
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'}
+RETRY_STATUSES = {500, 502, 503, 504}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (1-based)."""
+    cap = min(settings.SOCIAL_HTTP_BACKOFF_MAX, settings.SOCIAL_HTTP_BACKOFF * 2 ** (attempt - 1))
+    return random.uniform(0, cap)
+
+
+def _rewind(kwargs) -> bool:
+    """Seeks request body streams back to the start. False if one cannot be replayed."""
+    streams = [kwargs.get('data')]
+    streams.extend(
+        value[1] if isinstance(value, tuple) else value
+        for value in (kwargs.get('files') or {}).values()
+    )
+    for stream in streams:
+        if stream is None or isinstance(stream, (str, bytes, dict, list, tuple)):
+            continue
+        if not hasattr(stream, 'seek'):
+            return False
+        stream.seek(0)
+    return True
+
+
+class PlatformClient:
+    """Session, timeouts and retry policy for one platform's API."""
+
+    def __init__(self, platform: str):
+        self.platform = platform
+        self.session = requests.Session()
+        # Retries are done here so the body can be rewound and the policy stays per request
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=settings.SOCIAL_HTTP_POOL_MAXSIZE,
+            max_retries=0
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method: str, url: str, idempotent: bool = None, timeout=None, **kwargs) -> requests.Response:
+        """
+        Sends a request with the platform's timeouts and retry policy.
+        Raises requests.RequestException once retries are exhausted.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        timeout = timeout or (settings.SOCIAL_HTTP_CONNECT_TIMEOUT, settings.SOCIAL_HTTP_READ_TIMEOUT)
+        attempts = 1 + settings.SOCIAL_HTTP_RETRIES
+
+        for attempt in range(1, attempts + 1):
+            replayable = _rewind(kwargs)
+            last_attempt = attempt == attempts or not replayable
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except requests.exceptions.ConnectTimeout:
+                if last_attempt:
+                    raise
+                reason = 'connect timeout'
+            except requests.exceptions.ConnectionError:
+                if last_attempt or not idempotent:
+                    raise
+                reason = 'connection error'
+            else:
+                if response.status_code not in RETRY_STATUSES or last_attempt or not idempotent:
+                    return response
+                reason = f"HTTP {response.status_code}"
+                response.close()
+
+            delay = backoff_delay(attempt)
+            logger.warning(f"{self.platform} {method} {url} failed ({reason}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request('PUT', url, **kwargs)
+
+
+def get_client(platform: str) -> PlatformClient:
+    """Process-wide client for a platform ('linkedin', 'twitter', 'youtube', 'facebook', ...)."""
+    client = _clients.get(platform)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(platform)
+            if client is None:
+                client = _clients[platform] = PlatformClient(platform)
+    return client
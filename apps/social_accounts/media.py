@@ -0,0 +1,96 @@
+"""
+Streaming reads of stored media for platform uploads.
+
+MediaStream reads a file (a FieldFile on any storage backend, an uploaded
+file or any seekable binary file) in MEDIA_STREAM_CHUNK_SIZE pieces. Memory
+stays constant whatever the file size. SHA-256/MD5 and the byte count are
+computed as the bytes go out. Because it has a length, requests sends a
+Content-Length instead of chunked encoding. Rewinding it with seek(0) lets
+the HTTP client replay it on retries.
+"""
+import hashlib
+import io
+import os
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+def media_size(file_obj) -> int:
+    """Size in bytes of a stored or open file."""
+    size = getattr(file_obj, 'size', None)
+    if size is not None:
+        return size
+    position = file_obj.tell()
+    file_obj.seek(0, os.SEEK_END)
+    size = file_obj.tell()
+    file_obj.seek(position)
+    return size
+
+
+@contextmanager
+def open_media(file_obj):
+    """Opens a FieldFile for binary reading from its storage and closes it afterwards."""
+    if hasattr(file_obj, 'open'):
+        file_obj.open('rb')
+    try:
+        yield file_obj
+    finally:
+        if hasattr(file_obj, 'close'):
+            file_obj.close()
+
+
+class MediaStream:
+    """Iterable over bytes [start, start + length) of an open file, hashing what it yields."""
+
+    def __init__(self, file_obj, start: int = 0, length: int = None, chunk_size: int = None, size: int = None):
+        """size: the file's total size, if known (saves a storage lookup)."""
+        self.file = file_obj
+        self.start = start
+        available = max(0, (media_size(file_obj) if size is None else size) - start)
+        self.length = available if length is None else min(length, available)
+        self.chunk_size = chunk_size or settings.MEDIA_STREAM_CHUNK_SIZE
+        self._reset()
+
+    def _reset(self):
+        self.bytes_read = 0
+        self._sha256 = hashlib.sha256()
+        self._md5 = hashlib.md5()
+
+    def __len__(self) -> int:
+        return self.length
+
+    def seek(self, position: int, whence: int = os.SEEK_SET):
+        """Only rewinding is supported; the next iteration starts over."""
+        if position != 0 or whence != os.SEEK_SET:
+            raise io.UnsupportedOperation("MediaStream can only be rewound")
+        self._reset()
+        return 0
+
+    def __iter__(self):
+        self._reset()
+        self.file.seek(self.start)
+        remaining = self.length
+        while remaining > 0:
+            chunk = self.file.read(min(self.chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            self.bytes_read += len(chunk)
+            self._sha256.update(chunk)
+            self._md5.update(chunk)
+            yield chunk
+        if self.bytes_read != self.length:
+            raise IOError(f"Media ended after {self.bytes_read} of {self.length} bytes")
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+    @property
+    def md5(self) -> str:
+        return self._md5.hexdigest()
+
+    def summary(self) -> dict:
+        """Bytes sent and their checksums, for logs and platform responses."""
+        return {'bytes': self.bytes_read, 'sha256': self.sha256, 'md5': self.md5}
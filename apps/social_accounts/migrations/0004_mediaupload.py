@@ -0,0 +1,36 @@
+# Generated by Django 5.2.10 on 2026-10-16 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repurposer', '0012_contentsource_text_sizes'),
+        ('social_accounts', '0003_alter_socialaccount_platform'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_uri', models.TextField(blank=True, help_text='Upload session URL issued by the platform')),
+                ('offset', models.BigIntegerField(default=0, help_text='Bytes acknowledged by the platform')),
+                ('total_bytes', models.BigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('completed', 'Completed'), ('failed', 'Failed')], default='uploading', max_length=20)),
+                ('platform_media_id', models.CharField(blank=True, max_length=255)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('repurposed_post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='media_uploads', to='repurposer.repurposedpost')),
+                ('social_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='media_uploads', to='social_accounts.socialaccount')),
+            ],
+            options={
+                'verbose_name': 'Media Upload',
+                'verbose_name_plural': 'Media Uploads',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
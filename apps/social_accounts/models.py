@@ -96,3 +96,62 @@ class PostingLog(models.Model):
 
     def __str__(self):
         return f"{self.social_account.platform} - {self.status} - {self.created_at}"
+
+
+class MediaUpload(models.Model):
+    """
+    Resumable upload of a post's media to a platform. The upload session and the
+    number of bytes the platform acknowledged are stored after every chunk, so a
+    retried publish continues where the previous attempt stopped.
+    """
+
+    class Status(models.TextChoices):
+        UPLOADING = 'uploading', 'Uploading'
+        COMPLETED = 'completed', 'Completed'
+        FAILED = 'failed', 'Failed'
+
+    social_account = models.ForeignKey(
+        SocialAccount,
+        on_delete=models.CASCADE,
+        related_name='media_uploads'
+    )
+    repurposed_post = models.ForeignKey(
+        'repurposer.RepurposedPost',
+        on_delete=models.CASCADE,
+        related_name='media_uploads'
+    )
+
+    session_uri = models.TextField(blank=True, help_text="Upload session URL issued by the platform")
+    offset = models.BigIntegerField(default=0, help_text="Bytes acknowledged by the platform")
+    total_bytes = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.UPLOADING)
+    platform_media_id = models.CharField(max_length=255, blank=True)
+    error_message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Media Upload'
+        verbose_name_plural = 'Media Uploads'
+
+    def __str__(self):
+        return f"{self.social_account.platform} upload for post {self.repurposed_post_id} - {self.status} ({self.progress}%)"
+
+    @property
+    def progress(self) -> float:
+        """Percentage of the file acknowledged by the platform."""
+        if not self.total_bytes:
+            return 100.0 if self.status == self.Status.COMPLETED else 0.0
+        return round(100 * self.offset / self.total_bytes, 1)
+
+    @classmethod
+    def resume_or_start(cls, social_account, repurposed_post):
+        """The unfinished upload of this post to this account, or a new one."""
+        upload = cls.objects.filter(
+            social_account=social_account,
+            repurposed_post=repurposed_post,
+            status=cls.Status.UPLOADING
+        ).first()
+        return upload or cls.objects.create(social_account=social_account, repurposed_post=repurposed_post)
@@ -2,7 +2,7 @@
 Serializers for Social Accounts app.
 """
 from rest_framework import serializers
-from .models import SocialAccount, PostingLog
+from .models import MediaUpload, SocialAccount, PostingLog
 
 
 class SocialAccountSerializer(serializers.ModelSerializer):
@@ -38,6 +38,19 @@ class PostingLogSerializer(serializers.ModelSerializer):
         ]
 
 
+class MediaUploadSerializer(serializers.ModelSerializer):
+    """Serializer for MediaUpload progress."""
+    platform = serializers.CharField(source='social_account.platform', read_only=True)
+    progress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = MediaUpload
+        fields = [
+            'id', 'platform', 'status', 'offset', 'total_bytes', 'progress',
+            'platform_media_id', 'error_message', 'created_at', 'updated_at'
+        ]
+
+
 class OAuthCallbackSerializer(serializers.Serializer):
     """Serializer for OAuth callback handling."""
     code = serializers.CharField(required=True)
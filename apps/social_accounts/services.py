@@ -1,16 +1,40 @@
 
+import functools
 import requests
-import json
 import logging
 
+from django.conf import settings
+
+from .clients import get_client
+from .media import MediaStream, media_size, open_media
+
 logger = logging.getLogger(__name__)
 
+
+def upload_timeout():
+    """(connect, read) timeouts for media uploads, which may take a while to acknowledge."""
+    return (settings.SOCIAL_HTTP_CONNECT_TIMEOUT, settings.SOCIAL_UPLOAD_READ_TIMEOUT)
+
+
+def network_errors_as_failure(func):
+    """Turns timeouts and connection errors left after retries into a failed result."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"{func.__name__} network error: {str(e)}")
+            return {'success': False, 'error': f"Network error: {str(e)}"}
+    return wrapper
+
+
 class SocialMediaService:
     @staticmethod
+    @network_errors_as_failure
     def post_to_linkedin(access_token, person_id, text, media_file=None):
         """
         Post text to LinkedIn profile using UGC API.
-        Supports image upload.
+        Supports image upload, streamed from storage in bounded chunks.
         """
         # Ensure person_id is a URN
         if not person_id.startswith('urn:li:'):
@@ -26,6 +50,7 @@ class SocialMediaService:
 
         # Handle Media Upload
         asset_urn = None
+        media_summary = None
         if media_file:
             try:
                 # 1. Register Upload
@@ -40,21 +65,20 @@ class SocialMediaService:
                         }]
                     }
                 }
-                reg_response = requests.post(register_url, headers=headers, json=register_payload)
+                # Registering an upload creates nothing visible, so it is safe to retry
+                reg_response = get_client('linkedin').post(register_url, headers=headers, json=register_payload, idempotent=True)
                 
                 if reg_response.status_code == 200:
                     reg_data = reg_response.json()
                     upload_url = reg_data['value']['uploadMechanism']['com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest']['uploadUrl']
                     asset_urn = reg_data['value']['asset']
                     
-                    # 2. Upload Binary
-                    # Reset pointer just in case
-                    if hasattr(media_file, 'seek'):
-                        media_file.seek(0)
-                    
-                    # Use a binary header for upload
+                    # 2. Upload Binary, streamed with a Content-Length and checksummed on the way
                     upload_headers = {'Authorization': f'Bearer {access_token}'}
-                    upload_res = requests.put(upload_url, headers=upload_headers, data=media_file)
+                    with open_media(media_file):
+                        stream = MediaStream(media_file)
+                        upload_res = get_client('linkedin').put(upload_url, headers=upload_headers, data=stream, timeout=upload_timeout())
+                    media_summary = stream.summary()
                     
                     if upload_res.status_code != 201:
                          logger.error(f"LinkedIn binary upload failed: {upload_res.text}")
@@ -97,15 +121,18 @@ class SocialMediaService:
             }
         }
         
-        response = requests.post(url, headers=headers, json=payload)
+        response = get_client('linkedin').post(url, headers=headers, json=payload)
         
         if response.status_code == 201:
             data = response.json()
-            return {
+            result = {
                 'success': True,
                 'id': data.get('id'),
                 'url': f"https://www.linkedin.com/feed/update/{data.get('id')}/" 
             }
+            if media_summary:
+                result['media'] = media_summary
+            return result
         else:
             logger.error(f"LinkedIn posting failed: {response.text}")
             return {
@@ -145,7 +172,7 @@ class SocialMediaService:
         }
         
         try:
-            response = requests.post(url, data=data, headers=headers)
+            response = get_client('twitter').post(url, data=data, headers=headers)
             
             if response.status_code == 200:
                 token_data = response.json()
@@ -167,6 +194,7 @@ class SocialMediaService:
             return False
 
     @staticmethod
+    @network_errors_as_failure
     def post_to_twitter(social_account, text, media_file=None, retry=True):
         """
         Post text to Twitter (X) using V2 API.
@@ -192,7 +220,7 @@ class SocialMediaService:
             "text": text
         }
         
-        response = requests.post(url, headers=headers, json=payload)
+        response = get_client('twitter').post(url, headers=headers, json=payload)
         
         if response.status_code == 201:
             data = response.json()
@@ -247,22 +275,37 @@ class SocialMediaService:
                 
             return {
                 'success': False,
-                'error': error_msg
+                'error': error_msg,
+                'rate_limited': response.status_code == 429
             }
 
     @staticmethod
-    def post_to_youtube(access_token, title, description, video_file, privacy_status='private'):
+    def _youtube_error(response) -> str:
+        """User-facing message for a failed YouTube API response."""
+        error_msg = response.text
+        try:
+            err_data = response.json()
+            if 'error' in err_data:
+                errors = err_data['error'].get('errors', [])
+                for e in errors:
+                    if e.get('reason') == 'youtubeSignupRequired':
+                        return "No YouTube channel linked to this account. Please create a channel on YouTube first."
+                error_msg = err_data['error'].get('message', error_msg)
+        except:
+            pass
+        return f"YouTube Error: {error_msg}"
+
+    @staticmethod
+    @network_errors_as_failure
+    def post_to_youtube(access_token, title, description, video_file, privacy_status='private', upload=None):
         """
-        Post video to YouTube using Data API v3.
+        Post video to YouTube using Data API v3 resumable uploads.
+        The file is sent in YOUTUBE_UPLOAD_CHUNK_SIZE chunks; pass the post's MediaUpload
+        as upload to persist progress and continue an interrupted upload.
         """
-        # Upload URL (using simple upload for simplicity, resumable is robust but complex)
-        # For larger files, resumable is recommended. Here we implement the multipart upload.
-        url = "https://www.googleapis.com/upload/youtube/v3/videos?part=snippet,status"
-        
-        headers = {
-            'Authorization': f'Bearer {access_token}'
-        }
-        
+        from .models import MediaUpload
+        from .uploads import ResumableUploadError, YouTubeResumableUpload
+
         metadata = {
             "snippet": {
                 "title": title,
@@ -274,48 +317,41 @@ class SocialMediaService:
                 "privacyStatus": privacy_status
             }
         }
-        
-        files = {
-            'snippet': ('snippet.json', json.dumps(metadata), 'application/json'),
-            'body': ('video.mp4', video_file, 'application/octet-stream')
-        }
-        
-        # Reset file pointer
-        if hasattr(video_file, 'seek'):
-            video_file.seek(0)
-            
-        response = requests.post(url, headers=headers, files=files)
-        
-        if response.status_code in [200, 201]:
-            data = response.json()
-            return {
-                'success': True,
-                'id': data.get('id'),
-                'url': f"https://www.youtube.com/watch?v={data.get('id')}"
-            }
-        else:
-            logger.error(f"YouTube upload failed: {response.text}")
-            error_msg = response.text
-            try:
-                err_data = response.json()
-                if 'error' in err_data:
-                    errors = err_data['error'].get('errors', [])
-                    for e in errors:
-                        if e.get('reason') == 'youtubeSignupRequired':
-                            return {
-                                'success': False,
-                                'error': "No YouTube channel linked to this account. Please create a channel on YouTube first."
-                            }
-                    error_msg = err_data['error'].get('message', error_msg)
-            except:
-                pass
-                
+        upload = upload or MediaUpload()
+
+        try:
+            with open_media(video_file):
+                data = YouTubeResumableUpload(access_token, upload).run(video_file, media_size(video_file), metadata)
+        except ResumableUploadError as e:
+            response = e.response
+            error_msg = SocialMediaService._youtube_error(response) if response is not None else f"YouTube Error: {str(e)}"
+            logger.error(f"YouTube upload failed: {error_msg}")
+            upload.error_message = error_msg
+            # Server errors and interruptions stay resumable; rejections do not
+            if response is not None and response.status_code < 500:
+                upload.status = MediaUpload.Status.FAILED
+            if upload.pk:
+                upload.save(update_fields=['status', 'error_message', 'updated_at'])
             return {
                 'success': False,
-                'error': f"YouTube Error: {error_msg}"
+                'error': error_msg,
+                # A later attempt can continue the stored session
+                'resumable': upload.status == MediaUpload.Status.UPLOADING and bool(upload.session_uri)
             }
 
+        upload.status = MediaUpload.Status.COMPLETED
+        upload.platform_media_id = data.get('id') or ''
+        upload.error_message = ''
+        if upload.pk:
+            upload.save(update_fields=['status', 'platform_media_id', 'error_message', 'updated_at'])
+        return {
+            'success': True,
+            'id': data.get('id'),
+            'url': f"https://www.youtube.com/watch?v={data.get('id')}"
+        }
+
     @staticmethod
+    @network_errors_as_failure
     def post_to_instagram(access_token, ig_user_id, caption, image_url):
         """
         Post image to Instagram Feed.
@@ -331,7 +367,8 @@ class SocialMediaService:
             'access_token': access_token
         }
         
-        res = requests.post(container_url, data=payload)
+        # An unpublished container is harmless, so creation may be retried
+        res = get_client('instagram').post(container_url, data=payload, idempotent=True)
         
         # Check container creation
         if res.status_code != 200:
@@ -347,7 +384,7 @@ class SocialMediaService:
             'access_token': access_token
         }
         
-        pub_res = requests.post(publish_url, data=publish_payload)
+        pub_res = get_client('instagram').post(publish_url, data=publish_payload)
         
         if pub_res.status_code == 200:
             data = pub_res.json()
@@ -364,6 +401,7 @@ class SocialMediaService:
             }
 
     @staticmethod
+    @network_errors_as_failure
     def post_to_facebook(page_access_token, page_id, message, image_url=None):
         """
         Post to Facebook Page feed.
@@ -381,7 +419,7 @@ class SocialMediaService:
             url = f"https://graph.facebook.com/v21.0/{page_id}/photos"
             payload['url'] = image_url
         
-        response = requests.post(url, data=payload)
+        response = get_client('facebook').post(url, data=payload)
         
         if response.status_code == 200:
             data = response.json()
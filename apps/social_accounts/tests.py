@@ -1,3 +1,211 @@
-from django.test import TestCase
+import io
+import re
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.test import SimpleTestCase, override_settings
+from requests.adapters import BaseAdapter
+
+from . import clients, uploads
+from .models import MediaUpload
+from .uploads import CHUNK_GRANULARITY, ResumableUploadError, YouTubeResumableUpload
+
+SESSION_URI = 'https://upload.example.com/session/1'
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, body=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+class FakeYouTube:
+    """Stands in for the platform's client: keeps the received bytes of one upload session."""
+
+    def __init__(self, total_bytes, drop_after=None, stall=False, expire_after=None):
+        self.total_bytes = total_bytes
+        self.received = b''
+        # Connection drops once this many bytes have arrived (half the chunk is kept)
+        self.drop_after = drop_after
+        # Answer every chunk with 308 without keeping it
+        self.stall = stall
+        # The session expires (404) once this many bytes have arrived
+        self.expire_after = expire_after
+        self.expired = False
+        self.chunks = 0
+        self.sessions = 0
+
+    def _progress(self):
+        if len(self.received) == self.total_bytes:
+            return FakeResponse(201, body={'id': 'video-1'})
+        headers = {'Range': f'bytes=0-{len(self.received) - 1}'} if self.received else {}
+        return FakeResponse(308, headers)
+
+    def post(self, url, **kwargs):
+        self.sessions += 1
+        self.received = b''
+        self.expired = False
+        return FakeResponse(200, {'Location': SESSION_URI})
+
+    def put(self, url, headers, **kwargs):
+        if self.expired:
+            return FakeResponse(404)
+        return self._progress()
+
+    def request(self, method, url, headers, data, **kwargs):
+        self.chunks += 1
+        start = int(re.match(r'bytes (\d+)-', headers['Content-Range']).group(1))
+        assert start == len(self.received), (start, len(self.received))
+        body = b''.join(data)
+        if self.expire_after is not None and len(self.received) >= self.expire_after:
+            self.expire_after = None
+            self.expired = True
+        if self.expired:
+            return FakeResponse(404)
+        if self.stall:
+            return self._progress()
+        if self.drop_after is not None and len(self.received) >= self.drop_after:
+            self.drop_after = None
+            self.received += body[:len(body) // 2]
+            raise requests.exceptions.ConnectionError('connection reset')
+        self.received += body
+        return self._progress()
+
+
+@override_settings(YOUTUBE_UPLOAD_CHUNK_SIZE=CHUNK_GRANULARITY, SOCIAL_HTTP_RETRIES=2)
+class YouTubeResumableUploadTests(SimpleTestCase):
+    PAYLOAD = bytes(range(256)) * (CHUNK_GRANULARITY // 256) * 3 + b'tail'
+
+    def _run(self, platform, upload):
+        with mock.patch.object(uploads, 'get_client', return_value=platform), \
+                mock.patch.object(uploads.time, 'sleep'):
+            return YouTubeResumableUpload('token', upload).run(
+                io.BytesIO(self.PAYLOAD), len(self.PAYLOAD), {'snippet': {'title': 'Video'}}
+            )
+
+    def test_resumes_after_interruption(self):
+        platform = FakeYouTube(len(self.PAYLOAD), drop_after=CHUNK_GRANULARITY)
+        upload = MediaUpload()
+
+        result = self._run(platform, upload)
+
+        self.assertEqual(result, {'id': 'video-1'})
+        self.assertEqual(platform.received, self.PAYLOAD)
+        self.assertEqual(platform.sessions, 1)
+        self.assertEqual(upload.offset, len(self.PAYLOAD))
+
+    def test_resumes_stored_session(self):
+        platform = FakeYouTube(len(self.PAYLOAD))
+        platform.received = self.PAYLOAD[:CHUNK_GRANULARITY + 100]
+        upload = MediaUpload(session_uri=SESSION_URI, total_bytes=len(self.PAYLOAD))
+
+        result = self._run(platform, upload)
+
+        self.assertEqual(result, {'id': 'video-1'})
+        self.assertEqual(platform.received, self.PAYLOAD)
+        self.assertEqual(platform.sessions, 0)
+
+    def test_expired_session_restarts(self):
+        platform = FakeYouTube(len(self.PAYLOAD), expire_after=CHUNK_GRANULARITY)
+        upload = MediaUpload()
+
+        result = self._run(platform, upload)
+
+        self.assertEqual(result, {'id': 'video-1'})
+        self.assertEqual(platform.received, self.PAYLOAD)
+        self.assertEqual(platform.sessions, 2)
+
+    def test_stalled_session_gives_up(self):
+        platform = FakeYouTube(len(self.PAYLOAD), stall=True)
+
+        with self.assertRaises(ResumableUploadError):
+            self._run(platform, MediaUpload())
+
+        self.assertEqual(platform.chunks, 3)
+
+
+class ScriptedAdapter(BaseAdapter):
+    """Transport adapter that answers each request with the next scripted status code or exception."""
+
+    def __init__(self, *outcomes):
+        super().__init__()
+        self.outcomes = list(outcomes)
+        self.bodies = []
+
+    def send(self, request, **kwargs):
+        body = request.body
+        self.bodies.append(body.read() if hasattr(body, 'read') else body)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = requests.Response()
+        response.status_code = outcome
+        response.request = request
+        response.url = request.url
+        response.raw = io.BytesIO(b'{}')
+        return response
+
+    def close(self):
+        pass
+
+
+@override_settings(SOCIAL_HTTP_RETRIES=2)
+class PlatformClientRetryTests(SimpleTestCase):
+    URL = 'https://api.example.com/posts'
+
+    def _client(self, *outcomes):
+        client = clients.PlatformClient('linkedin')
+        adapter = ScriptedAdapter(*outcomes)
+        client.session.mount('https://', adapter)
+        patcher = mock.patch.object(clients.time, 'sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+        return client, adapter
+
+    def test_connect_timeout_is_always_retried(self):
+        client, adapter = self._client(requests.exceptions.ConnectTimeout('timed out'), 201)
+
+        self.assertEqual(client.post(self.URL, json={'text': 'Hello'}).status_code, 201)
+        self.assertEqual(len(adapter.bodies), 2)
+        self.assertEqual(self.sleep.call_count, 1)
+
+    def test_connection_error_is_retried_only_when_idempotent(self):
+        client, adapter = self._client(requests.exceptions.ConnectionError('reset'), 201)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.post(self.URL, json={'text': 'Hello'})
+        self.assertEqual(len(adapter.bodies), 1)
+
+        client, adapter = self._client(requests.exceptions.ConnectionError('reset'), 200)
+        self.assertEqual(client.get(self.URL).status_code, 200)
+        self.assertEqual(len(adapter.bodies), 2)
+
+    def test_server_error_is_not_retried_for_a_non_idempotent_request(self):
+        client, adapter = self._client(503, 201)
+
+        self.assertEqual(client.post(self.URL, json={'text': 'Hello'}).status_code, 503)
+        self.assertEqual(len(adapter.bodies), 1)
+        self.sleep.assert_not_called()
+
+    def test_server_error_is_retried_until_attempts_run_out(self):
+        client, adapter = self._client(502, 503, 504)
+        self.assertEqual(client.get(self.URL).status_code, 504)
+        self.assertEqual(len(adapter.bodies), 3)
+
+        client, adapter = self._client(503, 201)
+        self.assertEqual(client.post(self.URL, json={'text': 'Hello'}, idempotent=True).status_code, 201)
+
+    def test_body_stream_is_rewound_before_a_retry(self):
+        client, adapter = self._client(503, 200)
+
+        self.assertEqual(client.put(self.URL, data=io.BytesIO(b'chunk-bytes')).status_code, 200)
+        self.assertEqual(adapter.bodies, [b'chunk-bytes', b'chunk-bytes'])
+
+    def test_body_that_cannot_be_rewound_is_not_retried(self):
+        client, adapter = self._client(503, 200)
+
+        self.assertEqual(client.put(self.URL, data=iter([b'chunk-bytes'])).status_code, 503)
+        self.assertEqual(len(adapter.bodies), 1)
@@ -0,0 +1,193 @@
+"""
+Resumable media uploads.
+
+YouTube's resumable protocol: a POST with the video metadata opens an upload
+session (its URL comes back in the Location header), then the file is PUT to
+that URL in chunks with Content-Range headers. The platform answers 308 with
+the acknowledged byte Range until the last chunk, which returns the video.
+A PUT of 'bytes */<total>' without a body asks how much has arrived, so an
+interrupted upload can continue from the stored session instead of restarting.
+A 308 that acknowledges no new bytes counts as a failed attempt, so a stalled
+session gives up after SOCIAL_HTTP_RETRIES like any other failure. A chunk
+answered with 404/410 means the session expired; the upload then starts a new
+session from the first byte.
+
+State lives on a MediaUpload row that is saved after every chunk; unsaved
+instances work too (nothing is persisted).
+"""
+import logging
+import re
+import time
+
+import requests
+from django.conf import settings
+
+from .clients import backoff_delay, get_client
+from .media import MediaStream
+
+logger = logging.getLogger(__name__)
+
+# Chunk sizes must be multiples of this, except for the last chunk
+CHUNK_GRANULARITY = 256 * 1024
+
+RANGE_HEADER = re.compile(r'bytes=0-(\d+)')
+
+
+class ResumableUploadError(Exception):
+    """The platform rejected the upload. response holds the failing HTTP response, if any."""
+
+    def __init__(self, message: str, response=None):
+        super().__init__(message)
+        self.response = response
+
+
+def chunk_size() -> int:
+    """YOUTUBE_UPLOAD_CHUNK_SIZE rounded down to the protocol's 256 KiB granularity."""
+    return max(CHUNK_GRANULARITY, settings.YOUTUBE_UPLOAD_CHUNK_SIZE // CHUNK_GRANULARITY * CHUNK_GRANULARITY)
+
+
+def _acknowledged(response) -> int:
+    """Bytes the platform holds according to a 308 response's Range header."""
+    match = RANGE_HEADER.match(response.headers.get('Range', ''))
+    return int(match.group(1)) + 1 if match else 0
+
+
+class YouTubeResumableUpload:
+    """Uploads a video file to YouTube with the resumable protocol, tracking state on a MediaUpload."""
+
+    def __init__(self, access_token: str, upload):
+        self.access_token = access_token
+        self.upload = upload
+        self.client = get_client('youtube')
+
+    def _save(self, *fields):
+        if self.upload.pk:
+            self.upload.save(update_fields=[*fields, 'updated_at'])
+
+    def _headers(self, **extra) -> dict:
+        return {'Authorization': f'Bearer {self.access_token}', **extra}
+
+    def _start(self, metadata: dict, content_type: str) -> None:
+        response = self.client.post(
+            settings.YOUTUBE_UPLOAD_URL,
+            params={'uploadType': 'resumable', 'part': 'snippet,status'},
+            headers=self._headers(**{
+                'X-Upload-Content-Length': str(self.upload.total_bytes),
+                'X-Upload-Content-Type': content_type,
+            }),
+            json=metadata,
+            # Opening a session creates nothing until the file is complete
+            idempotent=True
+        )
+        if response.status_code != 200 or not response.headers.get('Location'):
+            raise ResumableUploadError("Could not start the YouTube upload session.", response)
+
+        self.upload.session_uri = response.headers['Location']
+        self.upload.offset = 0
+        self._save('session_uri', 'offset', 'total_bytes')
+        logger.info(f"Started YouTube upload session for {self.upload.total_bytes} bytes")
+
+    def _query(self):
+        """
+        Asks the platform how far the stored session got. Returns the finished
+        response if the upload is already complete, else None (offset updated).
+        Clears the session if it expired.
+        """
+        response = self.client.put(
+            self.upload.session_uri,
+            headers=self._headers(**{'Content-Range': f"bytes */{self.upload.total_bytes}", 'Content-Length': '0'})
+        )
+        if response.status_code in (200, 201):
+            return response
+        if response.status_code == 308:
+            self.upload.offset = _acknowledged(response)
+            self._save('offset')
+            return None
+        if response.status_code in (404, 410):
+            logger.info("YouTube upload session expired; starting a new one")
+            self.upload.session_uri = ''
+            self.upload.offset = 0
+            self._save('session_uri', 'offset')
+            return None
+        raise ResumableUploadError("Could not query the YouTube upload session.", response)
+
+    def _send_chunk(self, file_obj):
+        start = self.upload.offset
+        # Streamed from storage in small reads, so memory does not grow with the chunk size
+        chunk = MediaStream(file_obj, start=start, length=chunk_size(), size=self.upload.total_bytes)
+        if not len(chunk):
+            raise ResumableUploadError(f"Video file ended at {start} of {self.upload.total_bytes} bytes.")
+        end = start + len(chunk) - 1
+
+        # Retries go through _query so a partially received chunk is not resent blindly
+        return self.client.request(
+            'PUT',
+            self.upload.session_uri,
+            headers=self._headers(**{
+                'Content-Range': f"bytes {start}-{end}/{self.upload.total_bytes}",
+                'Content-Length': str(len(chunk)),
+            }),
+            data=chunk,
+            idempotent=False,
+            timeout=(settings.SOCIAL_HTTP_CONNECT_TIMEOUT, settings.SOCIAL_UPLOAD_READ_TIMEOUT)
+        )
+
+    def run(self, file_obj, total_bytes: int, metadata: dict, content_type: str = 'video/*') -> dict:
+        """
+        Uploads file_obj (seekable, opened in binary mode), resuming the stored session
+        if there is one. Returns the created video resource.
+        """
+        if self.upload.total_bytes != total_bytes:
+            # A different file: the old session cannot be continued
+            self.upload.session_uri = ''
+            self.upload.offset = 0
+        self.upload.total_bytes = total_bytes
+
+        if self.upload.session_uri:
+            finished = self._query()
+            if finished is not None:
+                return finished.json()
+        if not self.upload.session_uri:
+            self._start(metadata, content_type)
+
+        failures = 0
+        while True:
+            try:
+                response = self._send_chunk(file_obj)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                response = None
+                reason = str(e)
+            else:
+                if response.status_code in (200, 201):
+                    self.upload.offset = total_bytes
+                    self._save('offset')
+                    return response.json()
+                if response.status_code == 308:
+                    acknowledged = _acknowledged(response)
+                    progressed = acknowledged > self.upload.offset
+                    self.upload.offset = acknowledged
+                    self._save('offset')
+                    if progressed:
+                        failures = 0
+                        continue
+                    # The chunk was not taken: retried like a failure so a stalled session cannot loop forever
+                    reason = f"no progress past {acknowledged} bytes"
+                elif response.status_code in (404, 410):
+                    # _query below sees the expired session, clears it and a new one is started
+                    reason = f"session expired (HTTP {response.status_code})"
+                elif response.status_code not in (500, 502, 503, 504):
+                    raise ResumableUploadError("YouTube rejected the upload.", response)
+                else:
+                    reason = f"HTTP {response.status_code}"
+
+            failures += 1
+            if failures > settings.SOCIAL_HTTP_RETRIES:
+                raise ResumableUploadError(f"YouTube upload interrupted at {self.upload.offset} bytes: {reason}", response)
+            delay = backoff_delay(failures)
+            logger.warning(f"YouTube upload chunk failed ({reason}); resuming in {delay:.1f}s")
+            time.sleep(delay)
+            finished = self._query()
+            if finished is not None:
+                return finished.json()
+            if not self.upload.session_uri:
+                self._start(metadata, content_type)
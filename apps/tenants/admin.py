@@ -6,7 +6,7 @@ from .models import Client, Domain, UserTenantMap
 class ClientAdmin(TenantAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'schema_name', 'tenant_type', 'created_at', 'is_active')
     search_fields = ('name', 'schema_name')
-    list_filter = ('tenant_type', 'is_active')
+    list_filter = ('tenant_type', 'is_active', 'bypass_generation_cache')
 
 @admin.register(Domain)
 class DomainAdmin(admin.ModelAdmin):
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-16 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0002_usertenantmap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='bypass_generation_cache',
+            field=models.BooleanField(default=False, help_text='Always call the model instead of reusing cached generations.'),
+        ),
+    ]
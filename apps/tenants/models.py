@@ -50,6 +50,12 @@ class Client(TenantMixin):
     company_logo = models.URLField(blank=True)
     max_team_members = models.PositiveIntegerField(default=1)
     
+    # AI generation
+    bypass_generation_cache = models.BooleanField(
+        default=False,
+        help_text="Always call the model instead of reusing cached generations."
+    )
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
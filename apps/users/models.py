@@ -33,8 +33,8 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.email or self.username
     
-    def can_repurpose(self) -> bool:
-        """Check if user has remaining repurposes this month."""
+    def can_repurpose(self, count: int = 1) -> bool:
+        """Check if user has `count` remaining repurposes this month."""
         from django.conf import settings
         
         # Use user's subscription tier
@@ -45,7 +45,7 @@ class CustomUser(AbstractUser):
         
         if max_repurposes == -1:  # Unlimited
             return True
-        return self.repurposes_used_this_month < max_repurposes
+        return self.repurposes_used_this_month + count <= max_repurposes
     
     def increment_usage(self):
         """Increment the repurpose usage count."""
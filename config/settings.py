@@ -314,7 +314,52 @@ REST_AUTH = {
 # AI SETTINGS (GEMINI)
 # ==============================================================================
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
-GEMINI_MODEL = 'gemini-1.5-flash'
+GEMINI_MODEL = os.environ.get('GEMINI_MODEL', 'gemini-2.5-flash')
+
+# Per-platform generations run concurrently, capped at this many in-flight calls
+AI_GENERATION_MAX_CONCURRENCY = int(os.environ.get('AI_GENERATION_MAX_CONCURRENCY', 4))
+# Seconds allowed for a single Gemini call
+AI_GENERATION_TIMEOUT = float(os.environ.get('AI_GENERATION_TIMEOUT', 60))
+# 'per_platform' (one call per platform) or 'combined' (one call for all platforms, per-platform fallback)
+AI_GENERATION_MODE = os.environ.get('AI_GENERATION_MODE', 'per_platform')
+# Opt-in memoization of generations by input fingerprint (tenants can bypass it)
+AI_GENERATION_CACHE_ENABLED = os.environ.get('AI_GENERATION_CACHE_ENABLED', 'False').lower() == 'true'
+AI_GENERATION_CACHE_TTL = int(os.environ.get('AI_GENERATION_CACHE_TTL', 24 * 60 * 60))
+AI_GENERATION_CACHE_LOCAL_MAX_ENTRIES = int(os.environ.get('AI_GENERATION_CACHE_LOCAL_MAX_ENTRIES', 256))
+# Sources longer than this are summarized chunk-by-chunk into ContentSource.key_insights
+AI_DIGEST_THRESHOLD_CHARS = int(os.environ.get('AI_DIGEST_THRESHOLD_CHARS', 20000))
+AI_DIGEST_CHUNK_CHARS = int(os.environ.get('AI_DIGEST_CHUNK_CHARS', 12000))
+AI_DIGEST_POINTS_PER_CHUNK = int(os.environ.get('AI_DIGEST_POINTS_PER_CHUNK', 8))
+# Map calls per source (long sources get bigger chunks) and the merged digest's size
+AI_DIGEST_MAX_CHUNKS = int(os.environ.get('AI_DIGEST_MAX_CHUNKS', 24))
+AI_DIGEST_MAX_CHARS = int(os.environ.get('AI_DIGEST_MAX_CHARS', 12000))
+# Source text included in a generation prompt
+AI_PROMPT_SOURCE_MAX_CHARS = int(os.environ.get('AI_PROMPT_SOURCE_MAX_CHARS', 20000))
+# Brand voices: sample posts are distilled once into a short style instruction
+AI_BRAND_VOICE_SAMPLES_MAX_CHARS = int(os.environ.get('AI_BRAND_VOICE_SAMPLES_MAX_CHARS', 8000))
+AI_BRAND_VOICE_INSTRUCTION_MAX_WORDS = int(os.environ.get('AI_BRAND_VOICE_INSTRUCTION_MAX_WORDS', 120))
+# Model backend: 'gemini', or 'stub' (offline, deterministic; for load tests and benchmarks)
+AI_BACKEND = os.environ.get('AI_BACKEND', 'gemini')
+# Stub backend: latency in seconds (+/- jitter), injected error and 429 rates (0-1), RNG seed
+AI_STUB_LATENCY = float(os.environ.get('AI_STUB_LATENCY', 0.5))
+AI_STUB_LATENCY_JITTER = float(os.environ.get('AI_STUB_LATENCY_JITTER', 0.2))
+AI_STUB_ERROR_RATE = float(os.environ.get('AI_STUB_ERROR_RATE', 0))
+AI_STUB_RATE_LIMIT_RATE = float(os.environ.get('AI_STUB_RATE_LIMIT_RATE', 0))
+AI_STUB_SEED = int(os.environ.get('AI_STUB_SEED', 0))
+AI_STUB_STREAM_CHUNK_CHARS = int(os.environ.get('AI_STUB_STREAM_CHUNK_CHARS', 40))
+# Cluster-wide token buckets per API key (shared through Redis); 0 disables a bucket
+AI_RATE_LIMIT_ENABLED = os.environ.get('AI_RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+AI_RATE_LIMIT_RPM = int(os.environ.get('AI_RATE_LIMIT_RPM', 60))
+AI_RATE_LIMIT_TPM = int(os.environ.get('AI_RATE_LIMIT_TPM', 1000000))
+# Optional per-tenant share of the budget
+AI_RATE_LIMIT_TENANT_RPM = int(os.environ.get('AI_RATE_LIMIT_TENANT_RPM', 0))
+AI_RATE_LIMIT_TENANT_TPM = int(os.environ.get('AI_RATE_LIMIT_TENANT_TPM', 0))
+# Seconds a call may wait for budget before failing with a retry-after
+AI_RATE_LIMIT_MAX_WAIT = float(os.environ.get('AI_RATE_LIMIT_MAX_WAIT', 10))
+# Expected output tokens added to every call's estimate
+AI_RATE_LIMIT_OUTPUT_TOKENS = int(os.environ.get('AI_RATE_LIMIT_OUTPUT_TOKENS', 1024))
+# Retry-after used when Gemini itself answers 429
+AI_RATE_LIMIT_RETRY_AFTER = int(os.environ.get('AI_RATE_LIMIT_RETRY_AFTER', 30))
 
 
 # ==============================================================================
@@ -345,6 +390,23 @@ FACEBOOK_APP_ID = os.environ.get('FACEBOOK_APP_ID', '')
 FACEBOOK_APP_SECRET = os.environ.get('FACEBOOK_APP_SECRET', '')
 FACEBOOK_REDIRECT_URI = os.environ.get('FACEBOOK_REDIRECT_URI', f"{FRONTEND_URL}/callback/instagram")
 
+# Publishing HTTP clients (one keep-alive pool per platform)
+SOCIAL_HTTP_POOL_MAXSIZE = int(os.environ.get('SOCIAL_HTTP_POOL_MAXSIZE', 10))
+SOCIAL_HTTP_CONNECT_TIMEOUT = float(os.environ.get('SOCIAL_HTTP_CONNECT_TIMEOUT', 5))
+SOCIAL_HTTP_READ_TIMEOUT = float(os.environ.get('SOCIAL_HTTP_READ_TIMEOUT', 30))
+# Read timeout of media uploads, which platforms acknowledge only after processing
+SOCIAL_UPLOAD_READ_TIMEOUT = float(os.environ.get('SOCIAL_UPLOAD_READ_TIMEOUT', 300))
+# Retries after the first attempt, with exponential backoff (seconds) and full jitter
+SOCIAL_HTTP_RETRIES = int(os.environ.get('SOCIAL_HTTP_RETRIES', 3))
+SOCIAL_HTTP_BACKOFF = float(os.environ.get('SOCIAL_HTTP_BACKOFF', 0.5))
+SOCIAL_HTTP_BACKOFF_MAX = float(os.environ.get('SOCIAL_HTTP_BACKOFF_MAX', 10))
+# Media files are read from storage in pieces of this many bytes while uploading
+MEDIA_STREAM_CHUNK_SIZE = int(os.environ.get('MEDIA_STREAM_CHUNK_SIZE', 256 * 1024))
+# YouTube resumable uploads (point the URL at a local stub server for testing)
+YOUTUBE_UPLOAD_URL = os.environ.get('YOUTUBE_UPLOAD_URL', 'https://www.googleapis.com/upload/youtube/v3/videos')
+# Bytes per chunk; rounded down to a multiple of 256 KiB
+YOUTUBE_UPLOAD_CHUNK_SIZE = int(os.environ.get('YOUTUBE_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+
 
 # ==============================================================================
 # STRIPE SETTINGS
@@ -433,11 +495,27 @@ SUBSCRIPTION_LIMITS = {
     },
 }
 
+# Maximum number of sources accepted by /api/repurposer/repurpose/batch/
+REPURPOSE_BATCH_MAX_SOURCES = int(os.environ.get('REPURPOSE_BATCH_MAX_SOURCES', 20))
+# Uploaded source files (PDF or .txt) larger than this are rejected, per file
+REPURPOSE_UPLOAD_MAX_BYTES = int(os.environ.get('REPURPOSE_UPLOAD_MAX_BYTES', 50 * 1024 * 1024))
+# Maximum alternatives a single regeneration call may return
+REGENERATE_MAX_VARIANTS = int(os.environ.get('REGENERATE_MAX_VARIANTS', 5))
+
 
 # ==============================================================================
 # CELERY SETTINGS (Upstash Redis)
 # ==============================================================================
-CELERY_BROKER_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+# Keep cache/limiter calls from hanging a request if Redis is unreachable
+REDIS_SOCKET_TIMEOUT = float(os.environ.get('REDIS_SOCKET_TIMEOUT', 2))
+# After a connection error, caches and the rate limiter skip Redis for this many seconds
+REDIS_FAILURE_BACKOFF = float(os.environ.get('REDIS_FAILURE_BACKOFF', 30))
+# Cache hit/miss counters are added to the cluster-wide totals in batches
+CACHE_STATS_FLUSH_EVERY = int(os.environ.get('CACHE_STATS_FLUSH_EVERY', 100))
+CACHE_STATS_FLUSH_INTERVAL = float(os.environ.get('CACHE_STATS_FLUSH_INTERVAL', 10))
+
+CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
 
 # Handle SSL for Upstash Redis (uses rediss:// protocol)
@@ -452,3 +530,73 @@ CELERY_TIMEZONE = 'UTC'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+
+# Publishing runs in the publish_post task; route it to its own queue if set (e.g. 'publish')
+PUBLISH_QUEUE = os.environ.get('PUBLISH_QUEUE', '')
+# Interrupted resumable uploads are retried after this many seconds (doubling per retry)
+PUBLISH_RETRY_DELAY = int(os.environ.get('PUBLISH_RETRY_DELAY', 30))
+# A post stuck in 'publishing' this long (lost worker) may be published again
+PUBLISH_STALE_AFTER = int(os.environ.get('PUBLISH_STALE_AFTER', 60 * 60))
+# Publishing a whole source runs one lane per platform; concurrent publishes per lane ('platform=limit,...')
+PUBLISH_LANE_CONCURRENCY = {
+    platform.strip(): int(limit)
+    for platform, _, limit in (
+        item.partition('=') for item in _split_env_list(
+            os.environ.get('PUBLISH_LANE_CONCURRENCY', 'youtube=1,linkedin=2,twitter=2')
+        )
+    )
+}
+PUBLISH_LANE_DEFAULT_CONCURRENCY = int(os.environ.get('PUBLISH_LANE_DEFAULT_CONCURRENCY', 2))
+
+
+# ==============================================================================
+# EXTRACTION CACHE (Redis + in-process LRU)
+# ==============================================================================
+EXTRACTION_CACHE_TTL = int(os.environ.get('EXTRACTION_CACHE_TTL', 7 * 24 * 60 * 60))
+EXTRACTION_CACHE_LOCAL_MAX_ENTRIES = int(os.environ.get('EXTRACTION_CACHE_LOCAL_MAX_ENTRIES', 128))
+EXTRACTION_CACHE_LOCAL_MAX_BYTES = int(os.environ.get('EXTRACTION_CACHE_LOCAL_MAX_BYTES', 32 * 1024 * 1024))
+EXTRACTION_CACHE_MAX_VALUE_BYTES = int(os.environ.get('EXTRACTION_CACHE_MAX_VALUE_BYTES', 2 * 1024 * 1024))
+# Videos without a transcript are remembered as failures for this long
+EXTRACTION_NEGATIVE_CACHE_TTL = int(os.environ.get('EXTRACTION_NEGATIVE_CACHE_TTL', 6 * 60 * 60))
+# Threads fetching YouTube titles (oEmbed) concurrently with transcripts
+YOUTUBE_METADATA_WORKERS = int(os.environ.get('YOUTUBE_METADATA_WORKERS', 4))
+YOUTUBE_OEMBED_TIMEOUT = float(os.environ.get('YOUTUBE_OEMBED_TIMEOUT', 5))
+# Clean extracted text (whitespace, repeated headers, caption duplicates) before storing it
+TEXT_NORMALIZATION_ENABLED = os.environ.get('TEXT_NORMALIZATION_ENABLED', 'True').lower() == 'true'
+
+
+# ==============================================================================
+# PDF EXTRACTION
+# ==============================================================================
+# Worker processes for page-parallel parsing (1 = always sequential)
+PDF_EXTRACT_WORKERS = int(os.environ.get('PDF_EXTRACT_WORKERS', min(4, os.cpu_count() or 1)))
+PDF_EXTRACT_PAGES_PER_TASK = int(os.environ.get('PDF_EXTRACT_PAGES_PER_TASK', 8))
+# Shorter documents are parsed in-process
+PDF_EXTRACT_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_EXTRACT_PARALLEL_MIN_PAGES', 16))
+# Stop extracting once this many characters were read (0 = no limit)
+PDF_EXTRACT_MAX_CHARS = int(os.environ.get('PDF_EXTRACT_MAX_CHARS', 2000000))
+PDF_EXTRACT_MP_CONTEXT = os.environ.get('PDF_EXTRACT_MP_CONTEXT', 'spawn')
+
+
+# ==============================================================================
+# OUTBOUND HTTP
+# ==============================================================================
+# Pooled keep-alive connections per session (hosts cached / connections per host)
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', 10))
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 10))
+
+# Blog fetching
+EXTRACTION_HTTP_CONNECT_TIMEOUT = float(os.environ.get('EXTRACTION_HTTP_CONNECT_TIMEOUT', 5))
+EXTRACTION_HTTP_READ_TIMEOUT = float(os.environ.get('EXTRACTION_HTTP_READ_TIMEOUT', 20))
+# Pages are truncated past this size
+EXTRACTION_HTTP_MAX_BYTES = int(os.environ.get('EXTRACTION_HTTP_MAX_BYTES', 5 * 1024 * 1024))
+# Retries after the first attempt, with exponential backoff (seconds) and full jitter
+EXTRACTION_HTTP_RETRIES = int(os.environ.get('EXTRACTION_HTTP_RETRIES', 2))
+EXTRACTION_HTTP_BACKOFF = float(os.environ.get('EXTRACTION_HTTP_BACKOFF', 0.5))
+EXTRACTION_HTTP_BACKOFF_MAX = float(os.environ.get('EXTRACTION_HTTP_BACKOFF_MAX', 8))
+# Cached articles older than this are revalidated with a conditional GET
+EXTRACTION_BLOG_REVALIDATE_AFTER = int(os.environ.get('EXTRACTION_BLOG_REVALIDATE_AFTER', 60 * 60))
+# BeautifulSoup tree builder for blog pages: 'lxml' (C-backed) or 'html.parser' (pure Python)
+EXTRACTION_HTML_PARSER = os.environ.get('EXTRACTION_HTML_PARSER', 'lxml')
+# 'readability' keeps only the highest scoring content block; 'paragraphs' keeps every long <p>
+EXTRACTION_BLOG_MODE = os.environ.get('EXTRACTION_BLOG_MODE', 'readability')
@@ -19,8 +19,9 @@ WORKER_PID=$!
 sleep 3
 
 # Start Gunicorn (Django) in foreground
+# Threaded workers: an open Server-Sent Events stream (/repurpose/stream/) holds one thread, not a worker
 echo "Starting Gunicorn..."
-gunicorn config.wsgi:application --bind 0.0.0.0:$PORT --workers 2 --timeout 120
+gunicorn config.wsgi:application --bind 0.0.0.0:$PORT --workers 2 --worker-class gthread --threads ${GUNICORN_THREADS:-8} --timeout 120
 
 # If Gunicorn exits, kill Celery processes
 kill $BEAT_PID $WORKER_PID 2>/dev/null